@@ -12,6 +12,12 @@ def _env_bool(name: str, default: bool = False) -> bool:
     raw = raw.strip().lower()
     return raw in {"1", "true", "yes", "y", "on"}
 
+# Resolve the project root directory.
+# NOTE: This assumes the current file lives at:
+# <project_root>/src/backend/config/settings.py
+# If the folder structure changes, this index MUST be updated.
+PROJECT_ROOT = Path(__file__).resolve().parents[3]
+
 # Data Cleaning Configuration
 CLEANING_CONFIG: Dict[str, Any] = {
     "invalid_values": ["", "unknown", "unk", "none", "null"],
@@ -23,39 +29,119 @@ CLEANING_CONFIG: Dict[str, Any] = {
         "Title", "Plot", "Genre", "Release Year",
         "Director", "Cast", "Origin/Ethnicity", "Wiki Page"
     ],
-    "text_column": "Plot"
+    "text_column": "Plot",
+    # Clean whole columns with pandas string ops instead of per-cell Python calls
+    "vectorized": _env_bool("CLEANING_VECTORIZED", default=True),
+    # Number of CSV rows read, cleaned and written per batch (0 = whole file at once)
+    "chunksize": int(os.getenv("ETL_CHUNKSIZE", 0))
+}
+
+# Intermediate Artifact Configuration
+ARTIFACT_CONFIG: Dict[str, Any] = {
+    # "jsonl" (row-oriented), "arrow" (memory-mapped Arrow IPC) or "parquet";
+    # columnar chunk artifacts reference their film by doc_id instead of copying its metadata
+    "format": os.getenv("ARTIFACT_FORMAT", "jsonl")
 }
 
 # Chunking Configuration
 CHUNKING_CONFIG: Dict[str, Any] = {
     "strategy": os.getenv("CHUNK_STRATEGY", "recursive"),
     "chunk_size": int(os.getenv("CHUNK_SIZE", 1200)),
-    "chunk_overlap": int(os.getenv("CHUNK_OVERLAP", 200))
+    "chunk_overlap": int(os.getenv("CHUNK_OVERLAP", 200)),
+    # Number of worker processes used to split documents (1 = serial)
+    "workers": int(os.getenv("CHUNK_WORKERS", 1)),
+    # Number of documents sent to a worker per task
+    "batch_size": int(os.getenv("CHUNK_BATCH_SIZE", 256)),
+    # Read docs and write chunks incrementally instead of loading everything in memory
+    "streaming": _env_bool("CHUNK_STREAMING", default=False),
+    # Record each chunk's character span in its plot and build an offset-based doc store
+    "parent_document": _env_bool("CHUNK_PARENT_DOCUMENT", default=False),
+    "doc_store_dir": str((PROJECT_ROOT / os.getenv("DOC_STORE_DIR", "db/doc_store")).resolve())
 }
 
 # Embedding Configuration
 EMBEDDING_CONFIG: Dict[str, Any] = {
     "embedding_model": os.getenv("EMBEDDING_MODEL", "text-embedding-3-small"),
+    # Optional OpenAI-compatible endpoint (e.g. a local fake embedding server)
+    "base_url": os.getenv("EMBEDDING_BASE_URL") or None,
+    # Persistent (model, text hash) -> vector cache shared by ingestion and retrieval
+    "cache_enabled": _env_bool("EMBEDDING_CACHE_ENABLED", default=False),
+    "cache_path": str((PROJECT_ROOT / os.getenv("EMBEDDING_CACHE_PATH", "db/embedding_cache.sqlite")).resolve()),
+    "cache_max_entries": int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", 500_000))
 }
 
 # Vectorstore Configuration
 
-# Resolve the project root directory.
-# NOTE: This assumes the current file lives at:
-# <project_root>/src/backend/config/settings.py
-# If the folder structure changes, this index MUST be updated.
-PROJECT_ROOT = Path(__file__).resolve().parents[3]
-
 VECTORSTORE_CONFIG = {
     "persist_dir": str((PROJECT_ROOT / os.getenv("PERSIST_DIR", "db/chroma")).resolve()),
-    "collection_name": os.getenv("VECTORSTORE_COLLECTION_NAME", "movie_plots")
+    "collection_name": os.getenv("VECTORSTORE_COLLECTION_NAME", "movie_plots"),
+    # "chroma" (persisted Chroma collection) or "local" (in-process exact index)
+    "backend": os.getenv("VECTORSTORE_BACKEND", "chroma"),
+    "local_index_dir": str((PROJECT_ROOT / os.getenv("LOCAL_INDEX_DIR", "db/local_index")).resolve()),
+    # Inverted index over Genre / Release Year / Director / Origin for filtered retrieval
+    "metadata_index": _env_bool("VECTORSTORE_METADATA_INDEX", default=False),
+    "metadata_index_dir": str((PROJECT_ROOT / os.getenv("METADATA_INDEX_DIR", "db/metadata_index")).resolve()),
+    # BM25 inverted index over chunk text + Title/Cast for hybrid retrieval
+    "sparse_index": _env_bool("VECTORSTORE_SPARSE_INDEX", default=False),
+    "sparse_index_dir": str((PROJECT_ROOT / os.getenv("SPARSE_INDEX_DIR", "db/sparse_index")).resolve()),
+    # Store film metadata once per doc_id; vector store records keep ids + filterable fields
+    "normalize_metadata": _env_bool("VECTORSTORE_NORMALIZE_METADATA", default=False),
+    "film_metadata_dir": str((PROJECT_ROOT / os.getenv("FILM_METADATA_DIR", "db/film_metadata")).resolve()),
+    # Compact copy of the local index vectors: "none", "float16" or "int8",
+    # optionally truncated (Matryoshka) to the first N dimensions (0 keeps all)
+    "quantization": os.getenv("LOCAL_INDEX_QUANTIZATION", "none"),
+    "truncate_dim": int(os.getenv("LOCAL_INDEX_TRUNCATE_DIM", 0)),
+    # Candidates rescored with float32 vectors: rescore_factor * top_k
+    "rescore_factor": int(os.getenv("LOCAL_INDEX_RESCORE_FACTOR", 4)),
+    # Only embed new/changed chunks (content hash) and delete removed ones
+    "incremental": _env_bool("VECTORSTORE_INCREMENTAL", default=False),
+    # Number of records sent to the collection per upsert/delete call
+    "batch_size": int(os.getenv("VECTORSTORE_BATCH_SIZE", 1000)),
+    # Embed batches concurrently (asyncio) with rate-limit-aware scheduling
+    "concurrent": _env_bool("VECTORSTORE_CONCURRENT", default=False),
+    "max_batch_tokens": int(os.getenv("VECTORSTORE_MAX_BATCH_TOKENS", 100_000)),
+    "max_concurrency": int(os.getenv("VECTORSTORE_MAX_CONCURRENCY", 4)),
+    "max_retries": int(os.getenv("VECTORSTORE_MAX_RETRIES", 6)),
+    # Record committed batches so an interrupted build resumes where it stopped
+    "checkpoint": _env_bool("VECTORSTORE_CHECKPOINT", default=False)
 }
 
 # Retriever Configuration
 RETRIEVER_CONFIG: Dict[str, Any] = {
     "top_k": int(os.getenv("RETRIEVER_TOP_K", 10)),
     "use_threshold": _env_bool("RETRIEVER_USE_THRESHOLD", default=False),
-    "distance_threshold": float(os.getenv("RETRIEVER_DISTANCE_THRESHOLD", 0.35))
+    "distance_threshold": float(os.getenv("RETRIEVER_DISTANCE_THRESHOLD", 0.35)),
+    # In-process caches (0 disables): query embeddings and ranked results
+    "query_cache_size": int(os.getenv("RETRIEVER_QUERY_CACHE_SIZE", 0)),
+    "result_cache_size": int(os.getenv("RETRIEVER_RESULT_CACHE_SIZE", 0)),
+    "result_cache_ttl": float(os.getenv("RETRIEVER_RESULT_CACHE_TTL", 300)),
+    # Seconds between checks of the vector store (and side indexes) for a rebuild
+    "version_check_interval": float(os.getenv("RETRIEVER_VERSION_CHECK_INTERVAL", 5)),
+    # Stitch overlapping chunks of the same film and refill freed slots with other films
+    "dedup_overlap": _env_bool("RETRIEVER_DEDUP_OVERLAP", default=False),
+    "dedup_fetch_multiplier": int(os.getenv("RETRIEVER_DEDUP_FETCH_MULTIPLIER", 2)),
+    # Fuse dense and BM25 rankings with reciprocal-rank fusion (needs the sparse index)
+    "hybrid": _env_bool("RETRIEVER_HYBRID", default=False),
+    "hybrid_candidates": int(os.getenv("RETRIEVER_HYBRID_CANDIDATES", 50)),
+    "rrf_k": int(os.getenv("RETRIEVER_RRF_K", 60)),
+    # Two-stage retrieval: over-fetch candidates and re-rank them with a local scorer
+    "rerank": _env_bool("RETRIEVER_RERANK", default=False),
+    "rerank_scorer": os.getenv("RETRIEVER_RERANK_SCORER", "lexical"),
+    "rerank_model": os.getenv("RETRIEVER_RERANK_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2"),
+    "rerank_candidates": int(os.getenv("RETRIEVER_RERANK_CANDIDATES", 30)),
+    "rerank_top_k": int(os.getenv("RETRIEVER_RERANK_TOP_K", 5)),
+    "rerank_batch_size": int(os.getenv("RETRIEVER_RERANK_BATCH_SIZE", 16)),
+    "rerank_budget_ms": float(os.getenv("RETRIEVER_RERANK_BUDGET_MS", 500)),
+    # Replace matched (small) chunks by a window of their parent plot (needs the doc store)
+    "parent_document": _env_bool("RETRIEVER_PARENT_DOCUMENT", default=False),
+    "parent_window_chars": int(os.getenv("RETRIEVER_PARENT_WINDOW_CHARS", 2000))
+}
+
+# Context Packing Configuration
+CONTEXT_CONFIG: Dict[str, Any] = {
+    # Stitch adjacent chunks of the same film and enforce a token budget on the context
+    "packing": _env_bool("CONTEXT_PACKING", default=False),
+    "token_budget": int(os.getenv("CONTEXT_TOKEN_BUDGET", 3000))
 }
 
 # LLM (OpenAI) Configuration
@@ -64,3 +150,16 @@ LLM_CONFIG: Dict[str, Any] = {
     "temperature": float(os.getenv("LLM_TEMPERATURE", 0.0))
 }
 
+# Answer Cache Configuration
+ANSWER_CACHE_CONFIG: Dict[str, Any] = {
+    # Persistent (model, temperature, prompt hash) -> answer cache; bypassed when temperature > 0
+    "enabled": _env_bool("ANSWER_CACHE_ENABLED", default=False),
+    "path": str((PROJECT_ROOT / os.getenv("ANSWER_CACHE_PATH", "db/answer_cache.sqlite")).resolve()),
+    "max_entries": int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", 10_000)),
+    # Second tier: serve near-duplicate questions by query-embedding similarity
+    "semantic_enabled": _env_bool("ANSWER_CACHE_SEMANTIC_ENABLED", default=False),
+    "semantic_threshold": float(os.getenv("ANSWER_CACHE_SEMANTIC_THRESHOLD", 0.95)),
+    # Semantic entries older than this are not served (0 = no expiry)
+    "semantic_ttl": float(os.getenv("ANSWER_CACHE_SEMANTIC_TTL_SECONDS", 604800))
+}
+
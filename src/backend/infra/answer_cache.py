@@ -0,0 +1,336 @@
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from array import array
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+logger = logging.getLogger("ANSWER_CACHE")
+
+
+class AnswerCache:
+    """
+    Persistent, size-bounded cache of LLM answers.
+
+    Exact tier: answers are keyed by a hash of (model, temperature, final
+    prompt). The prompt already contains the template, the question and the
+    retrieved context, so any change to those is a different key.
+
+    Semantic tier (optional, `semantic_threshold` set): answers are also
+    stored with the embedding of the question that produced them, and a new
+    question whose embedding has cosine similarity >= threshold with a stored
+    one is served from the cache without retrieval or generation. Since no
+    prompt is built on a hit, the caller passes what the answer depends on:
+    a `namespace` (embedding model and prompt template) that scopes the
+    entries, and the `collection_version` of the vector store. Entries of
+    another collection version are deleted on the next lookup, and entries
+    older than `semantic_ttl` seconds (0 = no expiry) are never served.
+
+    Both tiers live in one local SQLite file; when a tier grows beyond
+    `max_entries`, the least recently used entries are evicted. Entries are
+    scoped by model and temperature, so switching either never returns stale
+    answers. Caching is only meaningful for deterministic generation, so the
+    LLMClient does not enable it when temperature > 0.
+    """
+    def __init__(
+        self,
+        path: Path,
+        model_name: str,
+        temperature: float,
+        max_entries: int = 10_000,
+        semantic_threshold: float | None = None,
+        semantic_ttl: float = 0,
+    ):
+        self.path = Path(path)
+        self.model_name = model_name
+        self.temperature = temperature
+        self.max_entries = max_entries
+        self.semantic_threshold = semantic_threshold
+        self.semantic_ttl = semantic_ttl
+        self.scope = f"{model_name}|{temperature}"
+
+        self.hits = 0
+        self.misses = 0
+        self.semantic_hits = 0
+        self.semantic_misses = 0
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS answers ("
+            " scope TEXT NOT NULL,"
+            " prompt_hash TEXT NOT NULL,"
+            " answer TEXT NOT NULL,"
+            " last_access REAL NOT NULL,"
+            " PRIMARY KEY (scope, prompt_hash))"
+        )
+        self._migrate_semantic_table()
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS semantic_answers ("
+            " scope TEXT NOT NULL,"
+            " question TEXT NOT NULL,"
+            " collection TEXT NOT NULL,"
+            " vector BLOB NOT NULL,"
+            " payload TEXT NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " last_access REAL NOT NULL,"
+            " PRIMARY KEY (scope, question))"
+        )
+        for table in ("answers", "semantic_answers"):
+            self._conn.execute(
+                f"CREATE INDEX IF NOT EXISTS idx_{table}_last_access "
+                f"ON {table} (last_access)"
+            )
+        self._conn.commit()
+
+        # In-memory matrix of normalized question embeddings for one
+        # (scope, collection version), rebuilt lazily after writes to the
+        # semantic tier.
+        self._semantic_key: Tuple[str, str] | None = None
+        self._semantic_questions: List[str] = []
+        self._semantic_created: np.ndarray = np.empty(0)
+        self._semantic_matrix: np.ndarray = np.empty((0, 0), dtype=np.float32)
+
+        logger.info(
+            "Answer cache ready | path=%s | scope=%s | max_entries=%s | semantic_threshold=%s "
+            "| semantic_ttl=%s",
+            self.path,
+            self.scope,
+            self.max_entries,
+            self.semantic_threshold,
+            self.semantic_ttl,
+        )
+
+    @property
+    def semantic_enabled(self) -> bool:
+        return self.semantic_threshold is not None
+
+    # Exact tier
+
+    def get(self, prompt: str) -> str | None:
+        key = self._key(prompt)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT answer FROM answers WHERE scope = ? AND prompt_hash = ?",
+                (self.scope, key),
+            ).fetchone()
+            if row is not None:
+                self._conn.execute(
+                    "UPDATE answers SET last_access = ? WHERE scope = ? AND prompt_hash = ?",
+                    (time.time(), self.scope, key),
+                )
+                self._conn.commit()
+
+        if row is None:
+            self.misses += 1
+            self.log_stats("miss")
+            return None
+
+        self.hits += 1
+        self.log_stats("hit")
+        return row[0]
+
+    def put(self, prompt: str, answer: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO answers (scope, prompt_hash, answer, last_access) "
+                "VALUES (?, ?, ?, ?)",
+                (self.scope, self._key(prompt), answer, time.time()),
+            )
+            self._evict("answers")
+            self._conn.commit()
+
+    # Semantic tier
+
+    def get_similar(
+        self,
+        embedding: List[float],
+        namespace: str = "",
+        collection_version: str = "",
+    ) -> Dict[str, Any] | None:
+        """
+        Returns the cached payload of the most similar stored question
+        (plus its `similarity`), or None when no stored question of the same
+        namespace and collection version reaches the threshold.
+        """
+        if not self.semantic_enabled:
+            return None
+
+        scope = self._semantic_scope(namespace)
+        query = self._normalize(embedding)
+        with self._lock:
+            questions, matrix, created = self._load_semantic_index(scope, collection_version)
+            best = None
+            if questions and matrix.shape[1] == len(query):
+                scores = matrix @ query
+                if self.semantic_ttl:
+                    scores[created < time.time() - self.semantic_ttl] = -np.inf
+                idx = int(np.argmax(scores))
+                if scores[idx] >= self.semantic_threshold:
+                    best = (questions[idx], float(scores[idx]))
+            elif questions:
+                logger.warning(
+                    "Semantic answer cache holds %s-d embeddings but the query has %s "
+                    "dimensions | skipping lookup",
+                    matrix.shape[1],
+                    len(query),
+                )
+
+            payload = None
+            if best is not None:
+                row = self._conn.execute(
+                    "SELECT payload FROM semantic_answers WHERE scope = ? AND question = ?",
+                    (scope, best[0]),
+                ).fetchone()
+                if row is not None:
+                    self._conn.execute(
+                        "UPDATE semantic_answers SET last_access = ? WHERE scope = ? AND question = ?",
+                        (time.time(), scope, best[0]),
+                    )
+                    self._conn.commit()
+                    payload = {**json.loads(row[0]), "similarity": best[1]}
+
+        if payload is None:
+            self.semantic_misses += 1
+            self.log_stats("semantic miss")
+            return None
+
+        self.semantic_hits += 1
+        logger.debug(
+            "Semantic answer cache hit | cached_question=%r | similarity=%.4f",
+            best[0],
+            best[1],
+        )
+        self.log_stats("semantic hit")
+        return payload
+
+    def put_similar(
+        self,
+        question: str,
+        embedding: List[float],
+        payload: Dict[str, Any],
+        namespace: str = "",
+        collection_version: str = "",
+    ) -> None:
+        if not self.semantic_enabled:
+            return
+
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO semantic_answers "
+                "(scope, question, collection, vector, payload, created_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    self._semantic_scope(namespace),
+                    question,
+                    collection_version,
+                    array("f", self._normalize(embedding)).tobytes(),
+                    json.dumps(payload, ensure_ascii=False),
+                    now,
+                    now,
+                ),
+            )
+            self._evict("semantic_answers")
+            self._conn.commit()
+            self._semantic_key = None
+
+    # Stats
+
+    def stats(self) -> Dict[str, float]:
+        total = self.hits + self.misses
+        semantic_total = self.semantic_hits + self.semantic_misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "semantic_hits": self.semantic_hits,
+            "semantic_misses": self.semantic_misses,
+            "semantic_hit_rate": self.semantic_hits / semantic_total if semantic_total else 0.0,
+        }
+
+    def log_stats(self, result: str) -> None:
+        stats = self.stats()
+        logger.info(
+            "Answer cache %s | exact_hit_rate=%.2f%% (%s/%s) | semantic_hit_rate=%.2f%% (%s/%s)",
+            result,
+            stats["hit_rate"] * 100,
+            stats["hits"],
+            stats["hits"] + stats["misses"],
+            stats["semantic_hit_rate"] * 100,
+            stats["semantic_hits"],
+            stats["semantic_hits"] + stats["semantic_misses"],
+        )
+
+    # Storage helpers
+
+    def _key(self, prompt: str) -> str:
+        return hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _normalize(embedding: List[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _semantic_scope(self, namespace: str) -> str:
+        return f"{self.scope}|{namespace}"
+
+    def _load_semantic_index(self, scope: str, collection_version: str):
+        if self._semantic_key != (scope, collection_version):
+            deleted = self._conn.execute(
+                "DELETE FROM semantic_answers WHERE scope = ? AND collection != ?",
+                (scope, collection_version),
+            ).rowcount
+            if deleted:
+                self._conn.commit()
+                logger.info(
+                    "Vector store changed | dropped %s semantic cache entries", deleted
+                )
+
+            rows = self._conn.execute(
+                "SELECT question, vector, created_at FROM semantic_answers WHERE scope = ?",
+                (scope,),
+            ).fetchall()
+            # Only vectors of the most common size can be compared
+            dims = [len(blob) // 4 for _, blob, _ in rows]
+            dim = max(set(dims), key=dims.count) if dims else 0
+            rows = [row for row, row_dim in zip(rows, dims) if row_dim == dim]
+
+            self._semantic_questions = [question for question, _, _ in rows]
+            self._semantic_created = np.array([created for _, _, created in rows], dtype=np.float64)
+            self._semantic_matrix = (
+                np.vstack([np.frombuffer(blob, dtype=np.float32) for _, blob, _ in rows])
+                if rows
+                else np.empty((0, 0), dtype=np.float32)
+            )
+            self._semantic_key = (scope, collection_version)
+        return self._semantic_questions, self._semantic_matrix, self._semantic_created
+
+    def _migrate_semantic_table(self) -> None:
+        # Tables written before entries recorded their collection version
+        # cannot be validated; drop them
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(semantic_answers)")}
+        if columns and "collection" not in columns:
+            self._conn.execute("DROP TABLE semantic_answers")
+            logger.info("Dropped semantic answer cache entries without a collection version")
+
+    def _evict(self, table: str) -> None:
+        (count,) = self._conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()
+        overflow = count - self.max_entries
+        if overflow <= 0:
+            return
+
+        self._conn.execute(
+            f"DELETE FROM {table} WHERE rowid IN ("
+            f" SELECT rowid FROM {table} ORDER BY last_access LIMIT ?)",
+            (overflow,),
+        )
+        logger.debug("Evicted %s least recently used entries from %s", overflow, table)
@@ -0,0 +1,257 @@
+import logging
+from collections import abc
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Sequence
+
+from backend.infra import versioned_dir
+
+logger = logging.getLogger("ARROW_ARTIFACTS")
+
+ARTIFACT_FORMATS = ("jsonl", "arrow", "parquet")
+
+# Chunk columns; everything else about a chunk comes from its document
+CHUNK_COLUMNS = ("chunk_id", "doc_id", "chunk_index", "text", "char_start", "char_end")
+DOCS_PATH_KEY = b"docs_path"
+
+
+def _pyarrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.ipc  # noqa: F401
+        import pyarrow.parquet  # noqa: F401
+    except ImportError as e:
+        raise ImportError("ARTIFACT_FORMAT=arrow/parquet requires the pyarrow package") from e
+    return pa
+
+
+def artifact_path(path: Path, artifact_format: str) -> Path:
+    """
+    Path of an artifact in the given format: docs.jsonl -> docs.arrow.
+    """
+    if artifact_format not in ARTIFACT_FORMATS:
+        raise ValueError(f"Unknown artifact format: {artifact_format}")
+    path = Path(path)
+    return path if artifact_format == "jsonl" else path.with_suffix(f".{artifact_format}")
+
+
+def is_columnar(path: Path) -> bool:
+    return Path(path).suffix in (".arrow", ".parquet")
+
+
+class TableWriter:
+    """
+    Incremental writer of record batches to an Arrow IPC file (uncompressed,
+    so it can be memory-mapped and read without copies) or a Parquet file
+    (compressed, smaller, decoded on read).
+    """
+    def __init__(self, path: Path, schema, metadata: Dict[bytes, bytes] | None = None):
+        pa = _pyarrow()
+        self.path = Path(path)
+        self.schema = schema.with_metadata(metadata) if metadata else schema
+        self.rows = 0
+        if self.path.suffix == ".parquet":
+            self._writer = pa.parquet.ParquetWriter(self.path, self.schema, compression="zstd")
+        else:
+            self._writer = pa.ipc.new_file(self.path, self.schema)
+
+    def write(self, columns: Dict[str, Sequence[Any]]) -> None:
+        pa = _pyarrow()
+        batch = pa.record_batch(
+            [pa.array(columns[field.name], type=field.type) for field in self.schema],
+            schema=self.schema,
+        )
+        if self.path.suffix == ".parquet":
+            self._writer.write_batch(batch)
+        else:
+            self._writer.write(batch)
+        self.rows += batch.num_rows
+
+    def close(self) -> None:
+        self._writer.close()
+
+
+def docs_schema(metadata_columns: Sequence[str]):
+    pa = _pyarrow()
+    return pa.schema(
+        [("id", pa.string()), ("text", pa.string())]
+        + [(column, pa.string()) for column in metadata_columns]
+    )
+
+
+def chunks_schema():
+    pa = _pyarrow()
+    return pa.schema(
+        [
+            ("chunk_id", pa.string()),
+            ("doc_id", pa.string()),
+            ("chunk_index", pa.int32()),
+            ("text", pa.string()),
+            ("char_start", pa.int32()),
+            ("char_end", pa.int32()),
+        ]
+    )
+
+
+def read_table(path: Path):
+    """
+    Reads an artifact table. Arrow IPC files are memory-mapped and the
+    returned table references the mapped pages directly (zero-copy).
+    """
+    pa = _pyarrow()
+    path = Path(path)
+    if path.suffix == ".parquet":
+        return pa.parquet.read_table(path, memory_map=True)
+    return pa.ipc.open_file(pa.memory_map(str(path), "r")).read_all()
+
+
+def iter_documents(path: Path, batch_rows: int = 4096) -> Iterator[Dict[str, Any]]:
+    """
+    Yields documents with the same shape as docs.jsonl records
+    ({"id", "text", "metadata"}), converting one slice of the table at a time.
+    """
+    table = read_table(path)
+    metadata_columns = [name for name in table.column_names if name not in ("id", "text")]
+    for batch in table.to_batches(max_chunksize=batch_rows):
+        columns = batch.to_pydict()
+        for row in range(batch.num_rows):
+            yield {
+                "id": columns["id"][row],
+                "text": columns["text"][row],
+                "metadata": {name: columns[name][row] for name in metadata_columns},
+            }
+
+
+def write_chunks(
+    path: Path,
+    chunks: Iterable[Dict[str, Any]],
+    docs_path: Path,
+    batch_rows: int = 8192,
+) -> int:
+    """
+    Writes chunk records without their copied metadata: each row keeps its
+    `doc_id`, and the source documents path is stored in the schema metadata
+    so readers can join the film metadata back. Returns the chunks written.
+    """
+    metadata = {DOCS_PATH_KEY: str(Path(docs_path).resolve()).encode("utf-8")}
+    writer = TableWriter(path, chunks_schema(), metadata)
+    columns: Dict[str, List[Any]] = {name: [] for name in CHUNK_COLUMNS}
+    try:
+        for chunk in chunks:
+            md = chunk["metadata"]
+            columns["chunk_id"].append(chunk["chunk_id"])
+            columns["doc_id"].append(chunk["doc_id"])
+            columns["chunk_index"].append(md["chunk_index"])
+            columns["text"].append(chunk["text"])
+            columns["char_start"].append(md.get("char_start"))
+            columns["char_end"].append(md.get("char_end"))
+            if len(columns["chunk_id"]) >= batch_rows:
+                writer.write(columns)
+                columns = {name: [] for name in CHUNK_COLUMNS}
+        if columns["chunk_id"] or writer.rows == 0:
+            writer.write(columns)
+    finally:
+        writer.close()
+    return writer.rows
+
+
+def read_chunks(path: Path) -> "ChunkTable":
+    """
+    Opens a chunk table as chunks.jsonl-shaped records, joined with the
+    film metadata of each chunk from the documents table by `doc_id`.
+    """
+    chunks = ChunkTable(path)
+    logger.info(
+        "Chunk table read | path=%s | chunks=%s | films=%s", path, len(chunks), chunks.docs.num_rows
+    )
+    return chunks
+
+
+class ChunkTable(abc.Sequence):
+    """
+    Read-only sequence of chunk records ({"chunk_id", "doc_id", "text",
+    "metadata"}) over a chunk table and its documents table. Both stay
+    memory-mapped; rows are converted to Python records only when they
+    are accessed, one slice at a time when iterating, and only the doc id
+    column is materialized, into a doc_id -> row map for the join.
+    """
+    def __init__(self, path: Path, batch_rows: int = 4096):
+        self.path = Path(path)
+        self.batch_rows = batch_rows
+        self.table = read_table(self.path)
+        docs_path = Path((self.table.schema.metadata or {})[DOCS_PATH_KEY].decode())
+        self.docs = read_table(docs_path)
+
+        self._metadata_columns = [n for n in self.docs.column_names if n not in ("id", "text")]
+        self._doc_rows = {doc_id: row for row, doc_id in enumerate(self.docs.column("id").to_pylist())}
+
+    def __len__(self) -> int:
+        return self.table.num_rows
+
+    def __getitem__(self, row: int) -> Dict[str, Any]:
+        if not -len(self) <= row < len(self):
+            raise IndexError(f"Chunk row {row} out of range")
+        return self._records(self.table.slice(row % len(self), 1))[0]
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for batch in self.table.to_batches(max_chunksize=self.batch_rows):
+            yield from self._records(batch)
+
+    def _records(self, batch) -> List[Dict[str, Any]]:
+        columns = batch.to_pydict()
+        doc_rows = [self._doc_rows[doc_id] for doc_id in columns["doc_id"]]
+        doc_columns = self.docs.select(self._metadata_columns).take(doc_rows).to_pydict()
+
+        records = []
+        for row, doc_id in enumerate(columns["doc_id"]):
+            metadata = {
+                **{name: doc_columns[name][row] for name in self._metadata_columns},
+                "doc_id": doc_id,
+                "chunk_id": columns["chunk_id"][row],
+                "chunk_index": columns["chunk_index"][row],
+            }
+            if columns["char_start"][row] is not None:
+                metadata["char_start"] = columns["char_start"][row]
+                metadata["char_end"] = columns["char_end"][row]
+            records.append(
+                {
+                    "chunk_id": columns["chunk_id"][row],
+                    "doc_id": doc_id,
+                    "text": columns["text"][row],
+                    "metadata": metadata,
+                }
+            )
+        return records
+
+
+class TableDocuments:
+    """
+    Random access by id to a documents table, the columnar counterpart of
+    JsonlStore for the DocStore. The table is memory-mapped; only the id
+    column is materialized, into an id -> row map.
+    """
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.table = read_table(self.path)
+        self._rows = {doc_id: row for row, doc_id in enumerate(self.table.column("id").to_pylist())}
+        self._metadata_columns = [n for n in self.table.column_names if n not in ("id", "text")]
+
+    def __len__(self) -> int:
+        return self.table.num_rows
+
+    def get(self, doc_id: str) -> Dict[str, Any] | None:
+        row = self._rows.get(str(doc_id))
+        if row is None:
+            return None
+        record = self.table.slice(row, 1).to_pylist()[0]
+        return {
+            "id": record["id"],
+            "text": record["text"],
+            "metadata": {name: record[name] for name in self._metadata_columns},
+        }
+
+    @staticmethod
+    def version_of(path: Path) -> Any:
+        return versioned_dir.version_of(path)
+
+    def close(self) -> None:
+        self.table = None
@@ -0,0 +1,144 @@
+import json
+import logging
+from pathlib import Path
+from typing import Any, Dict, List, Sequence, Tuple
+
+from backend.infra import versioned_dir
+from backend.infra.arrow_artifacts import TableDocuments, is_columnar
+from backend.infra.jsonl_store import JsonlStore
+
+logger = logging.getLogger("DOC_STORE")
+
+
+class DocStore:
+    """
+    Random access to the parent plots in docs.jsonl.
+
+    Plots are read by `doc_id` through the docs.jsonl offset index
+    (JsonlStore): one hash lookup and one seek, without loading the file.
+    Columnar documents (docs.arrow / docs.parquet) are read from the
+    memory-mapped table instead.
+    Child chunks point to their parent through `doc_id` plus the
+    `char_start`/`char_end` span of the chunk within the plot text, which is
+    enough to cut a bounded window around any hit.
+
+    The store directory only holds a manifest with the path of the
+    docs.jsonl the chunks were built from; a docs.jsonl rewritten after
+    chunking is refused.
+    """
+    MANIFEST = "manifest.json"
+
+    def __init__(self, directory: Path):
+        self.directory = versioned_dir.current(directory)
+
+        with open(self.directory / self.MANIFEST, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+
+        self.docs_path = Path(manifest["docs_path"])
+        if self._docs_version(self.docs_path) != manifest["docs_index_version"]:
+            raise ValueError(
+                f"{self.docs_path} changed since the doc store was built; re-run chunking"
+            )
+        self.docs = (
+            TableDocuments(self.docs_path)
+            if is_columnar(self.docs_path)
+            else JsonlStore(self.docs_path)
+        )
+
+        logger.info("Doc store loaded | docs=%s | path=%s", len(self.docs), self.docs_path)
+
+    @property
+    def count(self) -> int:
+        return len(self.docs)
+
+    @classmethod
+    def build(cls, docs_path: Path, directory: Path) -> None:
+        docs_path = Path(docs_path).resolve()
+        directory = Path(directory)
+
+        # JsonlWriter indexes docs.jsonl as it writes it; older files are
+        # indexed here
+        docs = (
+            TableDocuments(docs_path)
+            if is_columnar(docs_path)
+            else JsonlStore.open(docs_path, id_field="id")
+        )
+        count = len(docs)
+        docs.close()
+
+        generation = versioned_dir.new_generation(directory)
+        with open(generation / cls.MANIFEST, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "docs_path": str(docs_path),
+                    "docs_index_version": cls._docs_version(docs_path),
+                    "count": count,
+                },
+                f,
+            )
+
+        versioned_dir.publish(generation)
+
+        logger.info("Doc store written | path=%s | docs=%s | source=%s", directory, count, docs_path)
+
+    # Query
+
+    def get(self, doc_id: str) -> Dict[str, Any] | None:
+        return self.docs.get(str(doc_id))
+
+    def windows(
+        self, doc_id: str, spans: Sequence[Tuple[int, int]], size: int
+    ) -> List[Tuple[str, int, int, List[int]]]:
+        """
+        Returns the plot text around each [start, end) span, widened evenly
+        to about `size` characters, clipped to the plot and snapped outwards
+        to whitespace. Overlapping windows are merged, so each entry is
+        (text, window_start, window_end, indexes of the spans it covers),
+        in plot order. The plot is read once.
+        """
+        doc = self.get(doc_id)
+        if doc is None:
+            return []
+        text = doc.get("text") or ""
+
+        bounds = []
+        for idx, (start, end) in enumerate(spans):
+            pad = max(0, size - (end - start)) // 2
+            window_start = min(max(0, start - pad), len(text))
+            window_end = max(min(len(text), end + pad), window_start)
+            bounds.append((*self._snap(text, window_start, window_end), idx))
+        bounds.sort()
+
+        merged: List[Tuple[int, int, List[int]]] = []
+        for start, end, idx in bounds:
+            if merged and start <= merged[-1][1]:
+                last_start, last_end, covered = merged[-1]
+                merged[-1] = (last_start, max(last_end, end), covered + [idx])
+            else:
+                merged.append((start, end, [idx]))
+
+        return [(text[start:end], start, end, covered) for start, end, covered in merged]
+
+    @classmethod
+    def version_of(cls, directory: Path) -> Tuple[Any, ...]:
+        return (versioned_dir.version_of(directory),)
+
+    def close(self) -> None:
+        self.docs.close()
+
+    @staticmethod
+    def _docs_version(docs_path: Path) -> Any:
+        if is_columnar(docs_path):
+            return TableDocuments.version_of(docs_path)
+        return JsonlStore.version_of(docs_path)
+
+    @staticmethod
+    def _snap(text: str, start: int, end: int) -> Tuple[int, int]:
+        # Avoid cutting words at the window edges
+        if start > 0:
+            space = text.rfind(" ", max(0, start - 40), start)
+            start = space + 1 if space >= 0 else start
+        if end < len(text):
+            space = text.find(" ", end, end + 40)
+            end = space if space >= 0 else end
+        return start, end
@@ -0,0 +1,236 @@
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+import unicodedata
+from array import array
+from pathlib import Path
+from typing import Dict, List
+
+from langchain_core.embeddings import Embeddings
+
+logger = logging.getLogger("EMBEDDING_CACHE")
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Persistent, size-bounded cache in front of an Embeddings implementation.
+
+    Vectors are stored in a local SQLite file keyed by (model, hash of the
+    normalized text), so identical texts are embedded only once across
+    ingestion runs and repeated queries. When the cache grows beyond
+    `max_entries`, the least recently used entries are evicted, down to
+    `_EVICT_TO` of the limit so a full cache is not trimmed on every put.
+
+    Hits do not write: their access times are buffered in memory and
+    written in one transaction every `_ACCESS_FLUSH_ROWS` hits or
+    `_ACCESS_FLUSH_SECONDS`, before any eviction, and on `flush()`. The row
+    count is tracked in memory from inserts and evictions and only
+    recounted when it crosses the limit (other processes may share the
+    file).
+
+    The cache is shared by the ingestion pipeline and the retriever; the
+    model name is part of the key, so switching models never returns
+    stale vectors.
+    """
+
+    _LOOKUP_BATCH = 500
+    _ACCESS_FLUSH_ROWS = 1000
+    _ACCESS_FLUSH_SECONDS = 30.0
+    _EVICT_TO = 0.95
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        model_name: str,
+        path: Path,
+        max_entries: int = 500_000,
+    ):
+        self.embeddings = embeddings
+        self.model_name = model_name
+        self.path = Path(path)
+        self.max_entries = max_entries
+
+        self.hits = 0
+        self.misses = 0
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " model TEXT NOT NULL,"
+            " text_hash TEXT NOT NULL,"
+            " vector BLOB NOT NULL,"
+            " last_access REAL NOT NULL,"
+            " PRIMARY KEY (model, text_hash))"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_embeddings_last_access "
+            "ON embeddings (last_access)"
+        )
+        self._conn.commit()
+
+        (self._count,) = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+        self._pending_access: Dict[str, float] = {}
+        self._last_access_flush = time.monotonic()
+
+        logger.info(
+            "Embedding cache ready | path=%s | model=%s | entries=%s | max_entries=%s",
+            self.path,
+            self.model_name,
+            self._count,
+            self.max_entries,
+        )
+
+    # Embeddings interface
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys = [self._key(text) for text in texts]
+        cached = self._get_many(keys)
+
+        missing: Dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in cached and key not in missing:
+                missing[key] = text
+
+        self.hits += len(texts) - len(missing)
+        self.misses += len(missing)
+
+        if missing:
+            vectors = self.embeddings.embed_documents(list(missing.values()))
+            new_entries = dict(zip(missing.keys(), vectors))
+            self._put_many(new_entries)
+            cached.update(new_entries)
+
+        logger.debug(
+            "embed_documents | texts=%s | hits=%s | misses=%s",
+            len(texts),
+            len(texts) - len(missing),
+            len(missing),
+        )
+        return [cached[key] for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        key = self._key(text)
+        cached = self._get_many([key])
+        if key in cached:
+            self.hits += 1
+            return cached[key]
+
+        self.misses += 1
+        vector = self.embeddings.embed_query(text)
+        self._put_many({key: vector})
+        return vector
+
+    def flush(self) -> None:
+        """
+        Writes the buffered access times of cache hits.
+        """
+        with self._lock:
+            self._write_access()
+            self._conn.commit()
+
+    # Stats
+
+    def stats(self) -> Dict[str, float]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+    def log_stats(self) -> None:
+        stats = self.stats()
+        logger.info(
+            "Embedding cache stats | hits=%s | misses=%s | hit_rate=%.2f%%",
+            stats["hits"],
+            stats["misses"],
+            stats["hit_rate"] * 100,
+        )
+
+    # Storage helpers
+
+    @staticmethod
+    def _normalize(text: str) -> str:
+        return unicodedata.normalize("NFC", text).strip()
+
+    def _key(self, text: str) -> str:
+        return hashlib.sha256(self._normalize(text).encode("utf-8")).hexdigest()
+
+    def _get_many(self, keys: List[str]) -> Dict[str, List[float]]:
+        found: Dict[str, List[float]] = {}
+        unique_keys = list(dict.fromkeys(keys))
+        now = time.time()
+
+        with self._lock:
+            for start in range(0, len(unique_keys), self._LOOKUP_BATCH):
+                batch = unique_keys[start:start + self._LOOKUP_BATCH]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT text_hash, vector FROM embeddings "
+                    f"WHERE model = ? AND text_hash IN ({placeholders})",
+                    [self.model_name, *batch],
+                ).fetchall()
+                for text_hash, blob in rows:
+                    vector = array("f")
+                    vector.frombytes(blob)
+                    found[text_hash] = vector.tolist()
+
+            self._pending_access.update((key, now) for key in found)
+            if (
+                len(self._pending_access) >= self._ACCESS_FLUSH_ROWS
+                or time.monotonic() - self._last_access_flush >= self._ACCESS_FLUSH_SECONDS
+            ):
+                self._write_access()
+                self._conn.commit()
+
+        return found
+
+    def _put_many(self, entries: Dict[str, List[float]]) -> None:
+        now = time.time()
+        with self._lock:
+            # Same text and model give the same vector: keep the stored one
+            # (another process may have just written it) and refresh its access
+            cursor = self._conn.executemany(
+                "INSERT OR IGNORE INTO embeddings (model, text_hash, vector, last_access) "
+                "VALUES (?, ?, ?, ?)",
+                [
+                    (self.model_name, key, array("f", vector).tobytes(), now)
+                    for key, vector in entries.items()
+                ],
+            )
+            self._count += cursor.rowcount
+            self._pending_access.update((key, now) for key in entries)
+            self._write_access()
+            self._evict()
+            self._conn.commit()
+
+    def _write_access(self) -> None:
+        if self._pending_access:
+            self._conn.executemany(
+                "UPDATE embeddings SET last_access = ? WHERE model = ? AND text_hash = ?",
+                [(at, self.model_name, key) for key, at in self._pending_access.items()],
+            )
+            self._pending_access.clear()
+        self._last_access_flush = time.monotonic()
+
+    def _evict(self) -> None:
+        if self._count <= self.max_entries:
+            return
+
+        (self._count,) = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+        overflow = self._count - int(self.max_entries * self._EVICT_TO)
+        if self._count <= self.max_entries or overflow <= 0:
+            return
+
+        cursor = self._conn.execute(
+            "DELETE FROM embeddings WHERE rowid IN ("
+            " SELECT rowid FROM embeddings ORDER BY last_access LIMIT ?)",
+            (overflow,),
+        )
+        self._count -= cursor.rowcount
+        logger.debug("Evicted %s least recently used embeddings", cursor.rowcount)
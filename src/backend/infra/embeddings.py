@@ -0,0 +1,32 @@
+from pathlib import Path
+
+from langchain_core.embeddings import Embeddings
+from langchain_openai import OpenAIEmbeddings
+
+from backend.config.settings import EMBEDDING_CONFIG
+from backend.infra.embedding_cache import CachedEmbeddings
+
+
+def build_embedding_function() -> Embeddings:
+    """
+    Builds the embedding function shared by ingestion and retrieval.
+
+    Returns the configured OpenAIEmbeddings model, wrapped in the persistent
+    embedding cache when `EMBEDDING_CONFIG["cache_enabled"]` is set.
+    """
+    model_name = EMBEDDING_CONFIG["embedding_model"]
+    kwargs = {}
+    if EMBEDDING_CONFIG.get("base_url"):
+        kwargs["base_url"] = EMBEDDING_CONFIG["base_url"]
+
+    embeddings = OpenAIEmbeddings(model=model_name, **kwargs)
+
+    if not EMBEDDING_CONFIG.get("cache_enabled", False):
+        return embeddings
+
+    return CachedEmbeddings(
+        embeddings=embeddings,
+        model_name=model_name,
+        path=Path(EMBEDDING_CONFIG["cache_path"]),
+        max_entries=EMBEDDING_CONFIG["cache_max_entries"],
+    )
@@ -0,0 +1,93 @@
+import json
+import logging
+from pathlib import Path
+from typing import Any, Dict, Iterable
+
+from backend.infra import versioned_dir
+from backend.infra.metadata_index import DIRECTOR_FIELD, GENRE_FIELD, ORIGIN_FIELD, YEAR_FIELD
+from backend.infra.string_column import StringColumn
+
+logger = logging.getLogger("VECTORSTORE_FILM_METADATA")
+
+# Fields that describe the chunk itself and stay on every vector store record
+CHUNK_FIELDS = ("doc_id", "chunk_id", "chunk_index", "chunk_index_end", "char_start", "char_end")
+# Film fields kept on the records so they remain filterable in the vector store
+FILTERABLE_FIELDS = (GENRE_FIELD, YEAR_FIELD, DIRECTOR_FIELD, ORIGIN_FIELD)
+
+
+class FilmMetadataTable:
+    """
+    Film metadata side table keyed by `doc_id`.
+
+    Chunks of the same film share its metadata (Title, Cast, Wiki Page, ...),
+    so instead of repeating it on every vector store record, each film's
+    metadata is stored once and joined back into the top-k chunks by the
+    Retriever. Records keep only the chunk fields and the filterable ones
+    (see `stored_fields`).
+
+    On disk: the doc ids and one compact JSON object per film, as
+    memory-mapped string columns. Only the id -> row map lives in Python
+    memory; a film's metadata is decoded when one of its chunks is returned.
+    """
+    MANIFEST = "manifest.json"
+
+    def __init__(self, directory: Path):
+        self.directory = versioned_dir.current(directory)
+        self.ids = StringColumn(self.directory, "ids")
+        self.films = StringColumn(self.directory, "films")
+        self._rows: Dict[str, int] = {self.ids[row]: row for row in range(len(self.ids))}
+
+        logger.info("Film metadata loaded | path=%s | films=%s", self.directory, len(self._rows))
+
+    @property
+    def count(self) -> int:
+        return len(self.ids)
+
+    @staticmethod
+    def stored_fields(metadata: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        The part of a chunk's metadata written to the vector store.
+        """
+        return {
+            key: value for key, value in metadata.items()
+            if key in CHUNK_FIELDS or key in FILTERABLE_FIELDS
+        }
+
+    @classmethod
+    def build(cls, directory: Path, chunks: Iterable[Dict[str, Any]]) -> None:
+        directory = Path(directory)
+        films: Dict[str, str] = {}
+        for chunk in chunks:
+            doc_id = str(chunk["doc_id"])
+            if doc_id not in films:
+                film = {k: v for k, v in chunk["metadata"].items() if k not in CHUNK_FIELDS}
+                films[doc_id] = json.dumps(film, ensure_ascii=False, separators=(",", ":"))
+
+        generation = versioned_dir.new_generation(directory)
+
+        StringColumn.write(generation, "ids", list(films))
+        StringColumn.write(generation, "films", list(films.values()))
+        with open(generation / cls.MANIFEST, "w", encoding="utf-8") as f:
+            json.dump({"count": len(films)}, f)
+
+        versioned_dir.publish(generation)
+
+        logger.info("Film metadata written | path=%s | films=%s", directory, len(films))
+
+    # Query
+
+    def get(self, doc_id: str) -> Dict[str, Any] | None:
+        row = self._rows.get(str(doc_id))
+        return json.loads(self.films[row]) if row is not None else None
+
+    def join(self, metadata: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Returns the chunk metadata completed with its film's metadata.
+        Chunk fields win over film fields.
+        """
+        film = self.get(metadata.get("doc_id")) if metadata.get("doc_id") is not None else None
+        return {**film, **metadata} if film else metadata
+
+    def close(self) -> None:
+        self.ids.close()
+        self.films.close()
@@ -0,0 +1,342 @@
+import hashlib
+import json
+import logging
+import re
+import shutil
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Sequence
+
+import numpy as np
+
+from backend.infra import versioned_dir
+from backend.infra.string_column import StringColumn
+
+logger = logging.getLogger("JSONL_STORE")
+
+
+def _id_hash(record_id: str) -> int:
+    # Stable across processes, unlike hash()
+    return int.from_bytes(
+        hashlib.blake2b(record_id.encode("utf-8"), digest_size=8).digest(), "little"
+    )
+
+
+class JsonlStore:
+    """
+    Random access to a JSONL artifact (docs.jsonl, chunks.jsonl) through a
+    sidecar offset index written next to it, in the versioned directory
+    `<file>.idx/` (see versioned_dir):
+    - offsets.npy: int64 (byte offset, length) of every record line;
+    - ids column: record ids in file order, with their 64-bit hashes;
+    - table.npy: open-addressing hash table (int32 rows, -1 = empty, linear
+      probing, at most half full) mapping an id hash to its row.
+
+    Everything is memory-mapped, so looking a record up by id touches a few
+    pages of the index and reads one line of the file, whatever its size.
+    Iteration is lazy and reads the file sequentially.
+
+    JsonlWriter and ChunkingPipeline write the index along with the file,
+    batch by batch (see JsonlIndexWriter).
+    The manifest records the file size and modification time; a store is
+    never opened against a file that changed after indexing (`open`
+    re-indexes it instead).
+    """
+    INDEX_SUFFIX = ".idx"
+    MANIFEST = "manifest.json"
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.index_dir = versioned_dir.current(self.index_dir_for(self.path))
+
+        with open(self.index_dir / self.MANIFEST, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        if not self._matches(self.path, manifest):
+            raise ValueError(f"{self.path} changed since it was indexed")
+
+        self.id_field: str = manifest["id_field"]
+        self.offsets = np.load(self.index_dir / "offsets.npy", mmap_mode="r")
+        self.hashes = np.load(self.index_dir / "hashes.npy", mmap_mode="r")
+        self.table = np.load(self.index_dir / "table.npy", mmap_mode="r")
+        self.ids = StringColumn(self.index_dir, "ids")
+        self._mask = len(self.table) - 1
+
+        self._file = open(self.path, "rb")
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __contains__(self, record_id: str) -> bool:
+        return self.row_of(record_id) is not None
+
+    @classmethod
+    def index_dir_for(cls, path: Path) -> Path:
+        path = Path(path)
+        return path.with_name(path.name + cls.INDEX_SUFFIX)
+
+    @classmethod
+    def open(cls, path: Path, id_field: str) -> "JsonlStore":
+        """
+        Opens the store, (re)building the index first when it is missing or
+        older than the file.
+        """
+        if not cls.is_indexed(path):
+            cls.build(path, id_field)
+        return cls(path)
+
+    @classmethod
+    def is_indexed(cls, path: Path) -> bool:
+        manifest_path = versioned_dir.current(cls.index_dir_for(path)) / cls.MANIFEST
+        if not manifest_path.exists():
+            return False
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            return cls._matches(Path(path), json.load(f))
+
+    # Build
+
+    @classmethod
+    def build(cls, path: Path, id_field: str, batch_lines: int = 8192) -> None:
+        """
+        Indexes an existing file by scanning it once.
+        """
+        writer = JsonlIndexWriter(path, id_field)
+        ids: List[str] = []
+        lengths: List[int] = []
+        with open(path, "rb") as f:
+            for line in f:
+                # Blank lines keep offsets contiguous and are never looked up
+                ids.append(cls._line_id(line, id_field) if line.strip() else "")
+                lengths.append(len(line))
+                if len(ids) >= batch_lines:
+                    writer.add(ids, lengths)
+                    ids, lengths = [], []
+        writer.add(ids, lengths)
+        writer.finalize()
+
+    # Query
+
+    def row_of(self, record_id: str) -> int | None:
+        record_id = str(record_id)
+        if not len(self.table):
+            return None
+        key = _id_hash(record_id)
+        slot = key & self._mask
+        while True:
+            row = int(self.table[slot])
+            if row < 0:
+                return None
+            if int(self.hashes[row]) == key and self.ids[row] == record_id:
+                return row
+            slot = (slot + 1) & self._mask
+
+    def get(self, record_id: str) -> Dict[str, Any] | None:
+        row = self.row_of(record_id)
+        return self.read(row) if row is not None else None
+
+    def read(self, row: int) -> Dict[str, Any]:
+        offset, length = (int(v) for v in self.offsets[row])
+        with self._lock:
+            self._file.seek(offset)
+            line = self._file.read(length)
+        return json.loads(line)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+    @classmethod
+    def version_of(cls, path: Path) -> Any:
+        return versioned_dir.version_of(cls.index_dir_for(path))
+
+    def close(self) -> None:
+        self._file.close()
+        self.ids.close()
+
+    # Helpers
+
+    @staticmethod
+    def _hash_table(hashes: np.ndarray, present: np.ndarray) -> np.ndarray:
+        size = 1
+        while size < 2 * len(hashes):
+            size *= 2
+        mask = size - 1
+        table = [-1] * (size if len(hashes) else 0)
+        for row, (key, has_id) in enumerate(zip(hashes.tolist(), present.tolist())):
+            if not has_id:
+                continue
+            slot = key & mask
+            while table[slot] >= 0:
+                slot = (slot + 1) & mask
+            table[slot] = row
+        return np.asarray(table, dtype=np.int32)
+
+    @classmethod
+    def _covers(cls, index_dir: Path, size: int) -> bool:
+        manifest_path = versioned_dir.current(index_dir) / cls.MANIFEST
+        if not manifest_path.exists():
+            return False
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            return json.load(f)["size"] == size
+
+    @staticmethod
+    def _matches(path: Path, manifest: Dict[str, Any]) -> bool:
+        if not path.exists():
+            return False
+        stat = path.stat()
+        return (stat.st_size, stat.st_mtime_ns) == (manifest["size"], manifest["mtime_ns"])
+
+    @staticmethod
+    def _line_id(line: bytes, id_field: str) -> str:
+        # Writers put the id first; fall back to a full parse otherwise
+        match = re.match(rb'^\{"' + re.escape(id_field.encode()) + rb'": ("(?:[^"\\]|\\.)*")', line)
+        if match:
+            return json.loads(match.group(1))
+        return str(json.loads(line)[id_field])
+
+
+class JsonlIndexWriter:
+    """
+    Append-only writer of a JsonlStore index, for a file written in
+    batches (the streaming ETL, chunking).
+
+    Each `add` appends the spans, id hashes and ids of the lines just
+    written to flat files in a new index generation; nothing already
+    written is read back or rewritten. `finalize()`, called once after the
+    last batch, converts them to the index arrays, builds the hash table
+    and publishes the generation. Until then readers keep seeing the
+    previous index, which `JsonlStore.open` refuses for the changed file.
+
+    With `start` > 0 the file already holds `start` bytes: the rows of its
+    existing index are copied once (or the head of the file is scanned if
+    that index is out of date), then new lines are appended after them.
+    """
+    def __init__(self, path: Path, id_field: str, start: int = 0):
+        self.path = Path(path)
+        self.id_field = id_field
+        self.index_dir = JsonlStore.index_dir_for(self.path)
+        self.generation = versioned_dir.new_generation(self.index_dir)
+
+        self._spans = open(self.generation / "spans.raw", "wb")
+        self._hashes = open(self.generation / "hashes.raw", "wb")
+        self._ids = open(self.generation / "ids.bin", "wb")
+        self._id_ends = open(self.generation / "id_ends.raw", "wb")
+        self.count = 0
+        self.position = 0
+        self._id_position = 0
+
+        if start > 0:
+            self._resume(start)
+
+    def add(self, ids: Sequence[str], lengths: Sequence[int]) -> None:
+        """
+        Records consecutive lines appended to the file: their ids and byte
+        lengths.
+        """
+        if not len(ids):
+            return
+        lengths = np.asarray(lengths, dtype=np.int64)
+        offsets = self.position + np.concatenate(([0], np.cumsum(lengths)))[:-1]
+        self._spans.write(np.column_stack((offsets, lengths)).tobytes())
+        self._hashes.write(
+            np.fromiter((_id_hash(i) for i in ids), dtype=np.uint64, count=len(ids)).tobytes()
+        )
+
+        encoded = [record_id.encode("utf-8") for record_id in ids]
+        self._ids.write(b"".join(encoded))
+        ends = self._id_position + np.cumsum([len(e) for e in encoded], dtype=np.int64)
+        self._id_ends.write(ends.tobytes())
+
+        self.count += len(ids)
+        self.position += int(lengths.sum())
+        self._id_position = int(ends[-1])
+
+    def finalize(self) -> None:
+        for f in (self._spans, self._hashes, self._ids, self._id_ends):
+            f.close()
+
+        stat = self.path.stat()
+        if stat.st_size != self.position:
+            logger.warning(
+                "%s has %s bytes but %s were indexed | re-indexing the file",
+                self.path,
+                stat.st_size,
+                self.position,
+            )
+            self.abort()
+            JsonlStore.build(self.path, self.id_field)
+            return
+
+        generation = self.generation
+        spans = np.fromfile(generation / "spans.raw", dtype=np.int64).reshape(-1, 2)
+        hashes = np.fromfile(generation / "hashes.raw", dtype=np.uint64)
+        id_offsets = np.concatenate(
+            ([0], np.fromfile(generation / "id_ends.raw", dtype=np.int64))
+        ).astype(np.int64)
+
+        np.save(generation / "offsets.npy", spans)
+        np.save(generation / "hashes.npy", hashes)
+        np.save(generation / "table.npy", JsonlStore._hash_table(hashes, np.diff(id_offsets) > 0))
+        np.save(generation / "ids.offsets.npy", id_offsets)
+        for name in ("spans.raw", "hashes.raw", "id_ends.raw"):
+            (generation / name).unlink()
+
+        with open(generation / JsonlStore.MANIFEST, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "id_field": self.id_field,
+                    "count": self.count,
+                    "size": stat.st_size,
+                    "mtime_ns": stat.st_mtime_ns,
+                },
+                f,
+            )
+
+        versioned_dir.publish(generation)
+
+        logger.debug("Offset index written | path=%s | records=%s", self.index_dir, self.count)
+
+    def abort(self) -> None:
+        for f in (self._spans, self._hashes, self._ids, self._id_ends):
+            f.close()
+        versioned_dir.discard(self.generation)
+
+    def _resume(self, start: int) -> None:
+        if not JsonlStore._covers(self.index_dir, start):
+            logger.info(
+                "Offset index of %s is out of date | re-indexing its first %s bytes", self.path, start
+            )
+            ids: List[str] = []
+            lengths: List[int] = []
+            scanned = 0
+            with open(self.path, "rb") as f:
+                while scanned < start:
+                    line = f.readline()
+                    if not line:
+                        break
+                    ids.append(JsonlStore._line_id(line, self.id_field) if line.strip() else "")
+                    lengths.append(len(line))
+                    scanned += len(line)
+                    if len(ids) >= 8192:
+                        self.add(ids, lengths)
+                        ids, lengths = [], []
+            self.add(ids, lengths)
+            return
+
+        # Copy the existing rows block by block
+        live = versioned_dir.current(self.index_dir)
+        spans = np.load(live / "offsets.npy", mmap_mode="r")
+        hashes = np.load(live / "hashes.npy", mmap_mode="r")
+        id_offsets = np.load(live / "ids.offsets.npy", mmap_mode="r")
+        for block in range(0, len(hashes), 65536):
+            self._spans.write(np.ascontiguousarray(spans[block:block + 65536]).tobytes())
+            self._hashes.write(np.ascontiguousarray(hashes[block:block + 65536]).tobytes())
+            self._id_ends.write(np.ascontiguousarray(id_offsets[block + 1:block + 65537]).tobytes())
+        with open(live / "ids.bin", "rb") as f:
+            shutil.copyfileobj(f, self._ids)
+
+        self.count = len(hashes)
+        self.position = start
+        self._id_position = int(id_offsets[-1])
@@ -1,7 +1,11 @@
+import asyncio
 import logging
+import time
+from typing import Iterator
 
 from langchain_openai import ChatOpenAI
-from backend.config.settings import LLM_CONFIG
+from backend.config.settings import ANSWER_CACHE_CONFIG, LLM_CONFIG
+from backend.infra.answer_cache import AnswerCache
 
 logger = logging.getLogger("LLM_Client")
 
@@ -13,13 +17,20 @@ class LLMClient:
     This class provides a stateless interface for generating text from a 
     single prompt and intentionally avoids concerns such as prompt 
     construction, retrieval, conversation state, or retries.
+
+    With ANSWER_CACHE_ENABLED=true and temperature 0, answers are served
+    from a persistent AnswerCache keyed by the final prompt.
     """
 
-    def __init__(self):
+    def __init__(self, answer_cache: AnswerCache | None = None):
+        self.model_name = LLM_CONFIG["model"]
+        self.temperature = LLM_CONFIG["temperature"]
         self.llm = ChatOpenAI(
-            model=LLM_CONFIG["model"],
-            temperature=LLM_CONFIG["temperature"]
+            model=self.model_name,
+            temperature=self.temperature,
+            stream_usage=True
         )
+        self.answer_cache = answer_cache or self._build_answer_cache()
     
     def generate(self, prompt: str) -> str:
         """
@@ -28,8 +39,83 @@ class LLMClient:
         Sends the prompt to the configured LLM, logs token usage statistics,
         and returns the generated text.
         """
+        cached = self._cache_get(prompt)
+        if cached is not None:
+            return cached
+
         result = self.llm.invoke(prompt)
+        self._log_usage(result)
+
+        self._cache_put(prompt, result.content)
+        return result.content
+
+    async def agenerate(self, prompt: str) -> str:
+        """
+        Async version of `generate`, using the model's native async API so
+        many prompts can be in flight from a single event loop. Answer cache
+        reads and writes (SQLite) run in a worker thread.
+        """
+        if self.answer_cache is not None:
+            cached = await asyncio.to_thread(self._cache_get, prompt)
+            if cached is not None:
+                return cached
+
+        result = await self.llm.ainvoke(prompt)
+        self._log_usage(result)
+
+        if self.answer_cache is not None:
+            await asyncio.to_thread(self._cache_put, prompt, result.content)
+        return result.content
+
+    def stream(self, prompt: str) -> Iterator[str]:
+        """
+        Stream the response for the given prompt, yielding text tokens as
+        they arrive.
+
+        Time-to-first-token and total latency are logged separately, and
+        token usage (reported by the final stream chunk) is logged once the
+        stream is exhausted. A cached answer is yielded as a single token; a
+        fully streamed answer is added to the cache.
+        """
+        cached = self._cache_get(prompt)
+        if cached is not None:
+            yield cached
+            return
+
+        started = time.perf_counter()
+        first_token_at = None
+        usage = {}
+        tokens = []
+
+        for chunk in self.llm.stream(prompt):
+            if chunk.usage_metadata:
+                usage = chunk.usage_metadata
+
+            if not chunk.content:
+                continue
 
+            if first_token_at is None:
+                first_token_at = time.perf_counter()
+                logger.debug("LLM time-to-first-token | %.3fs", first_token_at - started)
+
+            tokens.append(chunk.content)
+            yield chunk.content
+
+        self._cache_put(prompt, "".join(tokens))
+
+        logger.debug(
+            "LLM stream finished | ttft=%s | total=%.3fs",
+            f"{first_token_at - started:.3f}s" if first_token_at is not None else "N/A",
+            time.perf_counter() - started,
+        )
+        logger.debug(
+            "LLM token usage | prompt=%s | completion=%s | total=%s",
+            usage.get("input_tokens"),
+            usage.get("output_tokens"),
+            usage.get("total_tokens"),
+        )
+
+    def _log_usage(self, result) -> None:
         usage = result.response_metadata.get("token_usage", {})
 
         logger.debug(
@@ -39,4 +125,35 @@ class LLMClient:
             usage.get("total_tokens"),
         )
 
-        return result.content
\ No newline at end of file
+    def _build_answer_cache(self) -> AnswerCache | None:
+        if not ANSWER_CACHE_CONFIG.get("enabled", False):
+            return None
+
+        if self.temperature > 0:
+            logger.info(
+                "Answer cache bypassed: temperature=%s makes answers non-deterministic",
+                self.temperature,
+            )
+            return None
+
+        return AnswerCache(
+            path=ANSWER_CACHE_CONFIG["path"],
+            model_name=self.model_name,
+            temperature=self.temperature,
+            max_entries=ANSWER_CACHE_CONFIG["max_entries"],
+            semantic_threshold=(
+                ANSWER_CACHE_CONFIG["semantic_threshold"]
+                if ANSWER_CACHE_CONFIG.get("semantic_enabled", False)
+                else None
+            ),
+            semantic_ttl=ANSWER_CACHE_CONFIG.get("semantic_ttl", 0),
+        )
+
+    def _cache_get(self, prompt: str) -> str | None:
+        if self.answer_cache is None:
+            return None
+        return self.answer_cache.get(prompt)
+
+    def _cache_put(self, prompt: str, answer: str) -> None:
+        if self.answer_cache is not None and answer:
+            self.answer_cache.put(prompt, answer)
@@ -0,0 +1,392 @@
+import hashlib
+import json
+import logging
+import mmap
+from pathlib import Path
+from typing import Any, Dict, List, Sequence, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+
+from backend.infra import versioned_dir
+from backend.infra.string_column import StringColumn
+from backend.infra.vector_quantization import QuantizedVectors
+
+logger = logging.getLogger("VECTORSTORE_LOCAL_INDEX")
+
+
+def ids_digest(ids: Sequence[str]) -> str:
+    """
+    Fingerprint of an ordered list of chunk ids, used to check that two
+    artifacts built from the same chunks agree on row numbers.
+    """
+    digest = hashlib.sha256()
+    for chunk_id in ids:
+        digest.update(chunk_id.encode("utf-8") + b"\n")
+    return digest.hexdigest()
+
+
+class LocalVectorIndex:
+    """
+    In-process exact vector index, an alternative to the Chroma collection.
+
+    On-disk layout (one directory):
+    - vectors.npy: L2-normalized float32 embeddings (N x D), memory-mapped
+      on load, so the OS page cache is shared between retriever processes.
+    - ids.bin / texts.bin (+ .offsets.npy): chunk ids and texts as UTF-8
+      blobs with int64 offsets.
+    - metadata_codes.npy: int32 (N x fields) dictionary codes, -1 = missing,
+      for low-cardinality fields (Genre, Director, Release Year, ...); the
+      per-field dictionaries live in manifest.json.
+    - metadata_<field index>.bin (+ .offsets.npy): fields with mostly
+      distinct values (chunk ids, titles, char offsets), as plain columns of
+      JSON values ("" = missing), since a dictionary would be as large as
+      the column itself.
+
+    - vectors_compact.npy (optional): float16 or int8 copy of the vectors,
+      possibly truncated to fewer dimensions (see QuantizedVectors).
+
+    Search is exact: one BLAS matrix-vector (or matrix-matrix for a batch of
+    queries) product for cosine similarity, `argpartition` for the top k and
+    a sort of those k only. Distances are returned as cosine distances
+    (1 - similarity), the same scale as the Chroma collection.
+
+    With a compact copy, the first pass runs on the compact vectors only and
+    the best `rescore_factor * k` candidates are rescored with their
+    full-precision vectors; the float32 file is then only touched for those
+    rows, so it mostly stays out of resident memory.
+    """
+    MANIFEST = "manifest.json"
+    RECALL_SAMPLE = 200
+    RECALL_K = 10
+    # Fields with more distinct values than this fraction of the rows are
+    # stored as plain columns instead of dictionary codes
+    DICTIONARY_MAX_RATIO = 0.5
+
+    def __init__(self, directory: Path, rescore_factor: int = 4):
+        self.directory = versioned_dir.current(directory)
+        self.rescore_factor = max(1, rescore_factor)
+
+        with open(self.directory / self.MANIFEST, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+
+        self.fields: List[str] = manifest["fields"]
+        self.dictionaries: Dict[str, List[Any]] = manifest["dictionaries"]
+        plain_fields = set(manifest.get("plain_fields", []))
+        self._coded_cols = {
+            field: col
+            for col, field in enumerate(f for f in self.fields if f not in plain_fields)
+        }
+        self._plain_columns = {
+            field: StringColumn(self.directory, f"metadata_{self.fields.index(field)}")
+            for field in self.fields
+            if field in plain_fields
+        }
+        self.embedding_model = manifest.get("embedding_model")
+        self.ids_digest = manifest.get("ids_digest")
+
+        self.vectors = np.load(self.directory / "vectors.npy", mmap_mode="r")
+        self.codes = np.load(self.directory / "metadata_codes.npy", mmap_mode="r")
+        self.ids = StringColumn(self.directory, "ids")
+        self.texts = StringColumn(self.directory, "texts")
+        self._row_by_id: Dict[str, int] | None = None
+        self.compact = QuantizedVectors.load(self.directory)
+        if self.compact is not None:
+            self._advise_random_access(self.vectors)
+
+        logger.info(
+            "Local index loaded | path=%s | vectors=%s | dim=%s | fields=%s",
+            self.directory,
+            self.count,
+            self.vectors.shape[1],
+            len(self.fields),
+        )
+        if self.compact is not None:
+            self._log_compact_size(self.compact, self.vectors)
+
+    @property
+    def count(self) -> int:
+        return len(self.ids)
+
+    # Build
+
+    @classmethod
+    def build(
+        cls,
+        directory: Path,
+        ids: Sequence[str],
+        texts: Sequence[str],
+        metadatas: Sequence[Dict[str, Any]],
+        vectors: np.ndarray,
+        embedding_model: str | None = None,
+        quantization: str = "none",
+        truncate_dim: int = 0,
+        rescore_factor: int = 4,
+    ) -> None:
+        """
+        Writes a new index as a generation of the versioned `directory`
+        (see versioned_dir), published atomically once complete, so
+        readers never see a partially written index.
+
+        With `quantization` set to "float16" or "int8", a compact copy of
+        the vectors (optionally truncated to `truncate_dim` dimensions) is
+        written too, and its recall@k against the float32 vectors is
+        measured on a sample of stored vectors and logged.
+        """
+        directory = Path(directory)
+        generation = versioned_dir.new_generation(directory)
+
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if vectors.size == 0:
+            vectors = np.zeros((len(ids), 0), dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        vectors = vectors / norms
+        np.save(generation / "vectors.npy", vectors)
+
+        quantization_report = None
+        if quantization != "none":
+            compact = QuantizedVectors.build(vectors, quantization, truncate_dim)
+            compact.save(generation)
+            cls._log_compact_size(compact, vectors)
+            quantization_report = cls._evaluate_compact(vectors, compact, rescore_factor)
+
+        StringColumn.write(generation, "ids", ids)
+        StringColumn.write(generation, "texts", texts)
+
+        fields = list(dict.fromkeys(key for md in metadatas for key in md))
+        dictionaries: Dict[str, List[Any]] = {field: [] for field in fields}
+        lookup: Dict[str, Dict[str, int]] = {field: {} for field in fields}
+        codes = np.full((len(metadatas), len(fields)), -1, dtype=np.int32)
+
+        for row, md in enumerate(metadatas):
+            for col, field in enumerate(fields):
+                if field not in md:
+                    continue
+                value = md[field]
+                # JSON text as the dictionary key keeps 1 and "1" distinct
+                key = json.dumps(value, sort_keys=True)
+                code = lookup[field].get(key)
+                if code is None:
+                    code = len(dictionaries[field])
+                    lookup[field][key] = code
+                    dictionaries[field].append(value)
+                codes[row, col] = code
+
+        plain_fields = [
+            field for field in fields
+            if len(dictionaries[field]) > cls.DICTIONARY_MAX_RATIO * len(metadatas)
+        ]
+        for field in plain_fields:
+            column = [
+                json.dumps(md[field], ensure_ascii=False) if field in md else ""
+                for md in metadatas
+            ]
+            StringColumn.write(generation, f"metadata_{fields.index(field)}", column)
+            del dictionaries[field]
+
+        coded = [col for col, field in enumerate(fields) if field not in plain_fields]
+        np.save(generation / "metadata_codes.npy", np.ascontiguousarray(codes[:, coded]))
+
+        with open(generation / cls.MANIFEST, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "count": len(ids),
+                    "dim": int(vectors.shape[1]),
+                    "embedding_model": embedding_model,
+                    "ids_digest": ids_digest(ids),
+                    "fields": fields,
+                    "dictionaries": dictionaries,
+                    "plain_fields": plain_fields,
+                    "quantization": quantization_report,
+                },
+                f,
+                ensure_ascii=False,
+            )
+
+        versioned_dir.publish(generation)
+
+        logger.info(
+            "Local index written | path=%s | vectors=%s | dim=%s | fields=%s",
+            directory,
+            len(ids),
+            int(vectors.shape[1]),
+            len(fields),
+        )
+
+    # Query
+
+    def search(
+        self,
+        embeddings: Sequence[Sequence[float]],
+        k: int,
+        rows: np.ndarray | None = None,
+    ) -> List[List[Tuple[int, float]]]:
+        """
+        Returns, for each query embedding, the k nearest rows as
+        (row, cosine distance) pairs sorted by distance.
+
+        When `rows` is given (e.g. the rows matching a metadata filter),
+        only those rows are scored, with their float32 vectors.
+        """
+        if self.count == 0 or k <= 0 or (rows is not None and len(rows) == 0):
+            return [[] for _ in embeddings]
+
+        queries = np.asarray(embeddings, dtype=np.float32)
+        norms = np.linalg.norm(queries, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        queries = queries / norms
+
+        if rows is not None:
+            rows = np.sort(np.asarray(rows, dtype=np.int64))
+            subset = np.asarray(self.vectors[rows])
+            results = []
+            for row_scores in queries @ subset.T:
+                top = self._top_k(row_scores, k)
+                results.append([(int(rows[i]), float(1.0 - row_scores[i])) for i in top])
+            return results
+
+        k = min(k, self.count)
+        if self.compact is not None:
+            return [
+                self._rescore(query, self._top_k(row_scores, k * self.rescore_factor), k)
+                for query, row_scores in zip(queries, self.compact.scores(queries))
+            ]
+
+        if len(queries) == 1:
+            scores = (self.vectors @ queries[0])[np.newaxis, :]
+        else:
+            scores = queries @ self.vectors.T
+
+        results = []
+        for row_scores in scores:
+            top = self._top_k(row_scores, k)
+            results.append([(int(row), float(1.0 - row_scores[row])) for row in top])
+        return results
+
+    def _rescore(self, query: np.ndarray, candidates: np.ndarray, k: int) -> List[Tuple[int, float]]:
+        """
+        Ranks compact-search candidates by their full-precision similarity.
+        """
+        candidates = np.sort(candidates)  # sequential reads from the memory map
+        exact = np.asarray(self.vectors[candidates]) @ query
+        order = self._top_k(exact, k)
+        return [(int(candidates[i]), float(1.0 - exact[i])) for i in order]
+
+    @staticmethod
+    def _advise_random_access(array: np.ndarray) -> None:
+        """
+        Disables read-ahead on the float32 memory map: rescoring reads a few
+        scattered rows, and read-ahead would page in most of the file.
+        """
+        mapped = getattr(array, "_mmap", None)
+        if mapped is not None and hasattr(mmap, "MADV_RANDOM"):
+            mapped.madvise(mmap.MADV_RANDOM)
+
+    @staticmethod
+    def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+        """
+        Indices of the k highest scores, best first.
+        """
+        k = min(k, len(scores))
+        if k < len(scores):
+            top = np.argpartition(-scores, k - 1)[:k]
+        else:
+            top = np.arange(len(scores))
+        return top[np.argsort(-scores[top], kind="stable")]
+
+    def document(self, row: int) -> Document:
+        metadata = {}
+        for field in self.fields:
+            column = self._plain_columns.get(field)
+            if column is not None:
+                value = column[row]
+                if value:
+                    metadata[field] = json.loads(value)
+                continue
+            code = int(self.codes[row, self._coded_cols[field]])
+            if code >= 0:
+                metadata[field] = self.dictionaries[field][code]
+
+        chunk_id = self.ids[row]
+        return Document(page_content=self.texts[row], metadata=metadata, id=chunk_id)
+
+    def rows_for_ids(self, ids: Sequence[str]) -> List[int | None]:
+        if self._row_by_id is None:
+            self._row_by_id = {self.ids[row]: row for row in range(self.count)}
+        return [self._row_by_id.get(chunk_id) for chunk_id in ids]
+
+    # Quantization report
+
+    @staticmethod
+    def _log_compact_size(compact: QuantizedVectors, vectors: np.ndarray) -> None:
+        full_bytes = int(vectors.size * 4)
+        logger.info(
+            "Compact vectors | mode=%s | dim=%s/%s | compact=%.1fMB | float32=%.1fMB | reduction=%.1fx",
+            compact.mode,
+            compact.truncate_dim,
+            vectors.shape[1],
+            compact.nbytes / 1e6,
+            full_bytes / 1e6,
+            full_bytes / compact.nbytes if compact.nbytes else 0.0,
+        )
+
+    @classmethod
+    def _evaluate_compact(
+        cls, vectors: np.ndarray, compact: QuantizedVectors, rescore_factor: int
+    ) -> Dict[str, Any]:
+        """
+        Measures recall@k of the compact search (alone and with float32
+        rescoring) against exact float32 search, using a sample of the
+        stored vectors as queries. Each query's own row is left out of
+        both rankings: it would be a free top-1 hit and inflate recall.
+        """
+        report: Dict[str, Any] = {
+            "mode": compact.mode,
+            "truncate_dim": compact.truncate_dim,
+            "compact_bytes": compact.nbytes,
+            "float32_bytes": int(vectors.size * 4),
+        }
+        if len(vectors) < 2:
+            return report
+
+        k = min(cls.RECALL_K, len(vectors) - 1)
+        rng = np.random.default_rng(0)
+        sample = rng.choice(len(vectors), size=min(cls.RECALL_SAMPLE, len(vectors)), replace=False)
+        queries = vectors[sample]
+
+        compact_hits = rescored_hits = 0
+        for row, query, compact_scores in zip(sample, queries, compact.scores(queries)):
+            exact_scores = vectors @ query
+            exact_scores[row] = compact_scores[row] = -np.inf
+            expected = set(cls._top_k(exact_scores, k).tolist())
+
+            compact_top = cls._top_k(compact_scores, k)
+            compact_hits += len(expected & set(compact_top.tolist()))
+
+            candidates = cls._top_k(compact_scores, k * max(1, rescore_factor))
+            rescored = candidates[cls._top_k(exact_scores[candidates], k)]
+            rescored_hits += len(expected & set(rescored.tolist()))
+
+        total = k * len(sample)
+        report.update(
+            recall_k=k,
+            recall_compact=compact_hits / total,
+            recall_rescored=rescored_hits / total,
+            rescore_factor=rescore_factor,
+        )
+        logger.info(
+            "Compact vectors recall@%s vs float32 | compact only=%.3f | rescored (x%s)=%.3f | queries=%s",
+            k,
+            report["recall_compact"],
+            rescore_factor,
+            report["recall_rescored"],
+            len(sample),
+        )
+        return report
+
+    def close(self) -> None:
+        self.ids.close()
+        self.texts.close()
+        for column in self._plain_columns.values():
+            column.close()
@@ -0,0 +1,256 @@
+import json
+import logging
+import re
+from pathlib import Path
+from typing import Any, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from backend.infra import versioned_dir
+from backend.infra.local_index import ids_digest
+from backend.infra.string_column import StringColumn
+
+logger = logging.getLogger("VECTORSTORE_METADATA_INDEX")
+
+# Filters accepted by Retriever.retrieve, keyed by chunk metadata field:
+# {"Genre": "horror", "Origin/Ethnicity": ["Japanese"], "Release Year": (1990, 1999)}
+MetadataFilters = Dict[str, Any]
+
+GENRE_FIELD = "Genre"
+YEAR_FIELD = "Release Year"
+DIRECTOR_FIELD = "Director"
+ORIGIN_FIELD = "Origin/Ethnicity"
+
+_WORD = re.compile(r"[\w']+")
+_LIST_SEPARATOR = re.compile(r"\s*(?:,|;|/|\||&|\band\b)\s*")
+_DECADE = re.compile(r"^(\d{3})0s$")
+
+
+class MetadataIndex:
+    """
+    Inverted index from chunk metadata values to chunk rows, built at
+    ingestion and used by the Retriever to restrict vector search.
+
+    Indexed fields:
+    - Genre: one term per lowercased word ("Comedy Drama" -> comedy, drama);
+      a filter value matches chunks containing all of its words.
+    - Director, Origin/Ethnicity: one term per lowercased list item
+      ("A, B and C" -> a, b, c); a filter value must match an item exactly.
+    - Release Year: range buckets of `year_bucket` years, refined with a
+      per-row year array, so ranges are resolved without scanning all rows.
+
+    Values of one field are OR-ed, fields are AND-ed. Rows are positions in
+    the chunk list the index was built from; chunk ids are kept alongside to
+    map rows to vector store records.
+
+    On-disk layout: manifest.json (terms per field), postings.npy (int32
+    sorted rows of all terms, concatenated) with postings_offsets.npy,
+    years.npy (int16, 0 = unknown) and the chunk ids column.
+    """
+    MANIFEST = "manifest.json"
+    TERM_FIELDS = (GENRE_FIELD, DIRECTOR_FIELD, ORIGIN_FIELD)
+
+    def __init__(self, directory: Path):
+        self.directory = versioned_dir.current(directory)
+
+        with open(self.directory / self.MANIFEST, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+
+        self.year_bucket: int = manifest["year_bucket"]
+        self.ids_digest: str = manifest["ids_digest"]
+        self.terms: Dict[str, Dict[str, int]] = manifest["terms"]
+
+        self.postings = np.load(self.directory / "postings.npy", mmap_mode="r")
+        self.offsets = np.load(self.directory / "postings_offsets.npy", mmap_mode="r")
+        self.years = np.load(self.directory / "years.npy", mmap_mode="r")
+        self.ids = StringColumn(self.directory, "ids")
+
+        logger.info(
+            "Metadata index loaded | path=%s | chunks=%s | terms=%s",
+            self.directory,
+            self.count,
+            {field: len(terms) for field, terms in self.terms.items()},
+        )
+
+    @property
+    def count(self) -> int:
+        return len(self.ids)
+
+    # Build
+
+    @classmethod
+    def build(
+        cls,
+        directory: Path,
+        ids: Sequence[str],
+        metadatas: Sequence[Dict[str, Any]],
+        year_bucket: int = 10,
+    ) -> None:
+        directory = Path(directory)
+        generation = versioned_dir.new_generation(directory)
+
+        postings: Dict[Tuple[str, str], List[int]] = {}
+        years = np.zeros(len(metadatas), dtype=np.int16)
+
+        for row, md in enumerate(metadatas):
+            for field in cls.TERM_FIELDS:
+                for term in cls._terms(field, md.get(field)):
+                    postings.setdefault((field, term), []).append(row)
+
+            year = cls._parse_year(md.get(YEAR_FIELD))
+            if year is not None:
+                years[row] = year
+                bucket = str(year - year % year_bucket)
+                postings.setdefault((YEAR_FIELD, bucket), []).append(row)
+
+        terms: Dict[str, Dict[str, int]] = {}
+        offsets = np.zeros(len(postings) + 1, dtype=np.int64)
+        for slot, ((field, term), rows) in enumerate(postings.items()):
+            terms.setdefault(field, {})[term] = slot
+            offsets[slot + 1] = offsets[slot] + len(rows)
+
+        flat = np.fromiter(
+            (row for rows in postings.values() for row in rows),
+            dtype=np.int32,
+            count=int(offsets[-1]),
+        )
+        np.save(generation / "postings.npy", flat)
+        np.save(generation / "postings_offsets.npy", offsets)
+        np.save(generation / "years.npy", years)
+        StringColumn.write(generation, "ids", ids)
+
+        with open(generation / cls.MANIFEST, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "count": len(ids),
+                    "ids_digest": ids_digest(ids),
+                    "year_bucket": year_bucket,
+                    "terms": terms,
+                },
+                f,
+                ensure_ascii=False,
+            )
+
+        versioned_dir.publish(generation)
+
+        logger.info(
+            "Metadata index written | path=%s | chunks=%s | terms=%s | postings=%s",
+            directory,
+            len(ids),
+            {field: len(field_terms) for field, field_terms in terms.items()},
+            int(offsets[-1]),
+        )
+
+    # Query
+
+    def resolve(self, filters: MetadataFilters) -> np.ndarray:
+        """
+        Returns the sorted rows matching every filter.
+        """
+        matched: np.ndarray | None = None
+
+        for field, value in filters.items():
+            if field == YEAR_FIELD:
+                rows = self._year_rows(*self.parse_year_range(value))
+            elif field in self.TERM_FIELDS:
+                values = [value] if isinstance(value, str) else list(value)
+                rows = self._union([self._value_rows(field, v) for v in values])
+            else:
+                raise ValueError(f"Unsupported metadata filter: {field}")
+
+            matched = rows if matched is None else np.intersect1d(matched, rows, assume_unique=True)
+            if len(matched) == 0:
+                break
+
+        if matched is None:
+            matched = np.arange(self.count, dtype=np.int32)
+
+        logger.debug("Metadata filter %s matched %s/%s chunks", filters, len(matched), self.count)
+        return matched
+
+    def ids_for(self, rows: np.ndarray) -> List[str]:
+        return [self.ids[int(row)] for row in rows]
+
+    def close(self) -> None:
+        self.ids.close()
+
+    @staticmethod
+    def parse_year_range(value: Any) -> Tuple[int | None, int | None]:
+        """
+        Accepts a year (1994), a decade ("1990s") or an inclusive
+        (start, end) pair where either end may be None.
+        """
+        if isinstance(value, (tuple, list)):
+            start, end = value
+            return (int(start) if start is not None else None, int(end) if end is not None else None)
+
+        text = str(value).strip().lower()
+        decade = _DECADE.match(text)
+        if decade:
+            start = int(decade.group(1)) * 10
+            return start, start + 9
+
+        year = int(text)
+        return year, year
+
+    # Helpers
+
+    def _postings(self, field: str, term: str) -> np.ndarray:
+        slot = self.terms.get(field, {}).get(term)
+        if slot is None:
+            return np.empty(0, dtype=np.int32)
+        return np.asarray(self.postings[self.offsets[slot]:self.offsets[slot + 1]])
+
+    def _value_rows(self, field: str, value: str) -> np.ndarray:
+        terms = self._terms(field, value)
+        if not terms:
+            return np.empty(0, dtype=np.int32)
+
+        rows = self._postings(field, terms[0])
+        for term in terms[1:]:
+            rows = np.intersect1d(rows, self._postings(field, term), assume_unique=True)
+        return rows
+
+    def _year_rows(self, start: int | None, end: int | None) -> np.ndarray:
+        buckets = [
+            int(term) for term in self.terms.get(YEAR_FIELD, {})
+            if (end is None or int(term) <= end)
+            and (start is None or int(term) + self.year_bucket - 1 >= start)
+        ]
+        rows = self._union([self._postings(YEAR_FIELD, str(bucket)) for bucket in buckets])
+
+        # Buckets at the edges of the range may hold years outside it
+        years = self.years[rows]
+        keep = np.ones(len(rows), dtype=bool)
+        if start is not None:
+            keep &= years >= start
+        if end is not None:
+            keep &= years <= end
+        return rows[keep]
+
+    @staticmethod
+    def _union(row_sets: List[np.ndarray]) -> np.ndarray:
+        if not row_sets:
+            return np.empty(0, dtype=np.int32)
+        if len(row_sets) == 1:
+            return row_sets[0]
+        return np.unique(np.concatenate(row_sets))
+
+    @staticmethod
+    def _terms(field: str, value: Any) -> List[str]:
+        if value is None:
+            return []
+        text = str(value).strip().lower()
+        if not text:
+            return []
+        if field == GENRE_FIELD:
+            return list(dict.fromkeys(_WORD.findall(text)))
+        return list(dict.fromkeys(item for item in _LIST_SEPARATOR.split(text) if item))
+
+    @staticmethod
+    def _parse_year(value: Any) -> int | None:
+        try:
+            year = int(str(value).strip())
+        except (TypeError, ValueError):
+            return None
+        return year if 0 < year < 10_000 else None
@@ -0,0 +1,171 @@
+import json
+import logging
+import re
+from array import array
+from pathlib import Path
+from typing import Any, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from backend.infra import versioned_dir
+from backend.infra.local_index import ids_digest
+from backend.infra.string_column import StringColumn
+
+logger = logging.getLogger("VECTORSTORE_SPARSE_INDEX")
+
+_TOKEN = re.compile(r"\w+")
+_STOPWORDS = frozenset(
+    "a an and are as at be but by for from has he her his in into is it its of on or "
+    "she that the their them they this to was were which who whom with".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    return [token for token in _TOKEN.findall(text.lower()) if token not in _STOPWORDS]
+
+
+class BM25Index:
+    """
+    Prebuilt BM25 inverted index over chunk text plus the Title and Cast
+    metadata, for lexical matches (character, actor or title names) that
+    dense retrieval ranks poorly.
+
+    BM25 weights are computed at build time, so a posting holds its final
+    impact (idf * saturated tf with length normalization) and a query is a
+    sum of posting slices into one score array. On disk: vocabulary.json
+    (terms in id order), postings_docs.npy (int32 rows, grouped by term),
+    postings_impacts.npy (float32), postings_offsets.npy (int64) and the
+    chunk ids column; the postings arrays are memory-mapped on load.
+    """
+    MANIFEST = "manifest.json"
+    METADATA_FIELDS = ("Title", "Cast")
+
+    def __init__(self, directory: Path):
+        self.directory = versioned_dir.current(directory)
+
+        with open(self.directory / self.MANIFEST, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        with open(self.directory / "vocabulary.json", "r", encoding="utf-8") as f:
+            self.vocabulary: Dict[str, int] = {term: idx for idx, term in enumerate(json.load(f))}
+
+        self.ids_digest: str = manifest["ids_digest"]
+        self.docs = np.load(self.directory / "postings_docs.npy", mmap_mode="r")
+        self.impacts = np.load(self.directory / "postings_impacts.npy", mmap_mode="r")
+        self.offsets = np.load(self.directory / "postings_offsets.npy", mmap_mode="r")
+        self.ids = StringColumn(self.directory, "ids")
+
+        logger.info(
+            "BM25 index loaded | path=%s | chunks=%s | terms=%s | postings=%s",
+            self.directory,
+            self.count,
+            len(self.vocabulary),
+            len(self.docs),
+        )
+
+    @property
+    def count(self) -> int:
+        return len(self.ids)
+
+    # Build
+
+    @classmethod
+    def build(
+        cls,
+        directory: Path,
+        ids: Sequence[str],
+        texts: Sequence[str],
+        metadatas: Sequence[Dict[str, Any]],
+        k1: float = 1.2,
+        b: float = 0.75,
+    ) -> None:
+        directory = Path(directory)
+        generation = versioned_dir.new_generation(directory)
+
+        vocabulary: Dict[str, int] = {}
+        token_ids = array("i")
+        lengths = np.zeros(len(texts), dtype=np.int64)
+
+        for row, (text, md) in enumerate(zip(texts, metadatas)):
+            fields = [text] + [str(md.get(field) or "") for field in cls.METADATA_FIELDS]
+            tokens = tokenize(" ".join(fields))
+            lengths[row] = len(tokens)
+            token_ids.extend([vocabulary.setdefault(token, len(vocabulary)) for token in tokens])
+
+        # One (term, row) key per token; unique keys are the postings, sorted
+        # by term then row, and their counts are the term frequencies.
+        n_rows = max(len(texts), 1)
+        keys = np.asarray(token_ids, dtype=np.int64) * n_rows
+        keys += np.repeat(np.arange(len(texts), dtype=np.int64), lengths)
+        keys, tfs = np.unique(keys, return_counts=True)
+        terms = (keys // n_rows).astype(np.int32)
+        docs = (keys % n_rows).astype(np.int32)
+        tfs = tfs.astype(np.float32)
+        lengths = lengths.astype(np.float32)
+
+        counts = np.bincount(terms, minlength=len(vocabulary))
+        offsets = np.zeros(len(vocabulary) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum(counts)
+        df = counts.astype(np.float32)
+
+        avg_length = float(lengths.mean()) if len(lengths) and lengths.mean() > 0 else 1.0
+        idf = np.log1p((n_rows - df + 0.5) / (df + 0.5))
+        norm = k1 * (1 - b + b * lengths[docs] / avg_length)
+        impacts = (idf[terms] * tfs * (k1 + 1) / (tfs + norm)).astype(np.float32)
+
+        np.save(generation / "postings_docs.npy", docs)
+        np.save(generation / "postings_impacts.npy", impacts)
+        np.save(generation / "postings_offsets.npy", offsets)
+        StringColumn.write(generation, "ids", ids)
+        with open(generation / "vocabulary.json", "w", encoding="utf-8") as f:
+            json.dump(list(vocabulary), f, ensure_ascii=False)
+        with open(generation / cls.MANIFEST, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "count": len(ids),
+                    "ids_digest": ids_digest(ids),
+                    "k1": k1,
+                    "b": b,
+                    "avg_length": avg_length,
+                    "fields": ["text", *cls.METADATA_FIELDS],
+                },
+                f,
+            )
+
+        versioned_dir.publish(generation)
+
+        logger.info(
+            "BM25 index written | path=%s | chunks=%s | terms=%s | postings=%s",
+            directory,
+            len(ids),
+            len(vocabulary),
+            len(docs),
+        )
+
+    # Query
+
+    def search(self, query: str, n: int, rows: np.ndarray | None = None) -> List[Tuple[int, float]]:
+        """
+        Returns up to `n` (row, BM25 score) pairs with a positive score,
+        best first. `rows` restricts the candidates (e.g. metadata filters).
+        """
+        term_ids = {self.vocabulary[t] for t in tokenize(query) if t in self.vocabulary}
+        if not term_ids or n <= 0:
+            return []
+
+        scores = np.zeros(self.count, dtype=np.float32)
+        for term_id in term_ids:
+            start, end = self.offsets[term_id], self.offsets[term_id + 1]
+            # A term has at most one posting per row, so fancy += is exact
+            scores[self.docs[start:end]] += self.impacts[start:end]
+
+        candidates = np.flatnonzero(scores) if rows is None else rows[scores[rows] > 0]
+        if len(candidates) > n:
+            candidates = candidates[np.argpartition(-scores[candidates], n - 1)[:n]]
+        candidates = candidates[np.argsort(-scores[candidates], kind="stable")]
+        return [(int(row), float(scores[row])) for row in candidates]
+
+    def ids_for(self, rows: Sequence[int]) -> List[str]:
+        return [self.ids[int(row)] for row in rows]
+
+    def close(self) -> None:
+        self.ids.close()
@@ -0,0 +1,41 @@
+import mmap
+from pathlib import Path
+from typing import Sequence
+
+import numpy as np
+
+
+class StringColumn:
+    """
+    Read-only column of UTF-8 strings: one concatenated blob plus an int64
+    offsets array (N + 1 entries), both memory-mapped.
+    """
+    def __init__(self, directory: Path, name: str):
+        self.offsets = np.load(directory / f"{name}.offsets.npy", mmap_mode="r")
+        self._file = open(directory / f"{name}.bin", "rb")
+        size = int(self.offsets[-1])
+        self._blob = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+
+    def __getitem__(self, row: int) -> str:
+        start, end = int(self.offsets[row]), int(self.offsets[row + 1])
+        return self._blob[start:end].decode("utf-8")
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def close(self) -> None:
+        if isinstance(self._blob, mmap.mmap):
+            self._blob.close()
+        self._file.close()
+
+    @staticmethod
+    def write(directory: Path, name: str, values: Sequence[str]) -> None:
+        offsets = np.zeros(len(values) + 1, dtype=np.int64)
+        with open(directory / f"{name}.bin", "wb") as f:
+            position = 0
+            for idx, value in enumerate(values):
+                encoded = value.encode("utf-8")
+                f.write(encoded)
+                position += len(encoded)
+                offsets[idx + 1] = position
+        np.save(directory / f"{name}.offsets.npy", offsets)
@@ -0,0 +1,103 @@
+import json
+import logging
+from pathlib import Path
+from typing import Any, Dict
+
+import numpy as np
+
+logger = logging.getLogger("VECTORSTORE_QUANTIZATION")
+
+QUANTIZATION_MODES = ("none", "float16", "int8")
+
+
+class QuantizedVectors:
+    """
+    Compact copy of the index vectors used for the first search pass.
+
+    Vectors are optionally truncated to their first `truncate_dim`
+    dimensions (Matryoshka embeddings such as text-embedding-3-* keep most
+    of their quality when shortened) and re-normalized, then stored as:
+    - float16: half precision;
+    - int8: per-dimension scalar quantization, x ~= low + (code + 128) * step.
+
+    For int8, the score q . x = (q * step) . code + constant(q), so ranking
+    only needs one product with the raw codes. Codes are converted to
+    float32 block by block, which bounds the temporary memory of a search.
+    """
+    CODES_FILE = "vectors_compact.npy"
+    PARAMS_FILE = "vectors_compact.json"
+    BLOCK_ROWS = 16384
+
+    def __init__(self, codes: np.ndarray, mode: str, truncate_dim: int, step: np.ndarray | None):
+        self.codes = codes
+        self.mode = mode
+        self.truncate_dim = truncate_dim
+        self.step = step
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.codes.size * self.codes.dtype.itemsize)
+
+    @classmethod
+    def build(cls, vectors: np.ndarray, mode: str, truncate_dim: int = 0) -> "QuantizedVectors":
+        if mode not in QUANTIZATION_MODES or mode == "none":
+            raise ValueError(f"Unknown quantization mode: {mode}")
+
+        truncate_dim = truncate_dim if 0 < truncate_dim < vectors.shape[1] else vectors.shape[1]
+        reduced = cls._truncate(np.asarray(vectors, dtype=np.float32), truncate_dim)
+
+        if mode == "float16":
+            return cls(reduced.astype(np.float16), mode, truncate_dim, step=None)
+
+        low = reduced.min(axis=0) if len(reduced) else np.zeros(truncate_dim, dtype=np.float32)
+        high = reduced.max(axis=0) if len(reduced) else np.zeros(truncate_dim, dtype=np.float32)
+        step = (high - low) / 255.0
+        step[step == 0] = 1.0
+        codes = np.clip(np.rint((reduced - low) / step) - 128, -128, 127).astype(np.int8)
+        return cls(codes, mode, truncate_dim, step=step.astype(np.float32))
+
+    def save(self, directory: Path) -> None:
+        np.save(Path(directory) / self.CODES_FILE, self.codes)
+        params: Dict[str, Any] = {"mode": self.mode, "truncate_dim": self.truncate_dim}
+        if self.step is not None:
+            params["step"] = self.step.tolist()
+        with open(Path(directory) / self.PARAMS_FILE, "w", encoding="utf-8") as f:
+            json.dump(params, f)
+
+    @classmethod
+    def load(cls, directory: Path) -> "QuantizedVectors | None":
+        params_path = Path(directory) / cls.PARAMS_FILE
+        if not params_path.exists():
+            return None
+
+        with open(params_path, "r", encoding="utf-8") as f:
+            params = json.load(f)
+        step = params.get("step")
+        return cls(
+            codes=np.load(Path(directory) / cls.CODES_FILE, mmap_mode="r"),
+            mode=params["mode"],
+            truncate_dim=params["truncate_dim"],
+            step=np.asarray(step, dtype=np.float32) if step is not None else None,
+        )
+
+    def scores(self, queries: np.ndarray) -> np.ndarray:
+        """
+        Returns (Q x N) ranking scores for normalized full-dimension queries.
+        Scores are comparable within a query only.
+        """
+        queries = self._truncate(queries, self.truncate_dim)
+        if self.step is not None:
+            queries = queries * self.step
+
+        out = np.empty((len(queries), len(self.codes)), dtype=np.float32)
+        for start in range(0, len(self.codes), self.BLOCK_ROWS):
+            block = np.asarray(self.codes[start:start + self.BLOCK_ROWS], dtype=np.float32)
+            out[:, start:start + len(block)] = queries @ block.T
+        return out
+
+    @staticmethod
+    def _truncate(vectors: np.ndarray, dim: int) -> np.ndarray:
+        reduced = vectors[:, :dim]
+        norms = np.linalg.norm(reduced, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return (reduced / norms).astype(np.float32)
@@ -0,0 +1,105 @@
+"""
+Atomic publication of on-disk indexes (local vector index, metadata and
+BM25 indexes, film metadata, doc store, JSONL offset indexes).
+
+A versioned directory holds immutable generations in subdirectories
+(`g<time_ns>-<pid>`) and a CURRENT file naming the live one:
+- builders write a complete generation in `new_generation(directory)`;
+- `publish(generation)` switches CURRENT to it with a single os.replace,
+  so readers and `version_of` see either the previous or the new
+  generation, never a missing or half-written one, even if the builder
+  crashes;
+- the generation it replaced is kept for readers that resolved CURRENT
+  just before the switch; older ones (and unpublished leftovers of a
+  crashed build) are removed on the next publish.
+
+Directories written before this layout (files directly inside) are read
+as they are until their first publish.
+"""
+import logging
+import os
+import re
+import shutil
+import time
+from pathlib import Path
+from typing import Any
+
+logger = logging.getLogger("VECTORSTORE_VERSIONED_DIR")
+
+# Pointer file naming the live generation of a versioned directory
+POINTER = "CURRENT"
+
+_GENERATION = re.compile(r"^g\d+-\d+$")
+
+
+def new_generation(directory: Path) -> Path:
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    generation = directory / f"g{time.time_ns()}-{os.getpid()}"
+    generation.mkdir()
+    return generation
+
+
+def publish(generation: Path) -> None:
+    """
+    Makes `generation` the live generation of its directory.
+    """
+    generation = Path(generation)
+    directory = generation.parent
+    previous = _pointer(directory)
+
+    tmp_pointer = directory / f"{POINTER}.{generation.name}.tmp"
+    tmp_pointer.write_text(generation.name, encoding="utf-8")
+    os.replace(tmp_pointer, directory / POINTER)
+
+    _prune(directory, keep={generation.name, previous}, legacy=previous is None)
+
+
+def discard(generation: Path) -> None:
+    shutil.rmtree(generation, ignore_errors=True)
+
+
+def current(directory: Path) -> Path:
+    """
+    Directory holding the files of the live generation.
+    """
+    directory = Path(directory)
+    name = _pointer(directory)
+    return directory / name if name is not None else directory
+
+
+def version_of(path: Path) -> Any:
+    """
+    Cheap fingerprint that changes whenever `path` is republished: the
+    live generation of a versioned directory, otherwise the modification
+    time of the file or legacy directory (None if it does not exist).
+    """
+    path = Path(path)
+    name = _pointer(path)
+    if name is not None:
+        return name
+    return path.stat().st_mtime_ns if path.exists() else None
+
+
+def _pointer(directory: Path) -> str | None:
+    try:
+        return (directory / POINTER).read_text(encoding="utf-8").strip() or None
+    except (FileNotFoundError, NotADirectoryError):
+        return None
+
+
+def _prune(directory: Path, keep: set, legacy: bool) -> None:
+    for entry in directory.iterdir():
+        if entry.name == POINTER or entry.name in keep:
+            continue
+        if entry.is_dir() and _GENERATION.match(entry.name):
+            shutil.rmtree(entry, ignore_errors=True)
+        elif entry.name.startswith(f"{POINTER}.") and entry.name.endswith(".tmp"):
+            entry.unlink(missing_ok=True)
+        elif not legacy:
+            # Files of the pre-generation layout, kept for one publish
+            if entry.is_dir():
+                shutil.rmtree(entry, ignore_errors=True)
+            else:
+                entry.unlink(missing_ok=True)
+            logger.debug("Removed legacy index entry %s", entry)
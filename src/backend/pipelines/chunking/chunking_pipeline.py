@@ -1,8 +1,15 @@
 import json
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
 from pathlib import Path
-from backend.config.settings import CHUNKING_CONFIG
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+from backend.config.settings import ARTIFACT_CONFIG, CHUNKING_CONFIG
+from backend.infra import arrow_artifacts
+from backend.infra.doc_store import DocStore
+from backend.infra.jsonl_store import JsonlIndexWriter
 from backend.pipelines.chunking.chunk_strategy import (
-    CharacterSplitter, TokenSplitter, RecursiveSplitter
+    CharacterSplitter, TokenSplitter, RecursiveSplitter, ChunkStrategy
 )
 
 import logging
@@ -10,6 +17,31 @@ import logging
 logger = logging.getLogger("CHUNKING")
 
 
+def build_splitter(strategy: str, chunk_size: int, chunk_overlap: int) -> ChunkStrategy:
+    match strategy:
+        case "character":
+            return CharacterSplitter(chunk_size, chunk_overlap)
+        case "token":
+            return TokenSplitter(chunk_size, chunk_overlap)
+        case "recursive":
+            return RecursiveSplitter(chunk_size, chunk_overlap)
+        case _:
+            raise ValueError(f"Unknown strategy: {strategy}")
+
+
+# Splitter owned by each worker process (set by the pool initializer)
+_worker_splitter: ChunkStrategy | None = None
+
+
+def _init_worker(strategy: str, chunk_size: int, chunk_overlap: int) -> None:
+    global _worker_splitter
+    _worker_splitter = build_splitter(strategy, chunk_size, chunk_overlap)
+
+
+def _split_batch(texts: List[str]) -> List[List[str]]:
+    return [_worker_splitter.split(text) for text in texts]
+
+
 class ChunkingPipeline:
     """
     Splits text documents into smaller chunks based on the configured strategy
@@ -17,60 +49,205 @@ class ChunkingPipeline:
 
     Reads a JSONL file, applies the chosen splitter, and saves the resulting
     chunks as a new JSONL file.
+
+    When `CHUNKING_CONFIG["workers"]` is greater than 1, documents are split
+    in batches across a process pool where each worker builds its own
+    splitter. Results are consumed in submission order, so chunk ids and
+    file order are identical to the serial run.
+
+    When `CHUNKING_CONFIG["streaming"]` is enabled, documents are read and
+    chunks are written incrementally instead of materializing both lists.
+    In both modes a sidecar offset index (JsonlStore) is written next to the
+    output, so chunks can be read back by `chunk_id` without a full load.
+
+    With `ARTIFACT_CONFIG["format"]` "arrow" or "parquet", documents are
+    read from and chunks written to columnar tables (docs.arrow,
+    chunks.arrow); chunk rows reference their film by `doc_id` instead of
+    repeating its metadata.
+
+    When `CHUNKING_CONFIG["parent_document"]` is enabled, each chunk also
+    records its `char_start`/`char_end` span within the plot, and a DocStore
+    (byte offsets into the input docs.jsonl) is built so the Retriever can
+    return a window of the parent plot around small matched chunks.
     """
+    INDEX_BATCH_LINES = 8192
+
     def __init__(self, input_path: Path, output_path: Path):
-        self.input_path = input_path
-        self.output_path = output_path
+        self.artifact_format = ARTIFACT_CONFIG.get("format", "jsonl")
+        self.input_path = arrow_artifacts.artifact_path(input_path, self.artifact_format)
+        self.output_path = arrow_artifacts.artifact_path(output_path, self.artifact_format)
         self.strategy = CHUNKING_CONFIG["strategy"]
         self.chunk_size = CHUNKING_CONFIG["chunk_size"]
         self.chunk_overlap = CHUNKING_CONFIG["chunk_overlap"]
+        self.workers = CHUNKING_CONFIG.get("workers", 1)
+        self.batch_size = CHUNKING_CONFIG.get("batch_size", 256)
+        self.streaming = CHUNKING_CONFIG.get("streaming", False)
+        self.parent_document = CHUNKING_CONFIG.get("parent_document", False)
         self.splitter = self._get_splitter()
 
     def _get_splitter(self):
-        match self.strategy:
-            case "character":
-                return CharacterSplitter(self.chunk_size, self.chunk_overlap)
-            case "token":
-                return TokenSplitter(self.chunk_size, self.chunk_overlap)
-            case "recursive":
-                return RecursiveSplitter(self.chunk_size, self.chunk_overlap)
-            case _:
-                raise ValueError(f"Unknown strategy: {self.strategy}")
+        return build_splitter(self.strategy, self.chunk_size, self.chunk_overlap)
 
     def run(self):
         logger.info(f"Strategy: {self.strategy}")
         logger.info(f"Chunk size: {self.chunk_size} | Overlap: {self.chunk_overlap}")
+        logger.info(f"Workers: {self.workers} | Batch size: {self.batch_size}")
+        logger.info(f"Streaming: {self.streaming} | Artifact format: {self.artifact_format}")
+        logger.info(f"Parent document spans: {self.parent_document}")
+
+        if self.streaming:
+            self._run_streaming()
+        else:
+            self._run_in_memory()
+
+        if self.parent_document:
+            DocStore.build(self.input_path, Path(CHUNKING_CONFIG["doc_store_dir"]))
 
-        with open(self.input_path, "r", encoding="utf-8") as f:
-            documents = [json.loads(line) for line in f]
+    def _run_in_memory(self):
+        if self.artifact_format != "jsonl":
+            documents = list(arrow_artifacts.iter_documents(self.input_path))
+        else:
+            with open(self.input_path, "r", encoding="utf-8") as f:
+                documents = [json.loads(line) for line in f]
 
         logger.info(f"Total documents: {len(documents)}")
 
-        chunks = []
-        for doc in documents:
+        chunks = list(self._iter_chunks(documents))
+
+        logger.info(f"Total chunks generated: {len(chunks)}")
+        logger.info(f"Saving to {self.output_path}")
+
+        self._write_chunks(chunks)
+
+    def _run_streaming(self):
+        """
+        Reads documents lazily and writes each document's chunks as soon as
+        they are produced, so only the chunk ids and line lengths needed for
+        the offset index are kept in memory. The output file is identical to
+        the in-memory run.
+        """
+        logger.info(f"Streaming chunks to {self.output_path}")
+
+        total_docs = 0
+
+        def read_documents():
+            nonlocal total_docs
+            if self.artifact_format != "jsonl":
+                for doc in arrow_artifacts.iter_documents(self.input_path):
+                    total_docs += 1
+                    yield doc
+                return
+            with open(self.input_path, "r", encoding="utf-8") as f_in:
+                for line in f_in:
+                    total_docs += 1
+                    yield json.loads(line)
+
+        total_chunks = self._write_chunks(self._iter_chunks(read_documents()))
+
+        logger.info(f"Total documents: {total_docs}")
+        logger.info(f"Total chunks generated: {total_chunks}")
+
+    def _write_chunks(self, chunks: Iterable[Dict[str, Any]]) -> int:
+        """
+        Writes chunk records as UTF-8 JSON lines, then their offset index,
+        or as a columnar table. Returns the number of chunks written.
+        """
+        if self.artifact_format != "jsonl":
+            return arrow_artifacts.write_chunks(self.output_path, chunks, docs_path=self.input_path)
+
+        index = JsonlIndexWriter(self.output_path, id_field="chunk_id")
+        ids: List[str] = []
+        lengths: List[int] = []
+
+        with open(self.output_path, "wb") as f:
+            for chunk in chunks:
+                line = (json.dumps(chunk, ensure_ascii=False) + "\n").encode("utf-8")
+                f.write(line)
+                ids.append(chunk["chunk_id"])
+                lengths.append(len(line))
+                if len(ids) >= self.INDEX_BATCH_LINES:
+                    index.add(ids, lengths)
+                    ids, lengths = [], []
+            index.add(ids, lengths)
+
+        index.finalize()
+        return index.count
+
+    def _iter_chunks(self, documents: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """
+        Yields chunk records for the given documents, in document order.
+        """
+        for doc, doc_chunks in self._split_documents(documents):
             doc_id = doc["id"]
             metadata = doc["metadata"]
-
-            doc_chunks = self.splitter.split(doc["text"])
+            spans = self._char_spans(doc["text"], doc_chunks) if self.parent_document else None
 
             for i, chunk_text in enumerate(doc_chunks):
                 chunk_id = f"{doc_id}_{i}"
 
-                chunks.append({
+                chunk_metadata = {
+                    **metadata,
+                    "doc_id": doc_id,
+                    "chunk_id": chunk_id,
+                    "chunk_index": i
+                }
+                if spans is not None and spans[i] is not None:
+                    chunk_metadata["char_start"], chunk_metadata["char_end"] = spans[i]
+
+                yield {
                     "chunk_id": chunk_id,
                     "doc_id": doc_id,
                     "text": chunk_text,
-                    "metadata": {
-                        **metadata,
-                        "doc_id": doc_id,
-                        "chunk_id": chunk_id,
-                        "chunk_index": i
-                    }
-                })
+                    "metadata": chunk_metadata
+                }
 
-        logger.info(f"Total chunks generated: {len(chunks)}")
-        logger.info(f"Saving to {self.output_path}")
+    @staticmethod
+    def _char_spans(text: str, chunks: List[str]) -> List[Tuple[int, int] | None]:
+        """
+        Locates each chunk in the document text. Chunks come in document
+        order, so each search starts just after the previous chunk's start;
+        chunks the splitter altered (not found verbatim) get None.
+        """
+        spans: List[Tuple[int, int] | None] = []
+        cursor = 0
+        for chunk in chunks:
+            start = text.find(chunk, cursor)
+            if start < 0:
+                spans.append(None)
+                continue
+            spans.append((start, start + len(chunk)))
+            cursor = start + 1
+        return spans
 
-        with open(self.output_path, "w", encoding="utf-8") as f:
-            for chunk in chunks:
-                f.write(json.dumps(chunk, ensure_ascii=False) + "\n")
\ No newline at end of file
+    def _split_documents(
+        self, documents: Iterable[Dict[str, Any]]
+    ) -> Iterator[Tuple[Dict[str, Any], List[str]]]:
+        """
+        Yields (document, chunk texts) pairs, in input order.
+        """
+        if self.workers <= 1:
+            for doc in documents:
+                yield doc, self.splitter.split(doc["text"])
+            return
+
+        documents = iter(documents)
+        batches = iter(lambda: list(islice(documents, self.batch_size)), [])
+
+        with ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_init_worker,
+            initargs=(self.strategy, self.chunk_size, self.chunk_overlap),
+        ) as executor:
+            # Keep a bounded number of batches in flight and collect them
+            # in submission order to preserve document order.
+            pending = deque()
+            for batch in batches:
+                texts = [doc["text"] for doc in batch]
+                pending.append((batch, executor.submit(_split_batch, texts)))
+                if len(pending) >= 2 * self.workers:
+                    done_batch, future = pending.popleft()
+                    yield from zip(done_batch, future.result())
+
+            while pending:
+                done_batch, future = pending.popleft()
+                yield from zip(done_batch, future.result())
@@ -20,21 +20,54 @@ class DataCleaner:
     This ensure the dataset is clean, consistent, and semantically correct 
     before further processing such as chunking, embedding, or model training.
     """
-    def __init__(self, invalid_values: list[str], exceptions: dict[str, set[str]] | None = None):
+    def __init__(self, 
+                 invalid_values: list[str], 
+                 exceptions: dict[str, set[str]] | None = None,
+                 vectorized: bool = True):
         """
         Initializes the cleaner with a set of globally invalid tokens and
         optional column-specific exceptions that should be preserved.
+
+        By default (`vectorized`), each column is cleaned as a whole using
+        pandas string accessors instead of a Python call per cell. Both modes
+        produce the same output.
         """
         self.invalid = set(t.lower() for t in invalid_values)
-        self.exceptions = {col: {v.lower() for v in vals} for col, vals in exceptions.items()}
+        self.exceptions = {col: {v.lower() for v in vals} for col, vals in (exceptions or {}).items()}
+        self.vectorized = vectorized
         
 
     def clean(self, df: pd.DataFrame) -> pd.DataFrame:
-        logger.info("Starting data cleaning")
+        logger.info(f"Starting data cleaning (vectorized={self.vectorized})")
         for col in df.columns:
-            df[col] = df[col].apply(lambda x: self._clean_value(x, col))
+            if self.vectorized:
+                df[col] = self._clean_column(df[col], col)
+            else:
+                df[col] = df[col].apply(lambda x: self._clean_value(x, col))
         return self._postprocess(df)
 
+    def _clean_column(self, series: pd.Series, col: str) -> pd.Series:
+        """
+        Column-wise equivalent of `_clean_value`.
+
+        Values are stringified, stripped and lowercased once per column,
+        invalid tokens are detected with `isin`, and column-specific
+        exceptions are applied as a boolean mask that re-allows them.
+        """
+        if series.empty:
+            return series
+
+        missing = series.isna()
+        s = series.astype(str).str.strip().astype(object)
+        s_lower = s.str.lower()
+
+        drop = s_lower.isin(self.invalid)
+        if col in self.exceptions:
+            drop &= ~s_lower.isin(self.exceptions[col])
+
+        s[missing | drop] = None
+        return s
+
     def _clean_value(self, val: Any, col: str) -> Any:
         if pd.isna(val):
             return None
@@ -1,6 +1,6 @@
 import pandas as pd
 import pathlib
-from backend.config.settings import CLEANING_CONFIG
+from backend.config.settings import ARTIFACT_CONFIG, CLEANING_CONFIG
 from backend.pipelines.etl.data_cleaner import DataCleaner
 from backend.pipelines.etl.jsonl_writer import JsonlWriter
 
@@ -14,30 +14,68 @@ class DataPipeline:
     - Reads the raw CSV file.
     - Cleans the data using the DataCleaner class.
     - Writes the cleaned JSONL version for downstream RAG processing.
+
+    When `CLEANING_CONFIG["chunksize"]` is set, the CSV is streamed in
+    batches: each batch is cleaned and appended to the JSONL output before
+    the next one is read, so peak memory does not grow with corpus size.
     """
     def __init__(self, raw_path: pathlib.Path, jsonl_out_path: pathlib.Path):
         self.raw_path = raw_path
         self.jsonl_out_path = jsonl_out_path
-        
+        self.chunksize = CLEANING_CONFIG.get("chunksize", 0)
+
 
     def run(self):
-        logger.info(f"Loading raw dataset: {self.raw_path}")
-        df = pd.read_csv(self.raw_path)
-        
-        logger.info("Cleaning dataset...")
         cleaner = DataCleaner(
             invalid_values=CLEANING_CONFIG["invalid_values"],
-            exceptions=CLEANING_CONFIG.get("exceptions", {})
+            exceptions=CLEANING_CONFIG.get("exceptions", {}),
+            vectorized=CLEANING_CONFIG["vectorized"]
         )
-        df_clean = cleaner.clean(df)
-
-        logger.info("Writing JSONL file...")
         writer = JsonlWriter(
             output_path=self.jsonl_out_path,
             columns=CLEANING_CONFIG["columns"],
             fill_text=CLEANING_CONFIG["fill_text"],
-            text_column=CLEANING_CONFIG["text_column"]
+            text_column=CLEANING_CONFIG["text_column"],
+            artifact_format=ARTIFACT_CONFIG.get("format", "jsonl")
         )
+
+        try:
+            if self.chunksize > 0:
+                self._run_streaming(cleaner, writer)
+            else:
+                self._run_in_memory(cleaner, writer)
+        finally:
+            writer.close()
+
+        logger.info(f"Documents created: {writer.output_path}")
+
+    def _run_in_memory(self, cleaner: DataCleaner, writer: JsonlWriter):
+        logger.info(f"Loading raw dataset: {self.raw_path}")
+        df = pd.read_csv(self.raw_path)
+
+        logger.info("Cleaning dataset...")
+        df_clean = cleaner.clean(df)
+
+        logger.info("Writing JSONL file...")
         writer.build(df_clean)
 
-        logger.info(f"JSONL created: {self.jsonl_out_path}")
+    def _run_streaming(self, cleaner: DataCleaner, writer: JsonlWriter):
+        logger.info(f"Streaming raw dataset: {self.raw_path} | chunksize={self.chunksize}")
+
+        # The reader keeps a running RangeIndex across batches, so the
+        # document ids written by JsonlWriter match the in-memory run.
+        # Values are read as strings: per-batch dtype inference could
+        # otherwise render the same column differently from batch to batch
+        # (e.g. "2001" vs "2001.0" when a batch happens to contain NaN).
+        total = 0
+        with pd.read_csv(self.raw_path, chunksize=self.chunksize, dtype=str) as reader:
+            for batch_idx, batch in enumerate(reader):
+                batch_clean = cleaner.clean(batch)
+                writer.build(batch_clean, append=batch_idx > 0)
+                total += len(batch_clean)
+
+        if total == 0:
+            # Still produce an (empty) output file, as the in-memory run does.
+            writer.build(pd.DataFrame(columns=CLEANING_CONFIG["columns"]))
+
+        logger.info(f"Streamed {total} rows")
@@ -1,7 +1,9 @@
-import json
 import pathlib
+from json.encoder import encode_basestring
 import pandas as pd
-from typing import Any
+
+from backend.infra.arrow_artifacts import TableWriter, artifact_path, docs_schema
+from backend.infra.jsonl_store import JsonlIndexWriter
 
 import logging
 
@@ -13,76 +15,177 @@ class JsonlWriter:
     JSON Lines (.jsonl) documents suitable for downstream use in
     Retrieval-Augmented Generation (RAG) pipelines.
 
-    It separates the main text content from metadata fields, fills missing 
-    values with a fallback string (`fill_text`), and writes each record as 
+    It separates the main text content from metadata fields, fills missing
+    values with a fallback string (`fill_text`), and writes each record as
     a JSON object containing both "text" and "metadata" fields.
+
+    Serialization is done in bulk: fields are filled and normalized one
+    column at a time, JSON-encoded per column, and the resulting lines are
+    written in batches of `batch_size` rows.
+
+    Every write also records the offsets of its lines for the sidecar index
+    of the output file (see JsonlStore), so documents can later be read by
+    id without loading the file. The index is completed by `close()`, once
+    the last batch is written.
+
+    With `artifact_format` "arrow" or "parquet", the same documents are
+    written as a columnar table instead (id, text, one string column per
+    metadata field) next to `output_path` (docs.jsonl -> docs.arrow). The
+    table writer likewise stays open across appended batches.
     """
-    def __init__(self, 
-                 output_path: pathlib.Path, 
-                 columns: list[str], 
+    def __init__(self,
+                 output_path: pathlib.Path,
+                 columns: list[str],
                  fill_text: str = "Not specified",
-                 text_column: str = "Plot"):
-        self.output_path = output_path
+                 text_column: str = "Plot",
+                 batch_size: int = 5000,
+                 artifact_format: str = "jsonl"):
+        self.artifact_format = artifact_format
+        self.output_path = artifact_path(output_path, artifact_format)
         self.columns = columns
         self.fill_text = fill_text
         self.text_column = text_column
+        self.batch_size = batch_size
+        self._table_writer: TableWriter | None = None
+        self._index_writer: JsonlIndexWriter | None = None
 
-    def _fill(self, val: Any) -> str:
+    def _stringify(self, df: pd.DataFrame, col: str) -> pd.Series:
         """
-        Fills missing values and normalizes metadata fields.
+        Converts a column to stripped strings, replacing missing (None) and
+        empty values with `fill_text`.
 
-        Metadata fields should not contain line breaks, since they are used
-        for filtering, display and indexing. Any newline variants are
-        converted into a single-line, comma-separated format.
+        Only `None` counts as missing; any other value is rendered with str(),
+        so e.g. a nullable integer NA is written as "<NA>".
         """
-        if val is None:
-            return self.fill_text
+        if col not in df:
+            return pd.Series(self.fill_text, index=df.index, dtype=object)
 
-        s = str(val).strip()
-        if not s:
-            return self.fill_text
+        values = df[col].astype(object)
+        is_none = values.map(lambda v: v is None).astype(bool)
 
-        # Normalize newlines in metadata
-        s = s.replace("\r\n", ", ").replace("\r", ", ").replace("\n", ", ")
+        s = values.astype(str).str.strip()
+        return s.mask(is_none | (s == ""), self.fill_text)
 
-        return s
+    def _fill_column(self, df: pd.DataFrame, col: str) -> pd.Series:
+        """
+        Fills missing values and normalizes a metadata column.
 
-    def _normalize_text(self, text: Any) -> str:
+        Metadata fields should not contain line breaks, since they are used
+        for filtering, display and indexing. Any newline variants are
+        converted into a single-line, comma-separated format.
         """
-        Normalizes newline characters in the main text field.
+        return (
+            self._stringify(df, col)
+            .str.replace("\r\n", ", ", regex=False)
+            .str.replace("\r", ", ", regex=False)
+            .str.replace("\n", ", ", regex=False)
+        )
+
+    def _normalize_text_column(self, df: pd.DataFrame) -> pd.Series:
+        """
+        Normalizes newline characters in the main text column.
 
         The plot text may contain Windows-style CRLF line endings originating
         from the source CSV. Since downstream chunking assumes Unix-style
         newlines (LF), CRLF is normalized to LF while preserving paragraph
         structure.
         """
-        if text is None:
-            return self.fill_text
+        return (
+            self._stringify(df, self.text_column)
+            .str.replace("\r\n", "\n", regex=False)
+            .str.replace("\r", "\n", regex=False)
+        )
+
+    @staticmethod
+    def _encode(values) -> list[str]:
+        # Same string escaping json.dumps applies with ensure_ascii=False
+        return [encode_basestring(v) for v in values]
+
+    def build(self, df: pd.DataFrame, append: bool = False):
+        """
+        Writes the DataFrame rows as JSONL documents.
 
-        s = str(text).strip()
-        if not s:
-            return self.fill_text
+        The DataFrame index is used as the document "id". When `append` is
+        True, documents are added to the end of an existing file instead of
+        overwriting it, which allows the ETL to write the output in batches.
 
-        return s.replace("\r\n", "\n").replace("\r", "\n")
+        Each line is assembled from per-column JSON encodings and matches
+        `json.dumps({"id", "text", "metadata"}, ensure_ascii=False)` byte
+        for byte. Lines are written as UTF-8 bytes so the recorded offsets
+        are exact on every platform.
+        """
+        meta_columns = list(dict.fromkeys(k for k in self.columns if k != self.text_column))
 
+        if self.artifact_format != "jsonl":
+            self._build_table(df, meta_columns, append)
+            return
 
-    def build(self, df: pd.DataFrame):
-        logger.info(f"Writing {len(df)} documents to JSONL")
-        with self.output_path.open("w", encoding="utf-8") as f:
-            for i, row in df.iterrows():
-                meta = {
-                    k: self._fill(row.get(k)) 
-                    for k in self.columns 
-                    if k != self.text_column
-                }
-                text = self._normalize_text(row.get(self.text_column))
-                f.write(
-                    json.dumps(
-                        {
-                            "id": str(i), 
-                            "text": text, 
-                            "metadata": meta
-                        },
-                        ensure_ascii=False
-                    ) + "\n"
+        logger.info(f"Writing {len(df)} documents to JSONL (append={append})")
+
+        ids = self._encode(str(i) for i in df.index)
+        texts = self._encode(self._normalize_text_column(df))
+        meta_values = [self._encode(self._fill_column(df, k)) for k in meta_columns]
+        meta_keys = self._encode(meta_columns)
+
+        start_offset = (
+            self.output_path.stat().st_size if append and self.output_path.exists() else 0
+        )
+        if not append and self._index_writer is not None:
+            self._index_writer.abort()
+            self._index_writer = None
+        if self._index_writer is None:
+            self._index_writer = JsonlIndexWriter(self.output_path, "id", start=start_offset)
+
+        with self.output_path.open("ab" if append else "wb") as f:
+            for start in range(0, len(df), self.batch_size):
+                end = start + self.batch_size
+                lines = []
+                for row_id, text, *meta in zip(
+                    ids[start:end],
+                    texts[start:end],
+                    *(col[start:end] for col in meta_values)
+                ):
+                    meta_json = ", ".join(f"{k}: {v}" for k, v in zip(meta_keys, meta))
+                    lines.append(
+                        f'{{"id": {row_id}, "text": {text}, "metadata": {{{meta_json}}}}}\n'
+                        .encode("utf-8")
+                    )
+                f.write(b"".join(lines))
+                self._index_writer.add(
+                    [str(i) for i in df.index[start:end]], [len(line) for line in lines]
                 )
+
+    def _build_table(self, df: pd.DataFrame, meta_columns: list[str], append: bool):
+        logger.info(
+            f"Writing {len(df)} documents to {self.artifact_format} table (append={append})"
+        )
+
+        if not append:
+            self.close()
+            self._table_writer = TableWriter(self.output_path, docs_schema(meta_columns))
+        elif self._table_writer is None:
+            raise ValueError(
+                f"Cannot append to {self.output_path}: tables are appended through "
+                "the writer that created them"
+            )
+
+        for start in range(0, len(df), self.batch_size):
+            batch = df.iloc[start:start + self.batch_size]
+            self._table_writer.write(
+                {
+                    "id": [str(i) for i in batch.index],
+                    "text": self._normalize_text_column(batch).tolist(),
+                    **{k: self._fill_column(batch, k).tolist() for k in meta_columns},
+                }
+            )
+
+    def close(self):
+        """
+        Finalizes the offset index or the columnar table being written.
+        """
+        if self._index_writer is not None:
+            self._index_writer.finalize()
+            self._index_writer = None
+        if self._table_writer is not None:
+            self._table_writer.close()
+            self._table_writer = None
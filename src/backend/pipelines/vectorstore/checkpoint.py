@@ -0,0 +1,49 @@
+import json
+import os
+from pathlib import Path
+from typing import Dict
+
+import logging
+
+logger = logging.getLogger("VECTORSTORE_CHECKPOINT")
+
+
+class BuildCheckpoint:
+    """
+    Append-only record of the chunks already committed to the collection.
+
+    After each batch is persisted, one JSON line mapping its chunk_ids to
+    their content hashes is appended and flushed to disk. A rerun loads the
+    file and skips every chunk whose id and hash were already committed,
+    so an interrupted build resumes without re-embedding. A truncated last
+    line (crash mid-write) is ignored.
+    """
+    def __init__(self, path: Path):
+        self.path = Path(path)
+
+    def load(self) -> Dict[str, str]:
+        committed: Dict[str, str] = {}
+        if not self.path.exists():
+            return committed
+
+        with self.path.open("r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    committed.update(json.loads(line)["chunks"])
+                except (json.JSONDecodeError, KeyError):
+                    logger.warning("Ignoring incomplete checkpoint line in %s", self.path)
+
+        logger.info("Loaded checkpoint with %s committed chunks: %s", len(committed), self.path)
+        return committed
+
+    def record(self, chunks: Dict[str, str]) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.path.open("a", encoding="utf-8") as f:
+            f.write(json.dumps({"chunks": chunks}, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def clear(self) -> None:
+        if self.path.exists():
+            self.path.unlink()
+            logger.info("Build completed, checkpoint removed: %s", self.path)
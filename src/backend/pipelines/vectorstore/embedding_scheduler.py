@@ -0,0 +1,189 @@
+import asyncio
+import random
+import time
+from typing import Awaitable, Callable, List
+
+import tiktoken
+from langchain_core.embeddings import Embeddings
+
+import logging
+
+logger = logging.getLogger("VECTORSTORE_SCHEDULER")
+
+
+# Awaited with (batch indices, vectors) once a batch has been embedded;
+# blocking work (e.g. writing the batch) belongs in a worker thread
+BatchCallback = Callable[[List[int], List[List[float]]], Awaitable[None]]
+
+
+def is_rate_limit_error(error: BaseException) -> bool:
+    """
+    Detects 429-style errors without depending on a specific client library
+    (openai.RateLimitError exposes `status_code == 429`).
+    """
+    if getattr(error, "status_code", None) == 429:
+        return True
+    return "ratelimit" in type(error).__name__.lower()
+
+
+class _AdaptiveLimiter:
+    """
+    Concurrency limiter with additive increase / multiplicative decrease.
+
+    The limit is halved on every rate-limit error and grows back by one
+    after `limit` consecutive successes, never exceeding `max_limit`.
+    """
+    def __init__(self, max_limit: int):
+        self.max_limit = max_limit
+        self.limit = max_limit
+        self.in_flight = 0
+        self._successes = 0
+        self._cond = asyncio.Condition()
+
+    async def acquire(self):
+        async with self._cond:
+            await self._cond.wait_for(lambda: self.in_flight < self.limit)
+            self.in_flight += 1
+
+    async def release(self):
+        async with self._cond:
+            self.in_flight -= 1
+            self._cond.notify_all()
+
+    def on_success(self):
+        self._successes += 1
+        if self.limit < self.max_limit and self._successes >= self.limit:
+            self.limit += 1
+            self._successes = 0
+            logger.debug("Concurrency increased to %s", self.limit)
+
+    def on_rate_limit(self):
+        self.limit = max(1, self.limit // 2)
+        self._successes = 0
+        logger.warning("Rate limited | concurrency reduced to %s", self.limit)
+
+
+class EmbeddingScheduler:
+    """
+    Embeds texts in token-budgeted batches with bounded, adaptive concurrency.
+
+    Texts are grouped into batches that stay under `max_batch_tokens` tokens
+    and `max_batch_size` items. Batches are sent as concurrent asyncio
+    requests; concurrency is reduced on 429-style errors and recovered
+    gradually on success. Failed batches are retried with exponential
+    backoff, and each completed batch is handed to a callback right away so
+    progress is persisted as the run advances.
+    """
+    def __init__(
+        self,
+        embedding_function: Embeddings,
+        model_name: str,
+        max_batch_tokens: int = 100_000,
+        max_batch_size: int = 1000,
+        max_concurrency: int = 4,
+        max_retries: int = 6,
+        base_backoff: float = 1.0,
+    ):
+        self.embedding_function = embedding_function
+        self.max_batch_tokens = max_batch_tokens
+        self.max_batch_size = max_batch_size
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+
+        try:
+            self.encoding = tiktoken.encoding_for_model(model_name)
+        except KeyError:
+            self.encoding = tiktoken.get_encoding("cl100k_base")
+
+    def make_batches(self, texts: List[str]) -> List[List[int]]:
+        """
+        Groups text indices into batches bounded by token count and size.
+        A single text above the token budget gets a batch of its own.
+        """
+        batches: List[List[int]] = []
+        current: List[int] = []
+        current_tokens = 0
+
+        for idx, text in enumerate(texts):
+            n_tokens = len(self.encoding.encode_ordinary(text))
+            if current and (
+                current_tokens + n_tokens > self.max_batch_tokens
+                or len(current) >= self.max_batch_size
+            ):
+                batches.append(current)
+                current, current_tokens = [], 0
+
+            current.append(idx)
+            current_tokens += n_tokens
+
+        if current:
+            batches.append(current)
+
+        return batches
+
+    async def run(
+        self,
+        texts: List[str],
+        batches: List[List[int]],
+        on_batch: BatchCallback,
+    ) -> None:
+        limiter = _AdaptiveLimiter(self.max_concurrency)
+        started = time.perf_counter()
+        done = 0
+
+        async def process(batch: List[int]):
+            nonlocal done
+            vectors = await self._embed_with_retry(
+                [texts[i] for i in batch], limiter
+            )
+            await on_batch(batch, vectors)
+            done += 1
+            logger.info(
+                "Embedded batch %s/%s | size=%s | concurrency=%s | elapsed=%.1fs",
+                done,
+                len(batches),
+                len(batch),
+                limiter.limit,
+                time.perf_counter() - started,
+            )
+
+        logger.info(
+            "Scheduling %s texts in %s batches | max_concurrency=%s | max_batch_tokens=%s",
+            len(texts),
+            len(batches),
+            self.max_concurrency,
+            self.max_batch_tokens,
+        )
+
+        async with asyncio.TaskGroup() as group:
+            for batch in batches:
+                group.create_task(process(batch))
+
+    async def _embed_with_retry(
+        self, batch_texts: List[str], limiter: _AdaptiveLimiter
+    ) -> List[List[float]]:
+        for attempt in range(self.max_retries + 1):
+            await limiter.acquire()
+            try:
+                vectors = await self.embedding_function.aembed_documents(batch_texts)
+            except Exception as e:
+                if attempt == self.max_retries:
+                    raise
+                if is_rate_limit_error(e):
+                    limiter.on_rate_limit()
+                delay = self.base_backoff * (2 ** attempt) * (1 + random.random())
+                logger.warning(
+                    "Embedding batch failed (attempt %s/%s): %s | retrying in %.1fs",
+                    attempt + 1,
+                    self.max_retries + 1,
+                    e,
+                    delay,
+                )
+            else:
+                limiter.on_success()
+                return vectors
+            finally:
+                await limiter.release()
+
+            await asyncio.sleep(delay)
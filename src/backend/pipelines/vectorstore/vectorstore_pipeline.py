@@ -1,46 +1,169 @@
+import asyncio
+import hashlib
 import json
 from  pathlib import Path
+from typing import Any, Callable, Dict, List, Sequence, Tuple
 
+import numpy as np
 from langchain_chroma import Chroma
-from langchain_openai import OpenAIEmbeddings
 from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
 
 from backend.config.settings import (
+    ARTIFACT_CONFIG,
     EMBEDDING_CONFIG,
     VECTORSTORE_CONFIG
 )
+from backend.infra import arrow_artifacts
+from backend.infra.embedding_cache import CachedEmbeddings
+from backend.infra.embeddings import build_embedding_function
+from backend.infra.film_metadata import FilmMetadataTable
+from backend.infra.local_index import LocalVectorIndex
+from backend.infra.metadata_index import MetadataIndex
+from backend.infra.sparse_index import BM25Index
+from backend.pipelines.vectorstore.checkpoint import BuildCheckpoint
+from backend.pipelines.vectorstore.embedding_scheduler import EmbeddingScheduler
+from backend.utils.async_utils import run_sync
 
 import logging
 
 logger = logging.getLogger("VECTORSTORE")
 
+# Called with the indices of a batch once it is persisted in the collection
+CommitCallback = Callable[[List[int]], None]
+
+
+class _PrecomputedEmbeddings(Embeddings):
+    """
+    Serves the vectors of the batch being written, so batches embedded by
+    the EmbeddingScheduler go through Chroma.add_texts without being
+    embedded a second time. Holds one batch: use from a single writer.
+    """
+    def __init__(self):
+        self.vectors: List[List[float]] = []
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if len(texts) != len(self.vectors):
+            raise ValueError(
+                f"Expected {len(self.vectors)} texts for the precomputed batch, got {len(texts)}"
+            )
+        return self.vectors
+
+    def embed_query(self, text: str) -> List[float]:
+        raise NotImplementedError("Precomputed embeddings only serve document batches")
+
 
 class VectorStorePipeline:
     """
     Builds a ChromaDB vector store from preprocessed text chunks.
 
-    The pipeline loads chunked documents from JSONL files, generates 
-    embeddings using OpenAIEmbeddings (text-embedding-3-small), and 
+    The pipeline loads chunked documents from JSONL files, generates
+    embeddings using OpenAIEmbeddings (text-embedding-3-small), and
     persists the resulting vectors locally.
+
+    In incremental mode, each record stores a content hash (text, metadata
+    and embedding model). On later runs only new or changed chunks are
+    embedded and upserted, and chunks no longer present in the input are
+    deleted from the collection.
+
+    In concurrent mode, embeddings are generated by the EmbeddingScheduler
+    (token-budgeted batches, bounded adaptive concurrency, retries) and each
+    batch is written to Chroma as soon as it completes.
+
+    With VECTORSTORE_BACKEND=local, the chunks are exported to a
+    LocalVectorIndex instead of a Chroma collection. The index is always
+    rebuilt as a whole; enable the embedding cache to avoid re-embedding
+    unchanged chunks.
+
+    With VECTORSTORE_METADATA_INDEX=true, a MetadataIndex over the chunk
+    metadata is rebuilt after the vectors for filtered retrieval, and with
+    VECTORSTORE_SPARSE_INDEX=true a BM25Index for hybrid retrieval.
+
+    With VECTORSTORE_NORMALIZE_METADATA=true, film metadata is written once
+    per film to a FilmMetadataTable and the stored records only keep the
+    chunk fields and the filterable film fields.
+
+    With ARTIFACT_FORMAT=arrow/parquet, chunks are read from the columnar
+    chunk table and joined with their film metadata by doc_id.
     """
+    HASH_KEY = "content_hash"
+
     def __init__(self, input_path: Path):
-        self.input_path = input_path
+        self.artifact_format = ARTIFACT_CONFIG.get("format", "jsonl")
+        self.input_path = arrow_artifacts.artifact_path(input_path, self.artifact_format)
         self.model_name = EMBEDDING_CONFIG["embedding_model"]
         self.persist_dir = VECTORSTORE_CONFIG["persist_dir"]
         self.collection_name = VECTORSTORE_CONFIG["collection_name"]
-        self.embedding_function = OpenAIEmbeddings(model=self.model_name)
+        self.incremental = VECTORSTORE_CONFIG.get("incremental", False)
+        self.batch_size = VECTORSTORE_CONFIG.get("batch_size", 1000)
+        self.concurrent = VECTORSTORE_CONFIG.get("concurrent", False)
+        self.checkpoint = VECTORSTORE_CONFIG.get("checkpoint", False)
+        self.backend = VECTORSTORE_CONFIG.get("backend", "chroma")
+        self.local_index_dir = VECTORSTORE_CONFIG.get("local_index_dir")
+        self.metadata_index = VECTORSTORE_CONFIG.get("metadata_index", False)
+        self.sparse_index = VECTORSTORE_CONFIG.get("sparse_index", False)
+        self.normalize_metadata = VECTORSTORE_CONFIG.get("normalize_metadata", False)
+        self.embedding_function = build_embedding_function()
 
     def run(self):
 
         logger.info(f"Reading chunks: {self.input_path}")
 
-        with open(self.input_path, "r", encoding="utf-8") as f:
-            chunks = [json.loads(line) for line in f]
+        if self.artifact_format != "jsonl":
+            chunks = arrow_artifacts.read_chunks(self.input_path)
+        else:
+            with open(self.input_path, "r", encoding="utf-8") as f:
+                chunks = [json.loads(line) for line in f]
 
         logger.info(f"Total chunks: {len(chunks)}")
         logger.info(f"Embedding model: {self.model_name}")
-        logger.info(f"Persist directory: {self.persist_dir}")
+        logger.info(f"Backend: {self.backend}")
+        logger.info(f"Normalized metadata: {self.normalize_metadata}")
+
+        # The metadata and BM25 indexes below still read the full metadata
+        stored_chunks = chunks
+        if self.normalize_metadata:
+            FilmMetadataTable.build(Path(VECTORSTORE_CONFIG["film_metadata_dir"]), chunks)
+            stored_chunks = [
+                {**chunk, "metadata": FilmMetadataTable.stored_fields(chunk["metadata"])}
+                for chunk in chunks
+            ]
+
+        if self.backend == "local":
+            logger.info(f"Local index directory: {self.local_index_dir}")
+            self._run_local(stored_chunks)
+        elif self.backend == "chroma":
+            logger.info(f"Persist directory: {self.persist_dir}")
+            logger.info(
+                f"Incremental: {self.incremental} | Concurrent: {self.concurrent} "
+                f"| Checkpoint: {self.checkpoint}"
+            )
+
+            if self.incremental or self.concurrent or self.checkpoint:
+                self._run_batched(stored_chunks)
+            else:
+                self._run_full(stored_chunks)
+        else:
+            raise ValueError(f"Unknown vector store backend: {self.backend}")
+
+        if self.metadata_index:
+            MetadataIndex.build(
+                Path(VECTORSTORE_CONFIG["metadata_index_dir"]),
+                ids=[chunk["chunk_id"] for chunk in chunks],
+                metadatas=[chunk["metadata"] for chunk in chunks],
+            )
+
+        if self.sparse_index:
+            BM25Index.build(
+                Path(VECTORSTORE_CONFIG["sparse_index_dir"]),
+                ids=[chunk["chunk_id"] for chunk in chunks],
+                texts=[chunk["text"] for chunk in chunks],
+                metadatas=[chunk["metadata"] for chunk in chunks],
+            )
 
+        self._flush_cache()
+
+    def _run_full(self, chunks: Sequence[Dict[str, Any]]):
         documents = []
         ids = []
 
@@ -61,4 +184,254 @@ class VectorStorePipeline:
             ids=ids,
             collection_metadata={"hnsw:space": "cosine"}
         )
-        logger.info("Vectorstore created successfully!")
\ No newline at end of file
+        logger.info("Vectorstore created successfully!")
+
+    def _run_batched(self, chunks: Sequence[Dict[str, Any]]):
+        """
+        Writes chunks into the collection batch by batch, either serially or
+        through the concurrent embedding scheduler. In incremental mode only
+        new or changed chunks are written and removed chunks are deleted.
+
+        With checkpointing enabled, every committed batch is recorded in a
+        checkpoint file next to the collection, chunks recorded by a previous
+        interrupted run are skipped, and the file is removed on success.
+        """
+        vectordb = Chroma(
+            collection_name=self.collection_name,
+            embedding_function=self.embedding_function,
+            persist_directory=self.persist_dir,
+            collection_metadata={"hnsw:space": "cosine"}
+        )
+
+        if self.incremental:
+            documents, ids = self._plan_incremental(vectordb, chunks)
+            hashes = [doc.metadata[self.HASH_KEY] for doc in documents]
+        else:
+            documents = [
+                Document(page_content=chunk["text"], metadata=chunk["metadata"])
+                for chunk in chunks
+            ]
+            ids = [chunk["chunk_id"] for chunk in chunks]
+            hashes = [self._content_hash(chunk) for chunk in chunks]
+
+        checkpoint = None
+        if self.checkpoint:
+            checkpoint = BuildCheckpoint(
+                Path(self.persist_dir) / f"{self.collection_name}.checkpoint.jsonl"
+            )
+            committed = checkpoint.load()
+            pending = [
+                i for i, (chunk_id, content_hash) in enumerate(zip(ids, hashes))
+                if committed.get(chunk_id) != content_hash
+            ]
+            logger.info(
+                "Resuming from checkpoint | already committed=%s | remaining=%s",
+                len(ids) - len(pending),
+                len(pending),
+            )
+            documents = [documents[i] for i in pending]
+            ids = [ids[i] for i in pending]
+            hashes = [hashes[i] for i in pending]
+
+        def on_commit(batch: List[int]):
+            if checkpoint is not None:
+                checkpoint.record({ids[i]: hashes[i] for i in batch})
+
+        if self.concurrent:
+            self._upsert_concurrent(documents, ids, on_commit)
+        else:
+            self._upsert_serial(vectordb, documents, ids, on_commit)
+
+        if checkpoint is not None:
+            checkpoint.clear()
+
+        logger.info("Vectorstore updated successfully!")
+
+    def _run_local(self, chunks: Sequence[Dict[str, Any]]):
+        """
+        Embeds every chunk (serially in batches or through the concurrent
+        scheduler) into a preallocated float32 matrix and writes the local
+        index.
+        """
+        texts = [chunk["text"] for chunk in chunks]
+        vectors: np.ndarray | None = None
+
+        def store(batch: List[int], batch_vectors: List[List[float]]):
+            nonlocal vectors
+            if vectors is None:
+                vectors = np.zeros((len(texts), len(batch_vectors[0])), dtype=np.float32)
+            vectors[batch] = batch_vectors
+
+        if self.concurrent:
+            async def on_batch(batch: List[int], batch_vectors: List[List[float]]):
+                store(batch, batch_vectors)
+
+            scheduler = self._build_scheduler()
+            run_sync(scheduler.run(texts, scheduler.make_batches(texts), on_batch))
+        else:
+            for start in range(0, len(texts), self.batch_size):
+                end = min(start + self.batch_size, len(texts))
+                store(
+                    list(range(start, end)),
+                    self.embedding_function.embed_documents(texts[start:end]),
+                )
+                logger.debug(f"Embedded {end}/{len(texts)} chunks")
+
+        LocalVectorIndex.build(
+            Path(self.local_index_dir),
+            ids=[chunk["chunk_id"] for chunk in chunks],
+            texts=texts,
+            metadatas=[chunk["metadata"] for chunk in chunks],
+            vectors=vectors if vectors is not None else np.zeros((0, 0), dtype=np.float32),
+            embedding_model=self.model_name,
+            quantization=VECTORSTORE_CONFIG.get("quantization", "none"),
+            truncate_dim=VECTORSTORE_CONFIG.get("truncate_dim", 0),
+            rescore_factor=VECTORSTORE_CONFIG.get("rescore_factor", 4),
+        )
+        logger.info("Local vector index created successfully!")
+
+    def _plan_incremental(
+        self, vectordb: Chroma, chunks: Sequence[Dict[str, Any]]
+    ) -> Tuple[List[Document], List[str]]:
+        """
+        Deletes records whose chunk_id is gone and returns the documents
+        (with their content hash) that are new or changed.
+        """
+        existing = self._load_existing_hashes(vectordb)
+        logger.info(f"Existing records in collection: {len(existing)}")
+
+        documents = []
+        ids = []
+        for chunk in chunks:
+            content_hash = self._content_hash(chunk)
+            if existing.get(chunk["chunk_id"]) == content_hash:
+                continue
+
+            documents.append(
+                Document(
+                    page_content=chunk["text"],
+                    metadata={**chunk["metadata"], self.HASH_KEY: content_hash}
+                )
+            )
+            ids.append(chunk["chunk_id"])
+
+        current_ids = {chunk["chunk_id"] for chunk in chunks}
+        stale_ids = [chunk_id for chunk_id in existing if chunk_id not in current_ids]
+
+        logger.info(
+            "Incremental plan | upsert=%s | delete=%s | unchanged=%s",
+            len(ids),
+            len(stale_ids),
+            len(chunks) - len(ids),
+        )
+
+        for start in range(0, len(stale_ids), self.batch_size):
+            vectordb.delete(ids=stale_ids[start:start + self.batch_size])
+
+        return documents, ids
+
+    def _upsert_serial(
+        self,
+        vectordb: Chroma,
+        documents: List[Document],
+        ids: List[str],
+        on_commit: CommitCallback,
+    ):
+        for start in range(0, len(ids), self.batch_size):
+            end = min(start + self.batch_size, len(ids))
+            vectordb.add_documents(documents[start:end], ids=ids[start:end])
+            on_commit(list(range(start, end)))
+            logger.debug(f"Upserted {end}/{len(ids)} chunks")
+
+    def _upsert_concurrent(
+        self,
+        documents: List[Document],
+        ids: List[str],
+        on_commit: CommitCallback,
+    ):
+        """
+        Embeds documents through the EmbeddingScheduler and upserts each
+        batch with its precomputed vectors as soon as it completes.
+
+        Writes run in a worker thread, one batch at a time, so the event
+        loop keeps scheduling embedding requests while Chroma persists.
+        """
+        scheduler = self._build_scheduler()
+        texts = [doc.page_content for doc in documents]
+        batches = scheduler.make_batches(texts)
+
+        precomputed = _PrecomputedEmbeddings()
+        writer = Chroma(
+            collection_name=self.collection_name,
+            embedding_function=precomputed,
+            persist_directory=self.persist_dir,
+            collection_metadata={"hnsw:space": "cosine"}
+        )
+        write_lock = asyncio.Lock()
+
+        def write(batch: List[int], vectors: List[List[float]]):
+            precomputed.vectors = vectors
+            writer.add_texts(
+                [texts[i] for i in batch],
+                metadatas=[documents[i].metadata for i in batch],
+                ids=[ids[i] for i in batch],
+            )
+            on_commit(batch)
+
+        async def on_batch(batch: List[int], vectors: List[List[float]]):
+            # The checkpoint record runs in the worker thread with its write,
+            # so a write already started when a failing batch cancels the
+            # run is still recorded
+            async with write_lock:
+                await asyncio.to_thread(write, batch, vectors)
+
+        run_sync(scheduler.run(texts, batches, on_batch))
+
+    def _build_scheduler(self) -> EmbeddingScheduler:
+        return EmbeddingScheduler(
+            embedding_function=self.embedding_function,
+            model_name=self.model_name,
+            max_batch_tokens=VECTORSTORE_CONFIG.get("max_batch_tokens", 100_000),
+            max_batch_size=self.batch_size,
+            max_concurrency=VECTORSTORE_CONFIG.get("max_concurrency", 4),
+            max_retries=VECTORSTORE_CONFIG.get("max_retries", 6),
+        )
+
+    def _flush_cache(self):
+        if isinstance(self.embedding_function, CachedEmbeddings):
+            self.embedding_function.flush()
+            self.embedding_function.log_stats()
+
+    def _content_hash(self, chunk: Dict[str, Any]) -> str:
+        """
+        Hashes everything that determines a stored record: the chunk text,
+        its metadata and the embedding model used to embed it.
+        """
+        payload = json.dumps(
+            {
+                "text": chunk["text"],
+                "metadata": chunk["metadata"],
+                "embedding_model": self.model_name,
+            },
+            ensure_ascii=False,
+            sort_keys=True,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _load_existing_hashes(self, vectordb: Chroma) -> Dict[str, str | None]:
+        """
+        Returns chunk_id -> stored content hash for every record in the
+        collection. Records written without a hash map to None, so they are
+        re-embedded once.
+        """
+        existing: Dict[str, str | None] = {}
+        offset = 0
+        while True:
+            page = vectordb.get(include=["metadatas"], limit=self.batch_size, offset=offset)
+            page_ids = page["ids"]
+            if not page_ids:
+                break
+            for chunk_id, md in zip(page_ids, page["metadatas"]):
+                existing[chunk_id] = (md or {}).get(self.HASH_KEY)
+            offset += len(page_ids)
+        return existing
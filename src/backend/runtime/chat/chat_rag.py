@@ -1,10 +1,17 @@
+import asyncio
 import logging
-from typing import List, Dict, Any
+import time
+from typing import List, Dict, Any, Iterator
 from langchain_core.documents import Document
 
 from backend.runtime.retrieval.retriever import Retriever
+from backend.infra.metadata_index import MetadataFilters
+from backend.runtime.retrieval.overlap_dedup import OverlapDeduplicator
+from backend.runtime.retrieval.reranker import Reranker, build_scorer
 from backend.infra.llm_client import LLMClient
 from backend.runtime.chat.prompt_builder import PromptBuilder
+from backend.runtime.chat.context_packer import ContextPacker
+from backend.config.settings import CHUNKING_CONFIG, CONTEXT_CONFIG, LLM_CONFIG, RETRIEVER_CONFIG
 
 
 logger = logging.getLogger("CHAT_RAG")
@@ -16,6 +23,21 @@ class ChatRAG:
     Notes:
     - The retriever returns *chunks* stored as LangChain Documents in Chroma.
     - This class formats retrieved chunks and calls the LLM.
+    - With a ContextPacker (CONTEXT_PACKING=true), adjacent chunks of the same
+      film are stitched and the context is kept within a token budget.
+    - With an OverlapDeduplicator (RETRIEVER_DEDUP_OVERLAP=true), overlapping
+      chunks are stitched right after retrieval and the freed slots are
+      filled with chunks of other films.
+    - With a Reranker (RETRIEVER_RERANK=true), more candidates are retrieved
+      and re-ranked by a local scorer, and only the best ones reach the
+      prompt. Deduplication, when enabled, runs on the re-ranked chunks.
+    - With a semantic answer cache (ANSWER_CACHE_SEMANTIC_ENABLED=true), a
+      question close enough to one already answered is served from the cache
+      without retrieval or generation. Cached answers are scoped by embedding
+      model and prompt template, and dropped when the vector store changes.
+    - `filters` (e.g. {"Genre": "horror", "Release Year": "1990s"}) restrict
+      retrieval to films with matching metadata; filtered questions bypass
+      the semantic answer cache.
     """
 
     def __init__(
@@ -23,16 +45,54 @@ class ChatRAG:
         retriever: Retriever,
         llm_client: LLMClient,
         prompt_builder: PromptBuilder,
+        context_packer: ContextPacker | None = None,
+        deduplicator: OverlapDeduplicator | None = None,
+        reranker: Reranker | None = None,
     ):
         self.retriever = retriever
         self.llm_client = llm_client
         self.prompt_builder = prompt_builder
 
+        if context_packer is None and CONTEXT_CONFIG.get("packing", False):
+            context_packer = ContextPacker(
+                token_budget=CONTEXT_CONFIG["token_budget"],
+                model_name=LLM_CONFIG["model"],
+                max_overlap=CHUNKING_CONFIG["chunk_overlap"],
+            )
+        self.context_packer = context_packer
+
+        if reranker is None and RETRIEVER_CONFIG.get("rerank", False):
+            reranker = Reranker(
+                retriever=retriever,
+                scorer=build_scorer(
+                    RETRIEVER_CONFIG["rerank_scorer"], RETRIEVER_CONFIG["rerank_model"]
+                ),
+                top_k=RETRIEVER_CONFIG["rerank_top_k"],
+                candidates=RETRIEVER_CONFIG["rerank_candidates"],
+                batch_size=RETRIEVER_CONFIG["rerank_batch_size"],
+                budget_ms=RETRIEVER_CONFIG["rerank_budget_ms"],
+                model_name=LLM_CONFIG["model"],
+            )
+        self.reranker = reranker
+
+        if deduplicator is None and RETRIEVER_CONFIG.get("dedup_overlap", False):
+            deduplicator = OverlapDeduplicator(
+                retriever=reranker or retriever,
+                max_overlap=CHUNKING_CONFIG["chunk_overlap"],
+                fetch_multiplier=RETRIEVER_CONFIG["dedup_fetch_multiplier"],
+            )
+        self.deduplicator = deduplicator
+
     
-    def run(self, question: str) -> Dict[str, Any]:
-        logger.info("ChatRAG started | question=%r", question)
+    def run(self, question: str, filters: MetadataFilters | None = None) -> Dict[str, Any]:
+        logger.info("ChatRAG started | question=%r | filters=%s", question, filters)
+
+        embedding = self._question_embedding(question, filters)
+        cached = self._cached_answer(embedding)
+        if cached is not None:
+            return {"question": question, "context": cached["context"], "answer": cached["answer"]}
 
-        chunks: List[Document] = self.retriever.retrieve(question)
+        chunks: List[Document] = self._retrieve(question, filters)
 
         context = self._build_context(chunks)
         prompt = self.prompt_builder.build(question=question, context=context)
@@ -40,6 +100,93 @@ class ChatRAG:
         self._log_context_stats(chunks, context)
 
         answer = self.llm_client.generate(prompt)
+        self._cache_answer(question, embedding, chunks, context, answer)
+
+        return {
+            "question": question,
+            "context": context,
+            "answer": answer,
+        }
+
+    def run_stream(
+        self, question: str, filters: MetadataFilters | None = None
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Streaming version of `run`.
+
+        Yields a single "context" event with the retrieved context and the
+        metadata of each retrieved chunk, followed by one "token" event per
+        answer token as it arrives from the LLM. End-to-end time-to-first-token
+        (retrieval included) and total latency are logged separately.
+        """
+        logger.info("ChatRAG (stream) started | question=%r | filters=%s", question, filters)
+        started = time.perf_counter()
+
+        embedding = self._question_embedding(question, filters)
+        cached = self._cached_answer(embedding)
+        if cached is not None:
+            yield {
+                "type": "context",
+                "question": question,
+                "context": cached["context"],
+                "sources": cached.get("sources", []),
+            }
+            yield {"type": "token", "content": cached["answer"]}
+            return
+
+        chunks: List[Document] = self._retrieve(question, filters)
+
+        context = self._build_context(chunks)
+        prompt = self.prompt_builder.build(question=question, context=context)
+
+        self._log_context_stats(chunks, context)
+
+        yield {
+            "type": "context",
+            "question": question,
+            "context": context,
+            "sources": [dict(chunk.metadata or {}) for chunk in chunks],
+        }
+
+        first_token_at = None
+        tokens = []
+        for token in self.llm_client.stream(prompt):
+            if first_token_at is None:
+                first_token_at = time.perf_counter()
+            tokens.append(token)
+            yield {"type": "token", "content": token}
+
+        self._cache_answer(question, embedding, chunks, context, "".join(tokens))
+
+        logger.info(
+            "ChatRAG stream finished | ttft=%s | total=%.3fs",
+            f"{first_token_at - started:.3f}s" if first_token_at is not None else "N/A",
+            time.perf_counter() - started,
+        )
+
+    async def arun(self, question: str, filters: MetadataFilters | None = None) -> Dict[str, Any]:
+        """
+        Async version of `run`: retrieval and generation never block the
+        event loop, so a single worker can serve many questions concurrently.
+        The semantic cache (SQLite) and collection version lookups run in a
+        worker thread.
+        """
+        logger.info("ChatRAG (async) started | question=%r | filters=%s", question, filters)
+
+        embedding = await self._aquestion_embedding(question, filters)
+        cached = await asyncio.to_thread(self._cached_answer, embedding)
+        if cached is not None:
+            return {"question": question, "context": cached["context"], "answer": cached["answer"]}
+
+        chunks: List[Document] = await self._aretrieve(question, filters)
+
+        context = self._build_context(chunks)
+        prompt = self.prompt_builder.build(question=question, context=context)
+
+        self._log_context_stats(chunks, context)
+
+        answer = await self.llm_client.agenerate(prompt)
+        await asyncio.to_thread(self._cache_answer, question, embedding, chunks, context, answer)
 
         return {
             "question": question,
@@ -47,6 +194,83 @@ class ChatRAG:
             "answer": answer,
         }
 
+    # Semantic answer cache
+
+    def _semantic_cache(self):
+        cache = getattr(self.llm_client, "answer_cache", None)
+        if cache is not None and cache.semantic_enabled:
+            return cache
+        return None
+
+    def _question_embedding(
+        self, question: str, filters: MetadataFilters | None
+    ) -> List[float] | None:
+        if self._semantic_cache() is None or filters:
+            return None
+        return self.retriever.embed_query(question)
+
+    async def _aquestion_embedding(
+        self, question: str, filters: MetadataFilters | None
+    ) -> List[float] | None:
+        if self._semantic_cache() is None or filters:
+            return None
+        return await self.retriever.aembed_query(question)
+
+    def _cached_answer(self, embedding: List[float] | None) -> Dict[str, Any] | None:
+        if embedding is None:
+            return None
+
+        hit = self._semantic_cache().get_similar(
+            embedding,
+            namespace=self._semantic_namespace(),
+            collection_version=self.retriever.collection_version(),
+        )
+        if hit is None:
+            return None
+
+        logger.info("Answer served from semantic cache | similarity=%.4f", hit["similarity"])
+        return hit
+
+    def _cache_answer(
+        self,
+        question: str,
+        embedding: List[float] | None,
+        chunks: List[Document],
+        context: str,
+        answer: str,
+    ) -> None:
+        if embedding is None or not answer:
+            return
+        self._semantic_cache().put_similar(
+            question,
+            embedding,
+            {
+                "context": context,
+                "answer": answer,
+                "sources": [dict(chunk.metadata or {}) for chunk in chunks],
+            },
+            namespace=self._semantic_namespace(),
+            collection_version=self.retriever.collection_version(),
+        )
+
+    def _semantic_namespace(self) -> str:
+        # Cached answers depend on how questions are embedded and prompted
+        return f"{self.retriever.model_name}|{self.prompt_builder.template_hash}"
+
+    def _retrieve(self, question: str, filters: MetadataFilters | None) -> List[Document]:
+        if self.deduplicator is not None:
+            return self.deduplicator.retrieve(question, filters)
+        if self.reranker is not None:
+            return self.reranker.retrieve(question, filters=filters)
+        return self.retriever.retrieve(question, filters=filters)
+
+    async def _aretrieve(self, question: str, filters: MetadataFilters | None) -> List[Document]:
+        if self.deduplicator is not None:
+            return await self.deduplicator.aretrieve(question, filters)
+        if self.reranker is not None:
+            return await self.reranker.aretrieve(question, filters=filters)
+        return await self.retriever.aretrieve(question, filters=filters)
+
     def _build_context(self, chunks: List[Document]) -> str:
         if not chunks:
             return (
@@ -56,12 +280,15 @@ class ChatRAG:
 
         formatted_blocks = []
 
-        for idx, chunk in enumerate(chunks, start=1):
-            block = self._format_chunk_block(chunk)
-            if not block:
-                continue
+        if self.context_packer is not None:
+            formatted_blocks = self.context_packer.pack(chunks, self._format_chunk_block)
+        else:
+            for idx, chunk in enumerate(chunks, start=1):
+                block = self._format_chunk_block(chunk)
+                if not block:
+                    continue
 
-            formatted_blocks.append(block)
+                formatted_blocks.append(block)
 
         if not formatted_blocks:
             return (
@@ -0,0 +1,115 @@
+import logging
+from typing import Callable, List
+
+import tiktoken
+from langchain_core.documents import Document
+
+from backend.runtime.retrieval.overlap_dedup import stitch_chunks
+
+logger = logging.getLogger("CHAT_RAG_PACKER")
+
+
+class ContextPacker:
+    """
+    Packs retrieved chunks into a context that fits a token budget.
+
+    Adjacent chunks of the same film are stitched together first, so the
+    overlap shared by neighbouring chunks and their repeated metadata
+    headers are sent only once. Blocks are then added in rank order until
+    the budget, measured with the LLM's tokenizer, is exhausted; the last
+    block is truncated when enough budget remains for a useful excerpt.
+    """
+    MIN_TRUNCATED_TOKENS = 64
+    TRUNCATION_MARKER = " [...]"
+
+    def __init__(self, token_budget: int, model_name: str, max_overlap: int):
+        self.token_budget = token_budget
+        self.max_overlap = max_overlap
+        try:
+            self.encoding = tiktoken.encoding_for_model(model_name)
+        except KeyError:
+            self.encoding = tiktoken.get_encoding("o200k_base")
+
+    def count_tokens(self, text: str) -> int:
+        return len(self.encoding.encode_ordinary(text))
+
+    def pack(
+        self,
+        chunks: List[Document],
+        format_block: Callable[[Document], str],
+    ) -> List[str]:
+        """
+        Returns the formatted context blocks that fit within the budget.
+        """
+        naive_tokens = self.count_tokens(
+            "\n\n".join(block for block in map(format_block, chunks) if block)
+        )
+
+        stitched = stitch_chunks(chunks, self.max_overlap)
+
+        blocks: List[str] = []
+        used = 0
+        separator_tokens = self.count_tokens("\n\n")
+
+        for doc in stitched:
+            block = format_block(doc)
+            if not block:
+                continue
+
+            cost = self.count_tokens(block) + (separator_tokens if blocks else 0)
+            remaining = self.token_budget - used
+
+            if cost <= remaining:
+                blocks.append(block)
+                used += cost
+                continue
+
+            separator = separator_tokens if blocks else 0
+            truncated = self._truncate(doc, format_block, remaining - separator)
+            if truncated:
+                blocks.append(truncated)
+                used += self.count_tokens(truncated) + separator
+            break
+
+        saved = naive_tokens - used
+        logger.info(
+            "Context packing | chunks=%s -> blocks=%s | tokens naive=%s packed=%s "
+            "saved=%s (%.1f%%) | budget=%s",
+            len(chunks),
+            len(blocks),
+            naive_tokens,
+            used,
+            saved,
+            100 * saved / naive_tokens if naive_tokens else 0.0,
+            self.token_budget,
+        )
+        return blocks
+
+    def _truncate(
+        self,
+        doc: Document,
+        format_block: Callable[[Document], str],
+        remaining: int,
+    ) -> str:
+        """
+        Formats `doc` with its text cut down to fit `remaining` tokens (its
+        separator from the previous block already deducted), or returns ""
+        if not enough budget is left for a useful excerpt.
+        """
+        header_only = format_block(
+            Document(page_content=self.TRUNCATION_MARKER, metadata=doc.metadata)
+        )
+        text_budget = remaining - self.count_tokens(header_only)
+        if text_budget < self.MIN_TRUNCATED_TOKENS:
+            return ""
+
+        tokens = self.encoding.encode_ordinary(doc.page_content or "")
+        while text_budget >= self.MIN_TRUNCATED_TOKENS:
+            text = self.encoding.decode(tokens[:text_budget]).rstrip() + self.TRUNCATION_MARKER
+            block = format_block(Document(page_content=text, metadata=doc.metadata))
+            if self.count_tokens(block) <= remaining:
+                return block
+            # Re-tokenization at the cut can differ slightly; shave and retry.
+            text_budget -= 8
+
+        return ""
@@ -1,3 +1,5 @@
+import hashlib
+
 from backend.runtime.prompts.rag_movie_v1 import RAG_MOVIE_PROMPT_V1
 
 class PromptBuilder:
@@ -5,6 +7,10 @@ class PromptBuilder:
     Builds the final prompt for RAG by injecting the question and
     retrieved context into a versioned prompt template.
     """
+    @property
+    def template_hash(self) -> str:
+        return hashlib.sha256(RAG_MOVIE_PROMPT_V1.encode("utf-8")).hexdigest()[:16]
+
     def build(self, question: str, context: str) -> str:
         return RAG_MOVIE_PROMPT_V1.format(
             question=question,
@@ -0,0 +1,213 @@
+import logging
+from typing import Any, Dict, List, Tuple
+
+from langchain_core.documents import Document
+
+logger = logging.getLogger("RETRIEVER_DEDUP")
+
+
+def merge_overlap(left: str, right: str, max_overlap: int, min_overlap: int | None = None) -> str:
+    """
+    Concatenates two consecutive chunks, dropping the longest suffix of
+    `left` (up to `max_overlap` characters) that `right` starts with.
+
+    Only overlaps of at least `min_overlap` characters (default: half of
+    `max_overlap`) that start and end on word boundaries count, so a chance
+    match of a few characters never glues words together. Falls back to a
+    newline join when no such overlap is found.
+    """
+    if min_overlap is None:
+        min_overlap = max_overlap // 2
+    limit = min(len(left), len(right), max_overlap)
+    for size in range(limit, max(min_overlap, 1) - 1, -1):
+        if (
+            left.endswith(right[:size])
+            and _is_word_boundary(left, len(left) - size)
+            and _is_word_boundary(right, size)
+        ):
+            return left + right[size:]
+    return left + "\n" + right
+
+
+def _is_word_boundary(text: str, pos: int) -> bool:
+    return pos <= 0 or pos >= len(text) or text[pos - 1].isspace() or text[pos].isspace()
+
+
+def _text_span(chunk: Document) -> Tuple[int, int] | None:
+    """
+    Character span of the chunk text within its plot: the parent window
+    when the chunk was widened, else the chunk's own span. None when
+    unknown or inconsistent with the text.
+    """
+    md = chunk.metadata or {}
+    for start_key, end_key in (("window_start", "window_end"), ("char_start", "char_end")):
+        if md.get(start_key) is not None and md.get(end_key) is not None:
+            start, end = int(md[start_key]), int(md[end_key])
+            return (start, end) if end - start == len(chunk.page_content or "") else None
+    return None
+
+
+def _index_range(chunk: Document) -> Tuple[int, int]:
+    md = chunk.metadata
+    start = int(md["chunk_index"])
+    return start, int(md.get("chunk_index_end", start))
+
+
+def stitch_chunks(chunks: List[Document], max_overlap: int) -> List[Document]:
+    """
+    Merges retrieved chunks of the same document (`doc_id`) whose
+    `chunk_index` ranges are consecutive or overlap into a single Document
+    with the shared text removed: exactly, from the chunks' `char_start`/
+    `char_end` spans when they carry them, otherwise by `merge_overlap`.
+
+    Documents keep the rank of their best chunk; spans of the same document
+    are ordered by `chunk_index`. Already stitched spans (carrying
+    `chunk_index_end`) can be stitched again. Chunks without
+    `doc_id`/`chunk_index` are passed through unchanged.
+    """
+    groups: Dict[str, List[Document]] = {}
+    order: List[str | Document] = []
+
+    for chunk in chunks:
+        md = chunk.metadata or {}
+        doc_id = md.get("doc_id")
+        if doc_id is None or md.get("chunk_index") is None:
+            order.append(chunk)
+            continue
+        if doc_id not in groups:
+            groups[doc_id] = []
+            order.append(doc_id)
+        groups[doc_id].append(chunk)
+
+    stitched: List[Document] = []
+    for entry in order:
+        if isinstance(entry, Document):
+            stitched.append(entry)
+            continue
+
+        spans: List[List[Document]] = []
+        for chunk in sorted(groups[entry], key=_index_range):
+            start, end = _index_range(chunk)
+            if spans:
+                _, last_end = _index_range(spans[-1][-1])
+                if end <= last_end:
+                    continue  # already covered
+                if start <= last_end + 1:
+                    # Next chunk, or a span sharing chunks with this one
+                    spans[-1].append(chunk)
+                    continue
+            spans.append([chunk])
+
+        for span in spans:
+            stitched.append(_merge_span(span, max_overlap))
+
+    return stitched
+
+
+def _merge_span(span: List[Document], max_overlap: int) -> Document:
+    if len(span) == 1:
+        return span[0]
+
+    # Chunks carrying their position in the plot are stitched exactly on
+    # their character spans; the others by matching text
+    text = span[0].page_content or ""
+    text_span = _text_span(span[0])
+    index_end = _index_range(span[0])[1]
+    for chunk in span[1:]:
+        chunk_text = chunk.page_content or ""
+        chunk_span = _text_span(chunk)
+        chunk_start, chunk_end = _index_range(chunk)
+        if text_span is not None and chunk_span is not None:
+            overlap = text_span[1] - chunk_span[0]
+            if overlap >= 0:
+                text += chunk_text[overlap:]
+                text_span = (text_span[0], max(text_span[1], chunk_span[1]))
+            else:
+                # Gap between the chunks: the text is no longer one slice
+                text += "\n" + chunk_text
+                text_span = None
+        else:
+            # Shared chunks repeat more text than the chunking overlap
+            limit = len(chunk_text) if chunk_start <= index_end else max_overlap
+            text = merge_overlap(text, chunk_text, limit, min_overlap=max_overlap // 2)
+            text_span = None
+        index_end = max(index_end, chunk_end)
+
+    chunk_ids = list(dict.fromkeys(
+        chunk_id
+        for c in span
+        for chunk_id in c.metadata.get("chunk_ids", [c.metadata.get("chunk_id", "N/A")])
+    ))
+    metadata = {
+        **span[0].metadata,
+        "chunk_id": ", ".join(chunk_ids),
+        "chunk_ids": chunk_ids,
+        "chunk_index_end": _index_range(span[-1])[1],
+    }
+    if text_span is not None:
+        key = "window_end" if "window_start" in metadata else "char_end"
+        metadata[key] = text_span[1]
+    return Document(page_content=text, metadata=metadata)
+
+
+class OverlapDeduplicator:
+    """
+    Post-retrieval stage that removes overlap duplication between retrieved
+    chunks and spends the freed slots on additional films.
+
+    The retriever is asked for `fetch_multiplier * top_k` candidates. The
+    best `top_k` are stitched per film (consecutive `chunk_index` values of
+    the same `doc_id` become one span without the shared overlap); every
+    chunk absorbed by stitching frees a slot, which is filled with the next
+    best candidate from a film not yet in the context.
+    """
+    def __init__(self, retriever, max_overlap: int, fetch_multiplier: int = 2):
+        self.retriever = retriever
+        self.max_overlap = max_overlap
+        self.fetch_multiplier = max(1, fetch_multiplier)
+
+    def retrieve(self, question: str, filters: Dict[str, Any] | None = None) -> List[Document]:
+        k = self.retriever.top_k
+        candidates = self.retriever.retrieve(
+            question, top_k=k * self.fetch_multiplier, filters=filters
+        )
+        return self.process(candidates, k)
+
+    async def aretrieve(self, question: str, filters: Dict[str, Any] | None = None) -> List[Document]:
+        k = self.retriever.top_k
+        candidates = await self.retriever.aretrieve(
+            question, top_k=k * self.fetch_multiplier, filters=filters
+        )
+        return self.process(candidates, k)
+
+    def process(self, candidates: List[Document], k: int) -> List[Document]:
+        """
+        Stitches the top `k` ranked candidates and fills the freed slots
+        with the best remaining chunks of new films.
+        """
+        selected = candidates[:k]
+        stitched = stitch_chunks(selected, self.max_overlap)
+        freed = len(selected) - len(stitched)
+
+        seen_docs = {(c.metadata or {}).get("doc_id") for c in selected}
+        extra: List[Document] = []
+        for chunk in candidates[k:]:
+            if len(extra) >= freed:
+                break
+            doc_id = (chunk.metadata or {}).get("doc_id")
+            if doc_id in seen_docs:
+                continue
+            seen_docs.add(doc_id)
+            extra.append(chunk)
+
+        logger.info(
+            "Overlap dedup | candidates=%s | top_k=%s -> spans=%s | freed_slots=%s "
+            "| extra_films=%s | films=%s",
+            len(candidates),
+            len(selected),
+            len(stitched),
+            freed,
+            len(extra),
+            len(seen_docs),
+        )
+        return stitched + extra
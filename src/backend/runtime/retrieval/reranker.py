@@ -0,0 +1,223 @@
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Protocol, Sequence
+
+import tiktoken
+from langchain_core.documents import Document
+
+from backend.infra.sparse_index import tokenize
+
+logger = logging.getLogger("RETRIEVER_RERANK")
+
+RERANK_SCORERS = ("lexical", "cross_encoder")
+
+
+class RerankScorer(Protocol):
+    def score(self, question: str, texts: Sequence[str]) -> List[float]:
+        """Returns one relevance score per text (higher is better)."""
+        ...
+
+
+class LexicalOverlapScorer:
+    """
+    Dependency-free scorer: fraction of the question's distinct terms that
+    occur in the passage, with a small bonus for term frequency. Meant for
+    tests and environments without a cross-encoder model.
+    """
+    def score(self, question: str, texts: Sequence[str]) -> List[float]:
+        terms = set(tokenize(question))
+        if not terms:
+            return [0.0] * len(texts)
+
+        scores = []
+        for text in texts:
+            tokens = tokenize(text)
+            counts: Dict[str, int] = {}
+            for token in tokens:
+                if token in terms:
+                    counts[token] = counts.get(token, 0) + 1
+            coverage = len(counts) / len(terms)
+            density = sum(counts.values()) / (len(tokens) + 1)
+            scores.append(coverage + 0.1 * density)
+        return scores
+
+
+class CrossEncoderScorer:
+    """
+    Local CPU cross-encoder (sentence-transformers). The question and each
+    passage are encoded jointly, which ranks far better than comparing two
+    independent embeddings. sentence-transformers is an optional dependency
+    and is only imported when this scorer is selected.
+    """
+    def __init__(self, model_name: str, device: str = "cpu", max_length: int = 512):
+        try:
+            from sentence_transformers import CrossEncoder
+        except ImportError as e:
+            raise ImportError(
+                "RETRIEVER_RERANK_SCORER=cross_encoder requires the sentence-transformers package"
+            ) from e
+
+        self.model_name = model_name
+        self.model = CrossEncoder(model_name, device=device, max_length=max_length)
+        logger.info("Cross-encoder loaded | model=%s | device=%s", model_name, device)
+
+    def score(self, question: str, texts: Sequence[str]) -> List[float]:
+        scores = self.model.predict([(question, text) for text in texts], show_progress_bar=False)
+        return [float(s) for s in scores]
+
+
+def build_scorer(name: str, model_name: str | None = None) -> RerankScorer:
+    if name == "lexical":
+        return LexicalOverlapScorer()
+    if name == "cross_encoder":
+        if not model_name:
+            raise ValueError("The cross_encoder re-rank scorer needs a model name")
+        return CrossEncoderScorer(model_name)
+    raise ValueError(f"Unknown re-rank scorer: {name}")
+
+
+class Reranker:
+    """
+    Two-stage retrieval: the retriever over-fetches `candidates` chunks
+    (cheap vector search), a local scorer re-ranks them, and only the best
+    `top_k` are returned.
+
+    Candidates are scored in batches of `batch_size`. When the scoring time
+    exceeds `budget_ms`, the remaining batches are skipped and the
+    first-stage order is returned unchanged, so a slow scorer never costs
+    more than the budget plus one batch.
+
+    Exposes `top_k` and `retrieve(question, top_k, filters)` like the
+    Retriever, so it can be wrapped by the OverlapDeduplicator. Each call
+    logs the prompt tokens saved compared to sending the retriever's
+    first-stage top_k chunks.
+    """
+    def __init__(
+        self,
+        retriever,
+        scorer: RerankScorer,
+        top_k: int,
+        candidates: int = 30,
+        batch_size: int = 16,
+        budget_ms: float = 500.0,
+        model_name: str = "gpt-4o-mini",
+    ):
+        self.retriever = retriever
+        self.scorer = scorer
+        self.top_k = top_k
+        self.candidates = max(candidates, top_k)
+        self.batch_size = max(1, batch_size)
+        self.budget_ms = budget_ms
+
+        try:
+            self.encoding = tiktoken.encoding_for_model(model_name)
+        except KeyError:
+            self.encoding = tiktoken.get_encoding("o200k_base")
+
+        self.calls = 0
+        self.fallbacks = 0
+        self.tokens_saved = 0
+
+    def retrieve(
+        self,
+        question: str,
+        top_k: int | None = None,
+        filters: Dict[str, Any] | None = None,
+    ) -> List[Document]:
+        k = top_k or self.top_k
+        candidates = self.retriever.retrieve(
+            question, top_k=max(self.candidates, k), filters=filters
+        )
+        return self.rerank(question, candidates, k)
+
+    async def aretrieve(
+        self,
+        question: str,
+        top_k: int | None = None,
+        filters: Dict[str, Any] | None = None,
+    ) -> List[Document]:
+        k = top_k or self.top_k
+        candidates = await self.retriever.aretrieve(
+            question, top_k=max(self.candidates, k), filters=filters
+        )
+        return await asyncio.to_thread(self.rerank, question, candidates, k)
+
+    def rerank(self, question: str, candidates: List[Document], k: int) -> List[Document]:
+        """
+        Returns the best `k` candidates by scorer relevance, or the first
+        `k` in first-stage order when the latency budget is exceeded.
+        """
+        started = time.perf_counter()
+        texts = [chunk.page_content or "" for chunk in candidates]
+        scores: List[float] = []
+        fallback = False
+
+        for start in range(0, len(texts), self.batch_size):
+            scores.extend(self.scorer.score(question, texts[start:start + self.batch_size]))
+            if (time.perf_counter() - started) * 1000 > self.budget_ms and len(scores) < len(texts):
+                fallback = True
+                break
+
+        if fallback:
+            selected = candidates[:k]
+        else:
+            # Stable sort: ties keep their first-stage order
+            order = sorted(range(len(candidates)), key=lambda i: -scores[i])
+            selected = [candidates[i] for i in order[:k]]
+
+        self._log_rerank(candidates, selected, scores, fallback, time.perf_counter() - started)
+        return selected
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "calls": self.calls,
+            "fallbacks": self.fallbacks,
+            "tokens_saved": self.tokens_saved,
+        }
+
+    # Logging helpers
+
+    def _count_tokens(self, chunks: List[Document]) -> int:
+        return sum(len(self.encoding.encode_ordinary(c.page_content or "")) for c in chunks)
+
+    def _log_rerank(
+        self,
+        candidates: List[Document],
+        selected: List[Document],
+        scores: List[float],
+        fallback: bool,
+        elapsed: float,
+    ) -> None:
+        baseline = self._count_tokens(candidates[:self.retriever.top_k])
+        sent = self._count_tokens(selected)
+        saved = baseline - sent
+
+        self.calls += 1
+        self.fallbacks += int(fallback)
+        self.tokens_saved += saved
+
+        if fallback:
+            logger.warning(
+                "Re-rank budget exceeded (%.0f ms > %s ms) after %s/%s candidates | "
+                "using first-stage order",
+                elapsed * 1000,
+                self.budget_ms,
+                len(scores),
+                len(candidates),
+            )
+
+        logger.info(
+            "Re-rank | candidates=%s -> top_k=%s | %.1f ms | fallback=%s | prompt tokens "
+            "first-stage top_%s=%s sent=%s saved=%s | total_saved=%s over %s calls",
+            len(candidates),
+            len(selected),
+            elapsed * 1000,
+            fallback,
+            self.retriever.top_k,
+            baseline,
+            sent,
+            saved,
+            self.tokens_saved,
+            self.calls,
+        )
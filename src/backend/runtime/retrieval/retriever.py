@@ -1,18 +1,61 @@
+import asyncio
+import hashlib
 import logging
-from typing import List, Tuple
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
 
+import numpy as np
 from langchain_chroma import Chroma
-from langchain_openai import OpenAIEmbeddings
 from langchain_core.documents import Document
 
 from backend.config.settings import (
+    CHUNKING_CONFIG,
     EMBEDDING_CONFIG,
     VECTORSTORE_CONFIG,
     RETRIEVER_CONFIG
 )
+from backend.infra import versioned_dir
+from backend.infra.doc_store import DocStore
+from backend.infra.embeddings import build_embedding_function
+from backend.infra.film_metadata import FilmMetadataTable
+from backend.infra.local_index import LocalVectorIndex
+from backend.infra.metadata_index import MetadataFilters, MetadataIndex
+from backend.infra.sparse_index import BM25Index
+from backend.runtime.retrieval.cache import LRUCache
 
 logger = logging.getLogger("RETRIEVER")
 
+
+class RetrieverIndexes:
+    """
+    One generation of the on-disk indexes a Retriever reads, with the
+    collection fingerprint it was loaded for. A new generation is loaded
+    in full and then swapped in as a single reference. Each query reads the
+    current generation once and passes it to every search helper, so
+    queries already running keep the objects they started with. Replaced
+    generations are
+    not closed explicitly; their memory maps are released once no
+    query references them.
+    """
+    def __init__(
+        self,
+        version: Tuple[Any, ...],
+        local_index: LocalVectorIndex | None,
+        metadata_index: MetadataIndex | None,
+        sparse_index: BM25Index | None,
+        doc_store: DocStore | None,
+        film_metadata: FilmMetadataTable | None,
+    ):
+        self.version = version
+        self.local_index = local_index
+        self.metadata_index = metadata_index
+        self.sparse_index = sparse_index
+        self.doc_store = doc_store
+        self.film_metadata = film_metadata
+
+
 class Retriever:
     """
     Loads a persisted Chroma vector store and retrieves the most relevant chunks.
@@ -20,7 +63,34 @@ class Retriever:
     Notes:
     - This project stores *chunks* as LangChain Documents in Chroma (page_content = chunk text).
     - similarity_search_with_score returns (Document, distance) for cosine space (lower is better).
+    - Query embeddings can be kept in an in-process LRU keyed by the normalized question,
+      and ranked results (chunk ids + distances) in a TTL/LRU cache (both opt-in).
+    - The persisted collection and its side indexes are fingerprinted at most once
+      per RETRIEVER_VERSION_CHECK_INTERVAL seconds; when they changed, a new
+      RetrieverIndexes generation is loaded and swapped in, and cached results of
+      the previous generation are no longer served.
+    - With VECTORSTORE_BACKEND=local, searches run against an in-process
+      LocalVectorIndex (exact cosine top-k over memory-mapped vectors) instead
+      of Chroma; it is reloaded when the index on disk is rebuilt.
+    - Metadata filters (Genre, Release Year, Director, Origin/Ethnicity) are
+      resolved to matching chunks with the MetadataIndex built at ingestion.
+      The local index then scores only those chunks; Chroma receives them as
+      a `chunk_id` filter, or post-filters a widening over-fetch when there
+      are too many to send.
+    - With RETRIEVER_HYBRID=true, dense candidates and BM25 candidates from the
+      prebuilt sparse index are fused with reciprocal-rank fusion; results
+      keep the fused order and carry their cosine distance.
+    - With VECTORSTORE_NORMALIZE_METADATA=true, records only carry the chunk
+      and filterable fields; the film metadata is joined back from the
+      FilmMetadataTable after top-k selection.
+    - With RETRIEVER_PARENT_DOCUMENT=true, small matched chunks are replaced
+      by a window of their parent plot read from docs.jsonl via the DocStore;
+      overlapping windows of the same film are merged into one Document.
     """
+    # Above this many matching chunks, a Chroma query is over-fetched and
+    # post-filtered instead of sending a huge `$in` clause.
+    CHROMA_MAX_FILTER_IDS = 10_000
+    CHROMA_FILTER_OVERFETCH = 20
     def __init__(self):
         self.top_k = RETRIEVER_CONFIG["top_k"]
         
@@ -30,16 +100,42 @@ class Retriever:
         self.model_name = EMBEDDING_CONFIG["embedding_model"]
         self.persist_dir = VECTORSTORE_CONFIG["persist_dir"]
         self.collection_name = VECTORSTORE_CONFIG["collection_name"]
+        self.backend = VECTORSTORE_CONFIG.get("backend", "chroma")
+        self.local_index_dir = VECTORSTORE_CONFIG.get("local_index_dir")
+        self.metadata_index_dir = VECTORSTORE_CONFIG.get("metadata_index_dir")
+        self.sparse_index_dir = VECTORSTORE_CONFIG.get("sparse_index_dir")
+        self.normalize_metadata = VECTORSTORE_CONFIG.get("normalize_metadata", False)
+        self.film_metadata_dir = VECTORSTORE_CONFIG.get("film_metadata_dir")
+        self.hybrid = RETRIEVER_CONFIG.get("hybrid", False)
+        self.hybrid_candidates = RETRIEVER_CONFIG.get("hybrid_candidates", 50)
+        self.rrf_k = RETRIEVER_CONFIG.get("rrf_k", 60)
+        self.parent_document = RETRIEVER_CONFIG.get("parent_document", False)
+        self.parent_window_chars = RETRIEVER_CONFIG.get("parent_window_chars", 2000)
+        self.doc_store_dir = CHUNKING_CONFIG.get("doc_store_dir")
         
-        self.embedding_function = OpenAIEmbeddings(model=self.model_name)
+        self.version_check_interval = RETRIEVER_CONFIG.get("version_check_interval", 5.0)
+        
+        self.embedding_function = build_embedding_function()
 
-        self.vectordb = Chroma(
-            persist_directory=self.persist_dir,
-            collection_name=self.collection_name,
-            embedding_function=self.embedding_function
-        )
+        self.vectordb = None
+        if self.backend == "chroma":
+            self.vectordb = Chroma(
+                persist_directory=self.persist_dir,
+                collection_name=self.collection_name,
+                embedding_function=self.embedding_function
+            )
+        elif self.backend != "local":
+            raise ValueError(f"Unknown vector store backend: {self.backend}")
 
-        logger.info("Loading vector store: %s", self.persist_dir)
+        self._reload_lock = threading.Lock()
+        self._version_checked_at = time.monotonic()
+        self._indexes = self._load_indexes(self._get_collection_version())
+
+        logger.info(
+            "Loading vector store (%s): %s",
+            self.backend,
+            self.local_index_dir if self._indexes.local_index is not None else self.persist_dir,
+        )
         logger.info("Embedding model: %s", self.model_name)
         logger.info(
             "top_k=%s | use_threshold=%s | distance_threshold=%s",
@@ -47,21 +143,118 @@ class Retriever:
             self.use_threshold,
             self.distance_threshold,
         )
-        logger.info(f"Vector store metadata: {self.vectordb._collection.metadata}")
+        if self.vectordb is not None:
+            logger.info(f"Vector store metadata: {self.vectordb._collection.metadata}")
 
-    def retrieve(self, question: str) -> List[Document]:
+        self.query_embedding_cache = LRUCache(
+            max_size=RETRIEVER_CONFIG.get("query_cache_size", 0)
+        )
+        self.result_cache = LRUCache(
+            max_size=RETRIEVER_CONFIG.get("result_cache_size", 0),
+            ttl_seconds=RETRIEVER_CONFIG.get("result_cache_ttl"),
+        )
+
+    def retrieve(
+        self,
+        question: str,
+        top_k: int | None = None,
+        filters: MetadataFilters | None = None,
+    ) -> List[Document]:
         """
         Returns retrieved chunks as a list[Document].
 
         If use_threshold=True, only chunks with distance <= distance_threshold are returned.
         Distances are cosine distances in HNSW cosine space (lower is better).
+        `top_k` overrides the configured number of candidates (e.g. for over-fetching).
+        `filters` restricts the search to chunks whose metadata matches, e.g.
+        {"Genre": "horror", "Origin/Ethnicity": "Japanese", "Release Year": "1990s"}.
         """
 
-        chunks_with_distances = self.vectordb.similarity_search_with_score(
-            question, k=self.top_k
+        indexes = self._current_indexes()
+        chunks_with_distances = self._search(indexes, question, top_k or self.top_k, filters)
+
+        return self._parent_windows(indexes, self._select(indexes, chunks_with_distances))
+
+    async def aretrieve(
+        self,
+        question: str,
+        top_k: int | None = None,
+        filters: MetadataFilters | None = None,
+    ) -> List[Document]:
+        """
+        Async version of `retrieve`.
+
+        The question is embedded with the embedding model's async API, while
+        the blocking Chroma calls (cache hydration and vector query) run in a
+        worker thread, so the event loop stays free for other requests.
+        """
+        k = top_k or self.top_k
+        indexes = await asyncio.to_thread(self._current_indexes)
+        chunks_with_distances = await asyncio.to_thread(
+            self._cached_search, indexes, question, k, filters
         )
 
-        sorted_chunks = sorted(chunks_with_distances, key=lambda x: x[1])
+        if chunks_with_distances is None:
+            embedding = await self._aembed_query(question)
+            chunks_with_distances = await asyncio.to_thread(
+                self._search_by_embedding, indexes, question, embedding, k, filters
+            )
+
+        selected = self._select(indexes, chunks_with_distances)
+        if indexes.doc_store is None:
+            return selected
+        return await asyncio.to_thread(self._parent_windows, indexes, selected)
+
+    def retrieve_many(self, questions: List[str]) -> List[List[Document]]:
+        """
+        Batch version of `retrieve` for throughput workloads (e.g. evaluations).
+
+        Questions not served by the caches are embedded in one batched call and
+        searched with a single multi-query request to the Chroma collection.
+        Sorting and threshold filtering are applied per question exactly as in
+        `retrieve`, and results are returned in input order.
+        """
+        logger.info("Batch retrieval started | questions=%s", len(questions))
+
+        indexes = self._current_indexes()
+        return [
+            self._parent_windows(indexes, self._select(indexes, chunks_with_distances))
+            for chunks_with_distances in self._search_many(indexes, questions)
+        ]
+
+    def collection_version(self) -> str:
+        """
+        Short fingerprint of the vector store and its side indexes; changes
+        whenever any of them is rebuilt.
+        """
+        version = self._current_indexes().version
+        return hashlib.sha256(repr(version).encode("utf-8")).hexdigest()[:16]
+
+    def embed_query(self, question: str) -> List[float]:
+        """
+        Returns the (cached) query embedding used for retrieval.
+        """
+        return self._embed_query(question)
+
+    async def aembed_query(self, question: str) -> List[float]:
+        return await self._aembed_query(question)
+
+    def _select(
+        self, indexes: RetrieverIndexes, chunks_with_distances: List[Tuple[Document, float]]
+    ) -> List[Document]:
+        """
+        Sorts candidates by distance and applies the optional distance threshold.
+        Hybrid results are already in fused order and are not re-sorted.
+        Film metadata is joined here, i.e. only into the top-k chunks.
+        """
+        if indexes.film_metadata is not None:
+            for chunk, _ in chunks_with_distances:
+                chunk.metadata = indexes.film_metadata.join(chunk.metadata or {})
+
+        if indexes.sparse_index is not None:
+            sorted_chunks = list(chunks_with_distances)
+        else:
+            sorted_chunks = sorted(chunks_with_distances, key=lambda x: x[1])
 
         self._log_distance_summary(sorted_chunks)
        
@@ -96,8 +289,623 @@ class Retriever:
 
         return accepted
     
+    def _parent_windows(self, indexes: RetrieverIndexes, chunks: List[Document]) -> List[Document]:
+        """
+        Replaces chunks carrying a `char_start`/`char_end` span by a window of
+        their parent plot. Chunks whose windows overlap are merged into the
+        one of the best ranked chunk; the others are dropped. Chunks without
+        a span (or whose film is missing from the doc store) are kept as is.
+        """
+        if indexes.doc_store is None or not chunks:
+            return chunks
+
+        by_doc: Dict[str, List[int]] = {}
+        for idx, chunk in enumerate(chunks):
+            md = chunk.metadata or {}
+            if md.get("doc_id") is not None and md.get("char_start") is not None:
+                by_doc.setdefault(str(md["doc_id"]), []).append(idx)
+
+        replaced: Dict[int, Document | None] = {}
+        for doc_id, idxs in by_doc.items():
+            spans = [
+                (int(chunks[i].metadata["char_start"]), int(chunks[i].metadata["char_end"]))
+                for i in idxs
+            ]
+            for text, start, end, covered in indexes.doc_store.windows(
+                doc_id, spans, self.parent_window_chars
+            ):
+                members = sorted(idxs[c] for c in covered)
+                best = chunks[members[0]]
+                chunk_ids = [chunks[i].metadata.get("chunk_id", "N/A") for i in members]
+                chunk_indexes = [int(chunks[i].metadata.get("chunk_index", 0)) for i in members]
+                replaced[members[0]] = Document(
+                    page_content=text,
+                    metadata={
+                        **best.metadata,
+                        "chunk_id": ", ".join(chunk_ids),
+                        "chunk_ids": chunk_ids,
+                        "chunk_index": min(chunk_indexes),
+                        "chunk_index_end": max(chunk_indexes),
+                        "window_start": start,
+                        "window_end": end,
+                    },
+                    id=best.id,
+                )
+                for i in members[1:]:
+                    replaced[i] = None
+
+        windows = [replaced.get(idx, chunk) for idx, chunk in enumerate(chunks)]
+        windows = [chunk for chunk in windows if chunk is not None]
+
+        logger.info(
+            "Parent windows | chunks=%s -> documents=%s | chars %s -> %s",
+            len(chunks),
+            len(windows),
+            sum(len(c.page_content or "") for c in chunks),
+            sum(len(c.page_content or "") for c in windows),
+        )
+        return windows
+
+    # Caching helpers
+
+    def cache_stats(self) -> Dict[str, Dict[str, float]]:
+        return {
+            "query_embedding": self.query_embedding_cache.stats(),
+            "result": self.result_cache.stats(),
+        }
+
+    def _search(
+        self,
+        indexes: RetrieverIndexes,
+        question: str,
+        k: int,
+        filters: MetadataFilters | None = None,
+    ) -> List[Tuple[Document, float]]:
+        """
+        Returns (Document, distance) pairs for the top_k nearest chunks,
+        serving repeated questions from the result and embedding caches.
+        """
+        cached = self._cached_search(indexes, question, k, filters)
+        if cached is not None:
+            return cached
+
+        embedding = self._embed_query(question)
+        return self._search_by_embedding(indexes, question, embedding, k, filters)
+
+    def _cached_search(
+        self,
+        indexes: RetrieverIndexes,
+        question: str,
+        k: int,
+        filters: MetadataFilters | None = None,
+    ) -> List[Tuple[Document, float]] | None:
+        cached = self.result_cache.get(self._result_key(indexes, question, k, filters))
+        if cached is None:
+            return None
+
+        hydrated = self._hydrate(indexes, cached)
+        if hydrated is not None:
+            self._log_cache_stats("hit")
+        return hydrated
+
+    def _embed_query(self, question: str) -> List[float]:
+        normalized = self._normalize_question(question)
+        embedding = self.query_embedding_cache.get(normalized)
+        if embedding is None:
+            embedding = self.embedding_function.embed_query(question)
+            self.query_embedding_cache.put(normalized, embedding)
+        return embedding
+
+    async def _aembed_query(self, question: str) -> List[float]:
+        normalized = self._normalize_question(question)
+        embedding = self.query_embedding_cache.get(normalized)
+        if embedding is None:
+            embedding = await self.embedding_function.aembed_query(question)
+            self.query_embedding_cache.put(normalized, embedding)
+        return embedding
+
+    def _search_by_embedding(
+        self,
+        indexes: RetrieverIndexes,
+        question: str,
+        embedding: List[float],
+        k: int,
+        filters: MetadataFilters | None = None,
+    ) -> List[Tuple[Document, float]]:
+        rows = self._resolve_filters(indexes, filters)
+        dense_k = self._dense_k(indexes, k)
+        if rows is not None and len(rows) == 0:
+            results = []
+        elif indexes.local_index is not None:
+            results = self._local_search(indexes, [embedding], dense_k, rows)[0]
+        elif rows is not None:
+            results = self._chroma_filtered_search(indexes, embedding, dense_k, rows)
+        else:
+            results = self.vectordb.similarity_search_by_vector_with_relevance_scores(
+                embedding, k=dense_k
+            )
+
+        if indexes.sparse_index is not None and (rows is None or len(rows) > 0):
+            results = self._fuse(indexes, question, embedding, results, k, rows)
+
+        self.result_cache.put(
+            self._result_key(indexes, question, k, filters),
+            [(self._chunk_id(chunk), distance) for chunk, distance in results],
+        )
+        self._log_cache_stats("miss")
+        return results
+
+    def _search_many(
+        self, indexes: RetrieverIndexes, questions: List[str]
+    ) -> List[List[Tuple[Document, float]]]:
+        results: List[List[Tuple[Document, float]] | None] = [None] * len(questions)
+        pending: Dict[str, List[int]] = {}
+
+        for idx, question in enumerate(questions):
+            normalized = self._normalize_question(question)
+            cached = self.result_cache.get(self._result_key(indexes, question, self.top_k))
+            hydrated = self._hydrate(indexes, cached) if cached is not None else None
+            if hydrated is not None:
+                results[idx] = hydrated
+            else:
+                pending.setdefault(normalized, []).append(idx)
+
+        if pending:
+            embeddings = self._embed_many(
+                {normalized: questions[idxs[0]] for normalized, idxs in pending.items()}
+            )
+            query_embeddings = [embeddings[normalized] for normalized in pending]
+            dense_k = self._dense_k(indexes, self.top_k)
+            if indexes.local_index is not None:
+                searched = self._local_search(indexes, query_embeddings, dense_k)
+            else:
+                searched = self._chroma_query(query_embeddings, dense_k)
+
+            if indexes.sparse_index is not None:
+                searched = [
+                    self._fuse(indexes, questions[idxs[0]], embedding, found, self.top_k, None)
+                    for embedding, found, idxs in zip(query_embeddings, searched, pending.values())
+                ]
+
+            for found, (normalized, idxs) in zip(searched, pending.items()):
+                self.result_cache.put(
+                    self._result_key(indexes, questions[idxs[0]], self.top_k),
+                    [(self._chunk_id(chunk), distance) for chunk, distance in found],
+                )
+                for idx in idxs:
+                    results[idx] = found
+
+        logger.info(
+            "Batch search | questions=%s | served_from_cache=%s | searched=%s",
+            len(questions),
+            len(questions) - sum(len(idxs) for idxs in pending.values()),
+            len(pending),
+        )
+        return results
+
+    def _chroma_query(
+        self, embeddings: List[List[float]], k: int
+    ) -> List[List[Tuple[Document, float]]]:
+        """
+        Searches several query embeddings with a single Chroma request.
+        """
+        response = self.vectordb._collection.query(
+            query_embeddings=embeddings,
+            n_results=k,
+            include=["documents", "metadatas", "distances"],
+        )
+        return [
+            [
+                (Document(page_content=text, metadata=md or {}, id=chunk_id), distance)
+                for chunk_id, text, md, distance in zip(
+                    response["ids"][row],
+                    response["documents"][row],
+                    response["metadatas"][row],
+                    response["distances"][row],
+                )
+            ]
+            for row in range(len(embeddings))
+        ]
+
+    def _local_search(
+        self,
+        indexes: RetrieverIndexes,
+        embeddings: List[List[float]],
+        k: int,
+        rows: np.ndarray | None = None,
+    ) -> List[List[Tuple[Document, float]]]:
+        if rows is not None and indexes.metadata_index.ids_digest != indexes.local_index.ids_digest:
+            # Indexes built from different chunk lists: map through chunk ids
+            local_rows = indexes.local_index.rows_for_ids(indexes.metadata_index.ids_for(rows))
+            rows = np.array([row for row in local_rows if row is not None], dtype=np.int64)
+
+        return [
+            [(indexes.local_index.document(row), distance) for row, distance in ranked]
+            for ranked in indexes.local_index.search(embeddings, k, rows)
+        ]
+
+    def _chroma_filtered_search(
+        self,
+        indexes: RetrieverIndexes,
+        embedding: List[float],
+        k: int,
+        rows: np.ndarray,
+    ) -> List[Tuple[Document, float]]:
+        """
+        Filtered Chroma search returning min(k, matching chunks) results.
+
+        Small match sets are sent as a `chunk_id` list. Larger ones are
+        served by post-filtering an unfiltered over-fetch that is widened
+        until enough matches are found.
+        """
+        k = min(k, len(rows))
+        ids = indexes.metadata_index.ids_for(rows)
+        if len(ids) <= self.CHROMA_MAX_FILTER_IDS:
+            return self.vectordb.similarity_search_by_vector_with_relevance_scores(
+                embedding, k=k, filter={"chunk_id": {"$in": ids}}
+            )
+        return self._chroma_post_filtered_search(embedding, k, set(ids))
+
+    def _chroma_post_filtered_search(
+        self, embedding: List[float], k: int, allowed: set
+    ) -> List[Tuple[Document, float]]:
+        total = self.vectordb._collection.count()
+        fetch = min(k * self.CHROMA_FILTER_OVERFETCH, total)
+        while True:
+            candidates = self.vectordb.similarity_search_by_vector_with_relevance_scores(
+                embedding, k=fetch
+            )
+            matched = [
+                (chunk, distance) for chunk, distance in candidates
+                if self._chunk_id(chunk) in allowed
+            ]
+            logger.info(
+                "Filter matches %s chunks | post-filtered %s candidates -> %s matches",
+                len(allowed),
+                len(candidates),
+                len(matched),
+            )
+            if len(matched) >= k or fetch >= total:
+                return matched[:k]
+            fetch = min(fetch * 4, total)
+
+    def _dense_k(self, indexes: RetrieverIndexes, k: int) -> int:
+        return max(k, self.hybrid_candidates) if indexes.sparse_index is not None else k
+
+    def _fuse(
+        self,
+        indexes: RetrieverIndexes,
+        question: str,
+        embedding: List[float],
+        dense: List[Tuple[Document, float]],
+        k: int,
+        rows: np.ndarray | None,
+    ) -> List[Tuple[Document, float]]:
+        """
+        Reciprocal-rank fusion of the dense candidates with the BM25
+        candidates: score(chunk) = sum over rankings of 1 / (rrf_k + rank).
+        Chunks found only by BM25 are fetched with their cosine distance.
+        """
+        sparse_ids = self._sparse_search(indexes, question, rows)
+
+        fused: Dict[str, float] = {}
+        for rank, (chunk, _) in enumerate(dense, start=1):
+            chunk_id = self._chunk_id(chunk)
+            fused[chunk_id] = fused.get(chunk_id, 0.0) + 1.0 / (self.rrf_k + rank)
+        for rank, chunk_id in enumerate(sparse_ids, start=1):
+            fused[chunk_id] = fused.get(chunk_id, 0.0) + 1.0 / (self.rrf_k + rank)
+
+        top_ids = sorted(fused, key=fused.get, reverse=True)[:k]
+
+        by_id = {self._chunk_id(chunk): (chunk, distance) for chunk, distance in dense}
+        missing = [chunk_id for chunk_id in top_ids if chunk_id not in by_id]
+        if missing:
+            by_id.update(self._score_ids(indexes, missing, embedding))
+
+        logger.info(
+            "Hybrid fusion | dense=%s | sparse=%s | overlap=%s | sparse_only_in_top_k=%s",
+            len(dense),
+            len(sparse_ids),
+            len(set(sparse_ids) & {self._chunk_id(chunk) for chunk, _ in dense}),
+            len(missing),
+        )
+        return [by_id[chunk_id] for chunk_id in top_ids if chunk_id in by_id]
+
+    def _sparse_search(
+        self, indexes: RetrieverIndexes, question: str, rows: np.ndarray | None
+    ) -> List[str]:
+        if rows is not None and indexes.sparse_index.ids_digest != indexes.metadata_index.ids_digest:
+            # Indexes built from different chunk lists: filter by chunk id
+            allowed = set(indexes.metadata_index.ids_for(rows))
+            ranked = indexes.sparse_index.search(question, self.hybrid_candidates * 4)
+            ids = [i for i in indexes.sparse_index.ids_for([row for row, _ in ranked]) if i in allowed]
+            return ids[:self.hybrid_candidates]
+
+        ranked = indexes.sparse_index.search(question, self.hybrid_candidates, rows)
+        return indexes.sparse_index.ids_for([row for row, _ in ranked])
+
+    def _score_ids(
+        self, indexes: RetrieverIndexes, ids: List[str], embedding: List[float]
+    ) -> Dict[str, Tuple[Document, float]]:
+        """
+        Loads the given chunks with their cosine distance to `embedding`.
+        """
+        query = np.asarray(embedding, dtype=np.float32)
+        query /= np.linalg.norm(query) or 1.0
+
+        if indexes.local_index is not None:
+            scored = {}
+            for chunk_id, row in zip(ids, indexes.local_index.rows_for_ids(ids)):
+                if row is None:
+                    continue
+                similarity = float(np.asarray(indexes.local_index.vectors[row]) @ query)
+                scored[chunk_id] = (indexes.local_index.document(row), 1.0 - similarity)
+            return scored
+
+        records = self.vectordb._collection.get(
+            ids=ids, include=["embeddings", "documents", "metadatas"]
+        )
+        scored = {}
+        for chunk_id, vector, text, md in zip(
+            records["ids"], records["embeddings"], records["documents"], records["metadatas"]
+        ):
+            vector = np.asarray(vector, dtype=np.float32)
+            similarity = float(vector @ query) / (float(np.linalg.norm(vector)) or 1.0)
+            scored[chunk_id] = (
+                Document(page_content=text, metadata=md or {}, id=chunk_id),
+                1.0 - similarity,
+            )
+        return scored
+
+    def _resolve_filters(
+        self, indexes: RetrieverIndexes, filters: MetadataFilters | None
+    ) -> np.ndarray | None:
+        """
+        Returns the metadata index rows matching `filters`, or None when
+        the search is unfiltered.
+        """
+        if not filters:
+            return None
+        if indexes.metadata_index is None:
+            raise ValueError(
+                "Metadata filters require the metadata index (VECTORSTORE_METADATA_INDEX=true)"
+            )
+
+        rows = indexes.metadata_index.resolve(filters)
+        logger.info(
+            "Metadata filters %s | matching chunks=%s/%s",
+            filters,
+            len(rows),
+            indexes.metadata_index.count,
+        )
+        return rows
+
+    def _embed_many(self, questions: Dict[str, str]) -> Dict[str, List[float]]:
+        """
+        Returns normalized question -> embedding, embedding all cache misses
+        in a single batched call.
+        """
+        embeddings: Dict[str, List[float]] = {}
+        missing: Dict[str, str] = {}
+        for normalized, question in questions.items():
+            embedding = self.query_embedding_cache.get(normalized)
+            if embedding is None:
+                missing[normalized] = question
+            else:
+                embeddings[normalized] = embedding
+
+        if missing:
+            vectors = self.embedding_function.embed_documents(list(missing.values()))
+            for normalized, vector in zip(missing, vectors):
+                self.query_embedding_cache.put(normalized, vector)
+                embeddings[normalized] = vector
+
+        return embeddings
+
+    def _hydrate(
+        self, indexes: RetrieverIndexes, ranked: List[Tuple[str, float]]
+    ) -> List[Tuple[Document, float]] | None:
+        """
+        Rebuilds cached (chunk_id, distance) pairs into Documents in ranked
+        order. Returns None if any chunk is no longer in the collection.
+        """
+        if not ranked:
+            return []
+
+        ids = [chunk_id for chunk_id, _ in ranked]
+        if indexes.local_index is not None:
+            by_id = {
+                chunk_id: indexes.local_index.document(row)
+                for chunk_id, row in zip(ids, indexes.local_index.rows_for_ids(ids))
+                if row is not None
+            }
+        else:
+            records = self.vectordb.get(ids=ids, include=["documents", "metadatas"])
+            by_id = {
+                chunk_id: Document(page_content=text, metadata=md or {}, id=chunk_id)
+                for chunk_id, text, md in zip(records["ids"], records["documents"], records["metadatas"])
+            }
+        if len(by_id) != len(ids):
+            return None
+
+        return [(by_id[chunk_id], distance) for chunk_id, distance in ranked]
+
+    def _current_indexes(self) -> RetrieverIndexes:
+        """
+        The index generation a query runs against. Read once per query and
+        passed to every search helper, so a concurrent swap never mixes
+        rows of two generations within one query or caches its results
+        under the wrong generation.
+        """
+        self._invalidate_if_collection_changed()
+        return self._indexes
+
+    def _invalidate_if_collection_changed(self) -> None:
+        """
+        Fingerprints the collection at most once per `version_check_interval`
+        seconds and swaps in a freshly loaded index generation when it
+        changed. Other threads skip the check while a reload is running and
+        keep querying the current generation.
+        """
+        if time.monotonic() - self._version_checked_at < self.version_check_interval:
+            return
+        if not self._reload_lock.acquire(blocking=False):
+            return
+        try:
+            self._version_checked_at = time.monotonic()
+            version = self._get_collection_version()
+            if version == self._indexes.version:
+                return
+
+            indexes = self._load_indexes(version)
+            logger.info(
+                "Vector store changed | indexes reloaded | clearing %s cached results",
+                len(self.result_cache),
+            )
+            self._indexes = indexes
+            self.result_cache.clear()
+        finally:
+            self._reload_lock.release()
+
+    def _load_indexes(self, version: Tuple[Any, ...]) -> RetrieverIndexes:
+        return RetrieverIndexes(
+            version=version,
+            local_index=self._load_local_index() if self.backend == "local" else None,
+            metadata_index=self._load_metadata_index(),
+            sparse_index=self._load_sparse_index(),
+            doc_store=self._load_doc_store(),
+            film_metadata=self._load_film_metadata(),
+        )
+
+    def _load_local_index(self) -> LocalVectorIndex:
+        return LocalVectorIndex(
+            Path(self.local_index_dir),
+            rescore_factor=VECTORSTORE_CONFIG.get("rescore_factor", 4),
+        )
+
+    def _load_metadata_index(self) -> MetadataIndex | None:
+        if not self.metadata_index_dir:
+            return None
+        if not (versioned_dir.current(Path(self.metadata_index_dir)) / MetadataIndex.MANIFEST).exists():
+            return None
+        return MetadataIndex(Path(self.metadata_index_dir))
+
+    def _load_sparse_index(self) -> BM25Index | None:
+        if not self.hybrid:
+            return None
+        if not (versioned_dir.current(Path(self.sparse_index_dir)) / BM25Index.MANIFEST).exists():
+            logger.warning(
+                "RETRIEVER_HYBRID is set but no BM25 index was found in %s "
+                "(build it with VECTORSTORE_SPARSE_INDEX=true); using dense retrieval",
+                self.sparse_index_dir,
+            )
+            return None
+        return BM25Index(Path(self.sparse_index_dir))
+
+    def _load_film_metadata(self) -> FilmMetadataTable | None:
+        if not self.normalize_metadata:
+            return None
+        if not (versioned_dir.current(Path(self.film_metadata_dir)) / FilmMetadataTable.MANIFEST).exists():
+            logger.warning(
+                "VECTORSTORE_NORMALIZE_METADATA is set but no film metadata was found in %s "
+                "(rebuild the vector store); returning chunks without film metadata",
+                self.film_metadata_dir,
+            )
+            return None
+        return FilmMetadataTable(Path(self.film_metadata_dir))
+
+    def _load_doc_store(self) -> DocStore | None:
+        if not self.parent_document:
+            return None
+        if not (versioned_dir.current(Path(self.doc_store_dir)) / DocStore.MANIFEST).exists():
+            logger.warning(
+                "RETRIEVER_PARENT_DOCUMENT is set but no doc store was found in %s "
+                "(build it with CHUNK_PARENT_DOCUMENT=true); returning chunks",
+                self.doc_store_dir,
+            )
+            return None
+        try:
+            return DocStore(Path(self.doc_store_dir))
+        except ValueError as e:
+            logger.warning("Doc store unusable (%s); returning chunks", e)
+            return None
+
+    def _get_collection_version(self) -> Tuple[Any, ...]:
+        """
+        Cheap fingerprint of the persisted collection: record count plus the
+        modification times of Chroma's SQLite files (any write touches them).
+        For the local index, its live generation (see versioned_dir). The
+        live generations of the metadata, BM25 index, doc store and film
+        metadata directories are part of the fingerprint in both cases.
+        """
+        metadata_version = (
+            (versioned_dir.version_of(Path(self.metadata_index_dir)),)
+            if self.metadata_index_dir
+            else ()
+        )
+        if self.hybrid:
+            metadata_version += (versioned_dir.version_of(Path(self.sparse_index_dir)),)
+        if self.parent_document:
+            metadata_version += DocStore.version_of(Path(self.doc_store_dir))
+        if self.normalize_metadata:
+            metadata_version += (versioned_dir.version_of(Path(self.film_metadata_dir)),)
+        if self.backend == "local":
+            return (versioned_dir.version_of(Path(self.local_index_dir)), *metadata_version)
+
+        mtimes = tuple(
+            path.stat().st_mtime_ns if path.exists() else None
+            for path in (
+                Path(self.persist_dir) / "chroma.sqlite3",
+                Path(self.persist_dir) / "chroma.sqlite3-wal",
+            )
+        )
+        return (self.vectordb._collection.count(), *mtimes, *metadata_version)
+
+    def _result_key(
+        self,
+        indexes: RetrieverIndexes,
+        question: str,
+        k: int,
+        filters: MetadataFilters | None = None,
+    ) -> Tuple[Any, ...]:
+        return (
+            self._normalize_question(question),
+            k,
+            self.use_threshold,
+            self.distance_threshold,
+            self._filters_key(filters),
+            # Results of a replaced index generation are never served
+            indexes.version,
+        )
+
+    @staticmethod
+    def _filters_key(filters: MetadataFilters | None) -> Tuple[Any, ...]:
+        if not filters:
+            return ()
+        return tuple(
+            (field, tuple(value) if isinstance(value, (list, tuple)) else value)
+            for field, value in sorted(filters.items())
+        )
+
+    @staticmethod
+    def _normalize_question(question: str) -> str:
+        return " ".join(question.lower().split())
+
+    @staticmethod
+    def _chunk_id(chunk: Document) -> str:
+        return chunk.id or (chunk.metadata or {}).get("chunk_id")
+
     # Logging helpers
 
+    def _log_cache_stats(self, result: str) -> None:
+        stats = self.cache_stats()
+        logger.info(
+            "Result cache %s | result_hit_rate=%.2f%% | embedding_hit_rate=%.2f%%",
+            result,
+            stats["result"]["hit_rate"] * 100,
+            stats["query_embedding"]["hit_rate"] * 100,
+        )
+
     def _log_distance_summary(self, sorted_chunks: List[Tuple[Document, float]]) -> None:
         distances_summary = [
             f"{idx}:{distance:.4f}"
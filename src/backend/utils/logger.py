@@ -10,6 +10,10 @@ _LOGGER_INITIALIZED = False
 APP_LOGGER_PREFIXES = (
     "INGESTION_WORKFLOW",
     "LLM_Client",
+    "EMBEDDING",
+    "ANSWER_CACHE",
+    "ARROW_ARTIFACTS",
+    "DOC_STORE",
     "NOTEBOOK",
     "CHUNKING",
     "ETL",
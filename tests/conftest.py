@@ -0,0 +1,19 @@
+import types
+
+import pytest
+
+import backend.pipelines.vectorstore.embedding_scheduler as scheduler_module
+import backend.runtime.chat.context_packer as packer_module
+import backend.runtime.retrieval.reranker as reranker_module
+
+
+@pytest.fixture
+def offline_tokenizer(monkeypatch):
+    """One token per character, so token budgets are exact and no tiktoken download is needed."""
+    encoding = types.SimpleNamespace(encode_ordinary=list, decode="".join)
+    fake_tiktoken = types.SimpleNamespace(
+        encoding_for_model=lambda model: encoding,
+        get_encoding=lambda name: encoding,
+    )
+    for module in (scheduler_module, packer_module, reranker_module):
+        monkeypatch.setattr(module, "tiktoken", fake_tiktoken)
@@ -0,0 +1,85 @@
+import sqlite3
+
+import pytest
+
+from backend.infra.answer_cache import AnswerCache
+
+QUESTION = [1.0, 0.0, 0.0]
+SIMILAR = [0.99, 0.05, 0.0]
+PAYLOAD = {"context": "ctx", "answer": "It is a western.", "sources": []}
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return AnswerCache(
+        tmp_path / "answers.sqlite", model_name="m", temperature=0.0, semantic_threshold=0.95
+    )
+
+
+def test_exact_tier_is_scoped_by_model(tmp_path, cache):
+    cache.put("prompt", "answer")
+    assert cache.get("prompt") == "answer"
+    assert cache.get("other prompt") is None
+
+    other = AnswerCache(tmp_path / "answers.sqlite", model_name="other", temperature=0.0)
+    assert other.get("prompt") is None
+
+
+def test_similar_question_is_served(cache):
+    cache.put_similar("Who directed it?", QUESTION, PAYLOAD, namespace="e1|p1", collection_version="v1")
+
+    hit = cache.get_similar(SIMILAR, namespace="e1|p1", collection_version="v1")
+
+    assert hit["answer"] == PAYLOAD["answer"]
+    assert hit["similarity"] >= 0.95
+    assert cache.get_similar([0.0, 1.0, 0.0], namespace="e1|p1", collection_version="v1") is None
+
+
+def test_other_embedding_model_or_prompt_misses(cache):
+    cache.put_similar("Who directed it?", QUESTION, PAYLOAD, namespace="e1|p1", collection_version="v1")
+
+    assert cache.get_similar(QUESTION, namespace="e2|p1", collection_version="v1") is None
+    assert cache.get_similar(QUESTION, namespace="e1|p2", collection_version="v1") is None
+    # A different embedding size in the same namespace is a miss, not an error
+    assert cache.get_similar([1.0, 0.0], namespace="e1|p1", collection_version="v1") is None
+    assert cache.get_similar(QUESTION, namespace="e1|p1", collection_version="v1") is not None
+
+
+def test_collection_change_drops_entries(cache):
+    cache.put_similar("Who directed it?", QUESTION, PAYLOAD, namespace="e1|p1", collection_version="v1")
+
+    assert cache.get_similar(QUESTION, namespace="e1|p1", collection_version="v2") is None
+    assert cache.get_similar(QUESTION, namespace="e1|p1", collection_version="v1") is None
+
+
+def test_expired_entries_are_not_served(tmp_path):
+    cache = AnswerCache(
+        tmp_path / "answers.sqlite",
+        model_name="m",
+        temperature=0.0,
+        semantic_threshold=0.95,
+        semantic_ttl=60,
+    )
+    cache.put_similar("Who directed it?", QUESTION, PAYLOAD, collection_version="v1")
+    cache._conn.execute("UPDATE semantic_answers SET created_at = created_at - 120")
+    cache._semantic_key = None
+
+    assert cache.get_similar(QUESTION, collection_version="v1") is None
+
+
+def test_legacy_semantic_table_is_dropped(tmp_path):
+    path = tmp_path / "answers.sqlite"
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE semantic_answers (scope TEXT, question TEXT, vector BLOB, "
+        "payload TEXT, last_access REAL, PRIMARY KEY (scope, question))"
+    )
+    conn.execute("INSERT INTO semantic_answers VALUES ('m|0.0', 'q', x'00', '{}', 0)")
+    conn.commit()
+    conn.close()
+
+    cache = AnswerCache(path, model_name="m", temperature=0.0, semantic_threshold=0.95)
+
+    assert cache.get_similar(QUESTION) is None
+    cache.put_similar("q", QUESTION, PAYLOAD)
+    assert cache.get_similar(QUESTION)["answer"] == PAYLOAD["answer"]
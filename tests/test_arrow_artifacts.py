@@ -0,0 +1,40 @@
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from backend.infra import arrow_artifacts  # noqa: E402
+
+
+def chunk(doc_id, index, text, span=None):
+    metadata = {"chunk_index": index}
+    if span is not None:
+        metadata.update(char_start=span[0], char_end=span[1])
+    return {"chunk_id": f"{doc_id}_{index}", "doc_id": doc_id, "text": text, "metadata": metadata}
+
+
+@pytest.mark.parametrize("artifact_format", ["arrow", "parquet"])
+def test_chunk_table_joins_film_metadata_lazily(tmp_path, artifact_format):
+    docs_path = tmp_path / f"docs.{artifact_format}"
+    writer = arrow_artifacts.TableWriter(docs_path, arrow_artifacts.docs_schema(["Title", "Genre"]))
+    writer.write(
+        {"id": ["1", "2"], "text": ["plot a", "plot b"], "Title": ["A", "B"], "Genre": ["horror", "comedy"]}
+    )
+    writer.close()
+
+    chunks = [chunk("2", 0, "b0", (0, 2)), chunk("1", 0, "a0"), chunk("2", 1, "b1", (2, 4))]
+    chunks_path = tmp_path / f"chunks.{artifact_format}"
+    arrow_artifacts.write_chunks(chunks_path, chunks, docs_path=docs_path, batch_rows=2)
+
+    table = arrow_artifacts.ChunkTable(chunks_path, batch_rows=2)
+
+    films = {"1": {"Title": "A", "Genre": "horror"}, "2": {"Title": "B", "Genre": "comedy"}}
+    expected = [
+        {**c, "metadata": {**films[c["doc_id"]], "doc_id": c["doc_id"], "chunk_id": c["chunk_id"], **c["metadata"]}}
+        for c in chunks
+    ]
+    assert len(table) == 3
+    assert list(table) == expected
+    assert table[1] == expected[1]
+    assert table[-1] == expected[2]
+    with pytest.raises(IndexError):
+        table[3]
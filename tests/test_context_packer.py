@@ -0,0 +1,60 @@
+import string
+
+import pytest
+from langchain_core.documents import Document
+
+from backend.runtime.chat.context_packer import ContextPacker
+
+# One token per character (see the offline_tokenizer fixture)
+TEXT = (string.ascii_letters * 2)[:100]
+BLOCK = 4 + 100  # "[A]\n" + text
+SEPARATOR = 2
+MARKER = len(ContextPacker.TRUNCATION_MARKER)
+
+
+def format_block(doc):
+    return f"[{doc.metadata['title']}]\n{doc.page_content}"
+
+
+def films(*titles):
+    return [Document(page_content=TEXT, metadata={"title": title}) for title in titles]
+
+
+@pytest.fixture
+def pack(offline_tokenizer):
+    def pack(chunks, budget):
+        packer = ContextPacker(budget, model_name="fake", max_overlap=20)
+        blocks = packer.pack(chunks, format_block)
+        assert len("\n\n".join(blocks)) <= budget
+        return blocks
+
+    return pack
+
+
+def test_stops_adding_blocks_at_the_budget(pack):
+    blocks = pack(films("A", "B", "C"), budget=2 * BLOCK + SEPARATOR)
+
+    assert blocks == [f"[A]\n{TEXT}", f"[B]\n{TEXT}"]
+
+
+def test_truncates_the_last_block_to_the_remaining_budget(pack):
+    excerpt = ContextPacker.MIN_TRUNCATED_TOKENS + 6
+    blocks = pack(films("A", "B"), budget=BLOCK + SEPARATOR + 4 + excerpt + MARKER)
+
+    assert blocks[1] == f"[B]\n{TEXT[:excerpt]}{ContextPacker.TRUNCATION_MARKER}"
+
+
+def test_drops_an_excerpt_too_short_to_be_useful(pack):
+    excerpt = ContextPacker.MIN_TRUNCATED_TOKENS - 1
+    blocks = pack(films("A", "B"), budget=BLOCK + SEPARATOR + 4 + excerpt + MARKER)
+
+    assert blocks == [f"[A]\n{TEXT}"]
+
+
+def test_first_block_is_truncated_without_a_separator(pack):
+    # Exactly the smallest useful excerpt of the first block: no separator
+    # precedes it, so none may be charged against the budget
+    excerpt = ContextPacker.MIN_TRUNCATED_TOKENS
+    blocks = pack(films("A"), budget=4 + excerpt + MARKER)
+
+    assert blocks == [f"[A]\n{TEXT[:excerpt]}{ContextPacker.TRUNCATION_MARKER}"]
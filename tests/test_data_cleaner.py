@@ -0,0 +1,37 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from backend.config.settings import CLEANING_CONFIG
+from backend.pipelines.etl.data_cleaner import DataCleaner
+
+FRAMES = {
+    "strings": pd.DataFrame({
+        "Title": ["  Unknown ", "Alien", "unk", None],
+        "Genre": ["science   fiction", " UNKNOWN", "drama", ""],
+        "Director": ["Ridley Scott", "null", np.nan, "  None"],
+    }),
+    "numbers": pd.DataFrame({
+        "Release Year": [1979, "1994 ", "unknown", np.nan],
+        "Score": [1.5, np.nan, 3.0, 0.0],
+        "Count": [1, 2, 3, 4],
+    }),
+    "all_missing": pd.DataFrame({
+        "Title": [None, None],
+        "Genre": [np.nan, np.nan],
+    }),
+    "empty": pd.DataFrame({"Title": pd.Series([], dtype=object), "Genre": []}),
+}
+
+
+@pytest.mark.parametrize("name", FRAMES)
+def test_vectorized_cleaning_matches_row_wise(name):
+    def clean(vectorized):
+        cleaner = DataCleaner(
+            invalid_values=CLEANING_CONFIG["invalid_values"],
+            exceptions=CLEANING_CONFIG["exceptions"],
+            vectorized=vectorized,
+        )
+        return cleaner.clean(FRAMES[name].copy())
+
+    pd.testing.assert_frame_equal(clean(vectorized=True), clean(vectorized=False))
@@ -0,0 +1,57 @@
+import sqlite3
+
+from langchain_core.embeddings import Embeddings
+
+from backend.infra.embedding_cache import CachedEmbeddings
+
+
+class CountingEmbeddings(Embeddings):
+    def __init__(self):
+        self.embedded = []
+
+    def embed_documents(self, texts):
+        self.embedded.extend(texts)
+        return [[float(len(t)), 1.0] for t in texts]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+def access_times(path):
+    with sqlite3.connect(path) as conn:
+        return dict(conn.execute("SELECT text_hash, last_access FROM embeddings"))
+
+
+def test_hits_buffer_access_times_until_flush(tmp_path):
+    path = tmp_path / "cache.sqlite"
+    cache = CachedEmbeddings(CountingEmbeddings(), "model", path)
+    cache.embed_documents(["a", "b"])
+    written = access_times(path)
+    changes = cache._conn.total_changes
+
+    assert cache.embed_documents(["a", "b", "a"]) == [[1.0, 1.0], [1.0, 1.0], [1.0, 1.0]]
+    assert cache.embeddings.embedded == ["a", "b"]
+    assert cache._conn.total_changes == changes
+
+    cache.flush()
+    refreshed = access_times(path)
+    assert all(refreshed[key] > written[key] for key in written)
+
+
+def test_evicts_least_recently_used_without_recounting_each_put(tmp_path):
+    path = tmp_path / "cache.sqlite"
+    cache = CachedEmbeddings(CountingEmbeddings(), "model", path, max_entries=20)
+    cache.embed_documents([f"text {i}" for i in range(20)])
+    assert cache._count == 20
+
+    # A hit that is still buffered must count as recent when evicting
+    cache.embed_query("text 0")
+    cache.embed_documents(["new"])
+
+    assert cache._count == 19 == len(access_times(path))
+    assert cache._key("text 0") in access_times(path)
+    assert cache._key("text 1") not in access_times(path)
+
+    cache.embeddings.embedded.clear()
+    cache.embed_documents(["text 0", "new"])
+    assert cache.embeddings.embedded == []
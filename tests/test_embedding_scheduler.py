@@ -0,0 +1,90 @@
+import asyncio
+
+from langchain_core.embeddings import Embeddings
+
+from backend.pipelines.vectorstore.embedding_scheduler import EmbeddingScheduler
+
+MAX_CONCURRENCY = 4
+
+
+class RateLimitError(Exception):
+    status_code = 429
+
+
+class RateLimitedEmbeddings(Embeddings):
+    """
+    Rejects requests with a 429 while more than `capacity` are in flight
+    and for the first `rejected_first` calls. Records the number of
+    requests in flight as each one starts.
+    """
+
+    def __init__(self, capacity=None, rejected_first=0):
+        self.capacity = capacity
+        self.rejected_first = rejected_first
+        self.calls = 0
+        self.rejections = 0
+        self.in_flight = 0
+        self.trace = []
+
+    async def aembed_documents(self, texts):
+        self.calls += 1
+        self.in_flight += 1
+        self.trace.append(self.in_flight)
+        try:
+            await asyncio.sleep(0.002)
+            if self.calls <= self.rejected_first or (
+                self.capacity is not None and self.in_flight > self.capacity
+            ):
+                self.rejections += 1
+                raise RateLimitError("too many requests")
+            return [[float(len(t))] for t in texts]
+        finally:
+            self.in_flight -= 1
+
+    def embed_documents(self, texts):
+        raise AssertionError("the scheduler must use the async API")
+
+    def embed_query(self, text):
+        raise AssertionError("not used")
+
+
+def run(embeddings, n_batches):
+    scheduler = EmbeddingScheduler(
+        embeddings,
+        model_name="fake",
+        max_concurrency=MAX_CONCURRENCY,
+        max_retries=20,
+        base_backoff=0.001,
+    )
+    texts = [f"text {i}" for i in range(n_batches)]
+    delivered = []
+
+    async def on_batch(batch, vectors):
+        delivered.extend(batch)
+
+    asyncio.run(scheduler.run(texts, [[i] for i in range(n_batches)], on_batch))
+    return delivered
+
+
+def test_backs_off_to_the_rate_limit(offline_tokenizer):
+    embeddings = RateLimitedEmbeddings(capacity=2)
+    delivered = run(embeddings, 60)
+
+    assert sorted(delivered) == list(range(60))
+    assert embeddings.rejections > 0
+    # After the first burst the limit is halved and only probes one step
+    # above the capacity before halving again
+    assert max(embeddings.trace[MAX_CONCURRENCY:]) <= 3
+    assert embeddings.rejections < 30
+
+
+def test_ramps_back_up_after_rate_limits(offline_tokenizer):
+    embeddings = RateLimitedEmbeddings(rejected_first=MAX_CONCURRENCY)
+    delivered = run(embeddings, 60)
+
+    assert sorted(delivered) == list(range(60))
+    assert embeddings.rejections == MAX_CONCURRENCY
+    # The burst of 429s drops concurrency to one request at a time...
+    assert 1 in embeddings.trace[MAX_CONCURRENCY:MAX_CONCURRENCY + 3]
+    # ...and successes grow it back to the configured maximum
+    assert max(embeddings.trace[-20:]) == MAX_CONCURRENCY
@@ -0,0 +1,108 @@
+import json
+
+import pytest
+
+from backend.infra import versioned_dir
+from backend.infra.jsonl_store import JsonlIndexWriter, JsonlStore
+
+
+def _write(path, records, mode="wb"):
+    lines = [(json.dumps(r, ensure_ascii=False) + "\n").encode("utf-8") for r in records]
+    with open(path, mode) as f:
+        f.write(b"".join(lines))
+    return [str(r["id"]) for r in records], [len(line) for line in lines]
+
+
+def _write_indexed(path, records):
+    writer = JsonlIndexWriter(path, "id")
+    writer.add(*_write(path, records))
+    writer.finalize()
+
+
+def _records(start, stop):
+    return [{"id": str(i), "text": f"plot {i} ✓"} for i in range(start, stop)]
+
+
+@pytest.fixture
+def store_path(tmp_path):
+    return tmp_path / "docs.jsonl"
+
+
+def test_lookup_by_id(store_path):
+    records = _records(0, 500)
+    _write_indexed(store_path, records)
+
+    store = JsonlStore(store_path)
+    try:
+        assert len(store) == 500
+        assert store.get("0") == records[0]
+        assert store.get("499") == records[499]
+        assert store.get("500") is None
+        assert "42" in store
+        assert list(store) == records
+    finally:
+        store.close()
+
+
+def test_batched_append_matches_single_write(tmp_path, store_path):
+    records = _records(0, 300)
+    writer = JsonlIndexWriter(store_path, "id")
+    for start in range(0, 300, 64):
+        writer.add(*_write(store_path, records[start:start + 64], mode="ab"))
+    writer.finalize()
+
+    single = tmp_path / "single.jsonl"
+    _write_indexed(single, records)
+
+    assert store_path.read_bytes() == single.read_bytes()
+    for name in ("offsets.npy", "hashes.npy", "table.npy", "ids.bin", "ids.offsets.npy"):
+        assert (versioned_dir.current(JsonlStore.index_dir_for(store_path)) / name).read_bytes() == (
+            versioned_dir.current(JsonlStore.index_dir_for(single)) / name
+        ).read_bytes()
+
+
+def test_resume_appends_to_existing_index(store_path):
+    _write_indexed(store_path, _records(0, 100))
+
+    writer = JsonlIndexWriter(store_path, "id", start=store_path.stat().st_size)
+    writer.add(*_write(store_path, _records(100, 150), mode="ab"))
+    writer.finalize()
+
+    store = JsonlStore(store_path)
+    try:
+        assert len(store) == 150
+        assert store.get("7")["text"] == "plot 7 ✓"
+        assert store.get("149")["text"] == "plot 149 ✓"
+    finally:
+        store.close()
+
+
+def test_changed_file_is_reindexed(store_path):
+    _write_indexed(store_path, _records(0, 10))
+    _write(store_path, _records(10, 20), mode="ab")
+
+    assert not JsonlStore.is_indexed(store_path)
+    with pytest.raises(ValueError):
+        JsonlStore(store_path)
+
+    store = JsonlStore.open(store_path, "id")
+    try:
+        assert store.get("15")["id"] == "15"
+    finally:
+        store.close()
+
+
+def test_resume_without_index_scans_existing_lines(store_path):
+    _write(store_path, _records(0, 40))
+
+    writer = JsonlIndexWriter(store_path, "id", start=store_path.stat().st_size)
+    writer.add(*_write(store_path, _records(40, 60), mode="ab"))
+    writer.finalize()
+
+    store = JsonlStore(store_path)
+    try:
+        assert len(store) == 60
+        assert store.get("0")["id"] == "0"
+        assert store.get("59")["id"] == "59"
+    finally:
+        store.close()
@@ -0,0 +1,51 @@
+import json
+
+import pandas as pd
+
+from backend.infra.jsonl_store import JsonlStore
+from backend.pipelines.etl.jsonl_writer import JsonlWriter
+
+COLUMNS = ["Title", "Genre", "Plot"]
+
+
+def expected_line(row_id, title, genre, plot):
+    return json.dumps(
+        {"id": row_id, "text": plot, "metadata": {"Title": title, "Genre": genre}},
+        ensure_ascii=False,
+    ) + "\n"
+
+
+def test_lines_match_json_dumps_byte_for_byte(tmp_path):
+    df = pd.DataFrame(
+        {
+            "Title": ['The "Quoted" Film', "Amélie", None],
+            "Genre": ["drama\r\nromance", "  ", "horror\\noir"],
+            "Plot": ["Line one\r\nline two\ttab", "Un café à Paris 🎬", "Control \x01 char"],
+        },
+        index=[7, 8, 9],
+    )
+    output = tmp_path / "docs.jsonl"
+
+    writer = JsonlWriter(output, COLUMNS, batch_size=2)
+    writer.build(df)
+    writer.close()
+
+    assert output.read_bytes() == "".join([
+        expected_line("7", 'The "Quoted" Film', "drama, romance", "Line one\nline two\ttab"),
+        expected_line("8", "Amélie", "Not specified", "Un café à Paris 🎬"),
+        expected_line("9", "Not specified", "horror\\noir", "Control \x01 char"),
+    ]).encode("utf-8")
+
+
+def test_appended_batches_are_indexed(tmp_path):
+    output = tmp_path / "docs.jsonl"
+    writer = JsonlWriter(output, COLUMNS)
+    writer.build(pd.DataFrame({"Title": ["A"], "Genre": ["x"], "Plot": ["one"]}, index=[1]))
+    writer.build(
+        pd.DataFrame({"Title": ["B"], "Genre": ["y"], "Plot": ["two"]}, index=[2]), append=True
+    )
+    writer.close()
+
+    store = JsonlStore(output)
+    assert store.get("2")["text"] == "two"
+    assert store.get("1")["metadata"]["Title"] == "A"
@@ -0,0 +1,42 @@
+import numpy as np
+
+from backend.infra.local_index import LocalVectorIndex
+from backend.infra.vector_quantization import QuantizedVectors
+
+
+class SelfOnlyCompact:
+    """Compact search that ranks each stored vector first for itself and knows nothing else."""
+
+    mode = "fake"
+    truncate_dim = 0
+    nbytes = 0
+
+    def __init__(self, vectors):
+        self.vectors = vectors
+
+    def scores(self, queries):
+        return np.isclose(queries @ self.vectors.T, 1.0).astype(np.float32)
+
+
+def normalized(n, dim, seed=0):
+    vectors = np.random.default_rng(seed).standard_normal((n, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def test_recall_ignores_the_query_row():
+    vectors = normalized(500, 16)
+
+    report = LocalVectorIndex._evaluate_compact(vectors, SelfOnlyCompact(vectors), rescore_factor=1)
+
+    assert report["recall_compact"] < 0.1
+
+
+def test_recall_of_float16_is_near_exact():
+    vectors = normalized(500, 16)
+    compact = QuantizedVectors.build(vectors, "float16")
+
+    report = LocalVectorIndex._evaluate_compact(vectors, compact, rescore_factor=4)
+
+    assert report["recall_k"] == LocalVectorIndex.RECALL_K
+    assert report["recall_compact"] > 0.95
+    assert report["recall_rescored"] > 0.99
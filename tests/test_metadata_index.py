@@ -0,0 +1,29 @@
+from backend.infra.metadata_index import MetadataIndex
+
+METADATAS = [
+    {"Genre": "Horror, thriller", "Origin/Ethnicity": "Japanese", "Director": "Hideo Nakata", "Release Year": 1998},
+    {"Genre": "crime comedy", "Origin/Ethnicity": "American", "Director": "Joel Coen, Ethan Coen", "Release Year": 1996},
+    {"Genre": "western", "Origin/Ethnicity": "American", "Director": "John Ford", "Release Year": 1939},
+    {"Genre": "comedy", "Origin/Ethnicity": "British", "Director": "Not specified", "Release Year": None},
+]
+
+
+def build(tmp_path):
+    ids = [f"c{i}" for i in range(len(METADATAS))]
+    MetadataIndex.build(tmp_path / "meta", ids, METADATAS)
+    return MetadataIndex(tmp_path / "meta")
+
+
+def test_resolve_terms_lists_and_years(tmp_path):
+    index = build(tmp_path)
+
+    def ids(filters):
+        return index.ids_for(index.resolve(filters))
+
+    assert ids({"Genre": "horror"}) == ["c0"]
+    assert ids({"Genre": ["western", "crime comedy"]}) == ["c1", "c2"]
+    assert ids({"Genre": "comedy", "Release Year": "1990s"}) == ["c1"]
+    assert ids({"Origin/Ethnicity": "american", "Release Year": (None, 1950)}) == ["c2"]
+    assert ids({"Director": "Ethan Coen"}) == ["c1"]
+    assert ids({"Director": ""}) == []
+    assert ids({}) == ["c0", "c1", "c2", "c3"]
@@ -0,0 +1,89 @@
+import pytest
+from langchain_core.documents import Document
+
+from backend.runtime.retrieval.overlap_dedup import merge_overlap, stitch_chunks
+
+PLOT = (
+    "A young farmer leaves his village to find work in the city. "
+    "There he meets a man who runs a small theatre and offers him a job. "
+    "Years later he returns home as a famous actor."
+)
+
+
+def _chunk(doc_id, index, start, end, **extra):
+    return Document(
+        page_content=PLOT[start:end],
+        metadata={
+            "doc_id": doc_id,
+            "chunk_id": f"{doc_id}_{index}",
+            "chunk_index": index,
+            "char_start": start,
+            "char_end": end,
+            **extra,
+        },
+    )
+
+
+def test_merge_overlap_drops_word_aligned_overlap():
+    assert merge_overlap("the city. There he", "There he meets a man", 10) == (
+        "the city. There he meets a man"
+    )
+
+
+def test_merge_overlap_ignores_short_chance_match():
+    # "a" ends the left chunk and starts the right one by chance
+    assert merge_overlap("lived in a", "a man arrives", 10) == "lived in a\na man arrives"
+
+
+def test_merge_overlap_requires_word_boundaries():
+    # "his" matches inside "this" but would cut a word
+    assert merge_overlap("ending this", "his story", 6, min_overlap=3) == "ending this\nhis story"
+
+
+def test_stitch_uses_char_spans():
+    chunks = [_chunk("1", 0, 0, 80), _chunk("1", 1, 60, 140), _chunk("1", 2, 130, len(PLOT))]
+
+    stitched = stitch_chunks(chunks, max_overlap=20)
+
+    assert len(stitched) == 1
+    assert stitched[0].page_content == PLOT
+    assert stitched[0].metadata["chunk_ids"] == ["1_0", "1_1", "1_2"]
+    assert stitched[0].metadata["chunk_index_end"] == 2
+    assert stitched[0].metadata["char_end"] == len(PLOT)
+
+
+def test_stitch_keeps_rank_and_separates_gaps():
+    chunks = [
+        _chunk("2", 3, 0, 40),
+        _chunk("1", 1, 100, 120),
+        _chunk("2", 4, 50, 90),  # consecutive index, but a gap in the text
+        _chunk("1", 5, 0, 10),
+    ]
+
+    stitched = stitch_chunks(chunks, max_overlap=20)
+
+    assert [d.metadata["doc_id"] for d in stitched] == ["2", "1", "1"]
+    assert stitched[0].page_content == PLOT[0:40] + "\n" + PLOT[50:90]
+    assert stitched[1].page_content == PLOT[100:120]
+
+
+def test_stitch_passes_through_chunks_without_position():
+    chunk = Document(page_content="no position", metadata={"chunk_id": "x"})
+    assert stitch_chunks([chunk], max_overlap=20) == [chunk]
+
+
+@pytest.mark.parametrize("with_positions", [True, False])
+def test_stitch_merges_spans_sharing_chunks(with_positions):
+    # Chunks 0-1 and chunks 1-2, e.g. two spans stitched by earlier passes
+    first = _chunk("1", 0, 0, 140, chunk_index_end=1, chunk_ids=["1_0", "1_1"])
+    second = _chunk("1", 1, 60, len(PLOT), chunk_index_end=2, chunk_ids=["1_1", "1_2"])
+    if not with_positions:
+        for chunk in (first, second):
+            del chunk.metadata["char_start"], chunk.metadata["char_end"]
+
+    stitched = stitch_chunks([second, first], max_overlap=20)
+
+    assert len(stitched) == 1
+    assert stitched[0].page_content == PLOT
+    assert stitched[0].metadata["chunk_ids"] == ["1_0", "1_1", "1_2"]
+    assert stitched[0].metadata["chunk_index_end"] == 2
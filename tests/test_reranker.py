@@ -0,0 +1,70 @@
+import types
+
+import pytest
+from langchain_core.documents import Document
+
+import backend.runtime.retrieval.reranker as reranker_module
+from backend.runtime.retrieval.reranker import LexicalOverlapScorer, Reranker
+
+# First-stage order: the passages about ghosts come last
+PASSAGES = [
+    "a cowboy rides across the desert",
+    "two detectives chase a killer",
+    "a family moves to the countryside",
+    "a chef opens a restaurant",
+    "ghosts haunt an old house",
+    "a girl sees ghosts in the house",
+]
+
+
+class FakeRetriever:
+    top_k = 2
+
+    def retrieve(self, question, top_k=None, filters=None):
+        return [Document(page_content=text, metadata={"rank": i}) for i, text in enumerate(PASSAGES)]
+
+
+class CountingScorer(LexicalOverlapScorer):
+    def __init__(self):
+        self.scored = 0
+
+    def score(self, question, texts):
+        self.scored += len(texts)
+        return super().score(question, texts)
+
+
+@pytest.fixture
+def reranker(offline_tokenizer, monkeypatch):
+    # Every clock reading advances 100 ms, so each scored batch costs 100 ms
+    ticks = iter(range(0, 10_000, 100))
+    monkeypatch.setattr(
+        reranker_module, "time", types.SimpleNamespace(perf_counter=lambda: next(ticks) / 1000)
+    )
+
+    def reranker(budget_ms):
+        return Reranker(
+            FakeRetriever(), CountingScorer(), top_k=2, candidates=6, batch_size=2, budget_ms=budget_ms
+        )
+
+    return reranker
+
+
+def test_reranks_by_relevance_within_budget(reranker):
+    stage = reranker(budget_ms=1000)
+
+    found = stage.retrieve("a girl haunted by ghosts")
+
+    assert [d.metadata["rank"] for d in found] == [5, 4]
+    assert stage.scorer.scored == len(PASSAGES)
+    assert stage.stats()["fallbacks"] == 0
+
+
+def test_falls_back_to_first_stage_order_over_budget(reranker):
+    stage = reranker(budget_ms=150)
+
+    found = stage.retrieve("a girl haunted by ghosts")
+
+    assert [d.metadata["rank"] for d in found] == [0, 1]
+    # Scoring stopped after the batch that crossed the budget
+    assert stage.scorer.scored == 4
+    assert stage.stats()["fallbacks"] == 1
@@ -0,0 +1,106 @@
+import numpy as np
+import pytest
+from langchain_core.documents import Document
+
+import backend.runtime.retrieval.retriever as retriever_module
+from backend.config.settings import RETRIEVER_CONFIG, VECTORSTORE_CONFIG
+from backend.infra.local_index import LocalVectorIndex
+from backend.infra.metadata_index import MetadataIndex
+
+DIM = 8
+
+
+class FakeEmbeddings:
+    def embed_query(self, text):
+        return [1.0] * DIM
+
+    async def aembed_query(self, text):
+        return self.embed_query(text)
+
+
+def build_generation(tmp_path, prefix, genres):
+    ids = [f"{prefix}{i}" for i in range(len(genres))]
+    metadatas = [{"chunk_id": i, "Genre": g} for i, g in zip(ids, genres)]
+    vectors = np.random.default_rng(len(genres)).standard_normal((len(ids), DIM))
+    LocalVectorIndex.build(tmp_path / "local", ids, ids, metadatas, vectors)
+    MetadataIndex.build(tmp_path / "meta", ids, metadatas)
+
+
+@pytest.fixture
+def retriever(tmp_path, monkeypatch):
+    build_generation(tmp_path, "a", ["horror", "comedy"] * 10)
+    monkeypatch.setitem(VECTORSTORE_CONFIG, "backend", "local")
+    monkeypatch.setitem(VECTORSTORE_CONFIG, "local_index_dir", str(tmp_path / "local"))
+    monkeypatch.setitem(VECTORSTORE_CONFIG, "metadata_index_dir", str(tmp_path / "meta"))
+    monkeypatch.setitem(VECTORSTORE_CONFIG, "normalize_metadata", False)
+    monkeypatch.setitem(RETRIEVER_CONFIG, "hybrid", False)
+    monkeypatch.setitem(RETRIEVER_CONFIG, "parent_document", False)
+    monkeypatch.setitem(RETRIEVER_CONFIG, "use_threshold", False)
+    monkeypatch.setitem(RETRIEVER_CONFIG, "top_k", 5)
+    monkeypatch.setitem(RETRIEVER_CONFIG, "result_cache_size", 16)
+    monkeypatch.setitem(RETRIEVER_CONFIG, "version_check_interval", 0)
+    monkeypatch.setattr(retriever_module, "build_embedding_function", FakeEmbeddings)
+    return retriever_module.Retriever()
+
+
+def test_query_keeps_its_generation_across_a_swap(tmp_path, retriever, monkeypatch):
+    resolve = retriever._resolve_filters
+
+    def resolve_then_swap(indexes, filters):
+        rows = resolve(indexes, filters)
+        # A rebuild with fewer chunks lands while this query is in flight
+        build_generation(tmp_path, "b", ["horror"] * 3)
+        retriever._invalidate_if_collection_changed()
+        return rows
+
+    monkeypatch.setattr(retriever, "_resolve_filters", resolve_then_swap)
+    in_flight = retriever.retrieve("ghosts", filters={"Genre": "horror"})
+    monkeypatch.setattr(retriever, "_resolve_filters", resolve)
+
+    assert len(in_flight) == 5
+    assert all(d.metadata["chunk_id"].startswith("a") for d in in_flight)
+    assert all(d.metadata["Genre"] == "horror" for d in in_flight)
+
+    # The in-flight result was cached under its own generation, not the new one
+    after = retriever.retrieve("ghosts", filters={"Genre": "horror"})
+    assert sorted(d.metadata["chunk_id"] for d in after) == ["b0", "b1", "b2"]
+
+
+class FakeChroma:
+    """Unfiltered searches rank records by id; `$in` filters are applied."""
+
+    def __init__(self, ids):
+        self.ids = ids
+        self._collection = self
+        self.requested = []
+
+    def count(self):
+        return len(self.ids)
+
+    def similarity_search_by_vector_with_relevance_scores(self, embedding, k, filter=None):
+        self.requested.append(k)
+        allowed = set(filter["chunk_id"]["$in"]) if filter else None
+        ranked = [i for i in self.ids if allowed is None or i in allowed]
+        return [
+            (Document(page_content=i, metadata={"chunk_id": i}, id=i), rank / 100)
+            for rank, i in enumerate(ranked[:k])
+        ]
+
+
+def test_large_chroma_filters_widen_until_k_matches(tmp_path, retriever, monkeypatch):
+    # Matches sit at the end of the unfiltered ranking
+    ids = [f"c{i}" for i in range(400)]
+    genres = ["comedy"] * 390 + ["horror"] * 10
+    metadatas = [{"chunk_id": i, "Genre": g} for i, g in zip(ids, genres)]
+    MetadataIndex.build(tmp_path / "meta", ids, metadatas)
+    retriever._indexes = retriever_module.RetrieverIndexes(
+        (), None, MetadataIndex(tmp_path / "meta"), None, None, None
+    )
+    retriever.vectordb = FakeChroma(ids)
+    monkeypatch.setattr(retriever, "CHROMA_MAX_FILTER_IDS", 5)
+    monkeypatch.setattr(retriever, "_current_indexes", lambda: retriever._indexes)
+
+    found = retriever.retrieve("ghosts", filters={"Genre": "horror"})
+
+    assert [d.metadata["chunk_id"] for d in found] == [f"c{i}" for i in range(390, 395)]
+    assert retriever.vectordb.requested == [100, 400]
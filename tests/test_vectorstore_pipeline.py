@@ -0,0 +1,97 @@
+import json
+
+import pytest
+from langchain_chroma import Chroma
+from langchain_core.embeddings import Embeddings
+
+import backend.pipelines.vectorstore.vectorstore_pipeline as pipeline_module
+from backend.config.settings import ARTIFACT_CONFIG, VECTORSTORE_CONFIG
+
+N_CHUNKS = 10
+BATCH_SIZE = 2
+
+
+class FakeEmbeddings(Embeddings):
+    """Records every embedded text; raises once `fail_after` calls succeeded."""
+
+    def __init__(self, fail_after=None):
+        self.fail_after = fail_after
+        self.calls = 0
+        self.embedded = []
+
+    def embed_documents(self, texts):
+        if self.fail_after is not None and self.calls >= self.fail_after:
+            raise RuntimeError("embedding service down")
+        self.calls += 1
+        self.embedded.extend(texts)
+        return [[float(len(t)), 1.0, 0.0] for t in texts]
+
+    def embed_query(self, text):
+        return [float(len(text)), 1.0, 0.0]
+
+
+@pytest.fixture
+def chunks_path(tmp_path, monkeypatch, offline_tokenizer):
+    path = tmp_path / "chunks.jsonl"
+    with path.open("w", encoding="utf-8") as f:
+        for i in range(N_CHUNKS):
+            chunk = {"chunk_id": f"c{i}", "text": f"plot {i}", "metadata": {"Title": f"Film {i}"}}
+            f.write(json.dumps(chunk) + "\n")
+
+    monkeypatch.setitem(ARTIFACT_CONFIG, "format", "jsonl")
+    for key, value in {
+        "backend": "chroma",
+        "checkpoint": True,
+        "incremental": False,
+        "batch_size": BATCH_SIZE,
+        "max_concurrency": 1,
+        "max_retries": 0,
+        "persist_dir": str(tmp_path / "chroma"),
+        "collection_name": "test",
+        "metadata_index": False,
+        "sparse_index": False,
+        "normalize_metadata": False,
+    }.items():
+        monkeypatch.setitem(VECTORSTORE_CONFIG, key, value)
+    return path
+
+
+def run_pipeline(chunks_path, monkeypatch, embeddings):
+    monkeypatch.setattr(pipeline_module, "build_embedding_function", lambda: embeddings)
+    pipeline_module.VectorStorePipeline(chunks_path).run()
+
+
+@pytest.mark.parametrize("concurrent", [False, True])
+def test_interrupted_build_resumes_from_checkpoint(chunks_path, monkeypatch, concurrent):
+    monkeypatch.setitem(VECTORSTORE_CONFIG, "concurrent", concurrent)
+    checkpoint = chunks_path.parent / "chroma" / "test.checkpoint.jsonl"
+
+    crashing = FakeEmbeddings(fail_after=2)
+    with pytest.raises(Exception):
+        run_pipeline(chunks_path, monkeypatch, crashing)
+
+    with checkpoint.open(encoding="utf-8") as f:
+        committed = {chunk_id for line in f for chunk_id in json.loads(line)["chunks"]}
+    succeeded = {f"c{i}" for i in range(2 * BATCH_SIZE)}
+    if concurrent:
+        # Batches still waiting to be written when the run fails are dropped
+        assert {"c0", "c1"} <= committed <= succeeded
+    else:
+        assert committed == succeeded
+
+    resumed = FakeEmbeddings()
+    run_pipeline(chunks_path, monkeypatch, resumed)
+
+    # Only the batches missing from the checkpoint are embedded again
+    assert sorted(resumed.embedded) == sorted(
+        f"plot {i}" for i in range(N_CHUNKS) if f"c{i}" not in committed
+    )
+    assert not checkpoint.exists()
+
+    stored = Chroma(
+        collection_name="test",
+        embedding_function=resumed,
+        persist_directory=VECTORSTORE_CONFIG["persist_dir"],
+    ).get()
+    assert sorted(stored["ids"]) == sorted(f"c{i}" for i in range(N_CHUNKS))
+    assert sorted(stored["documents"]) == sorted(f"plot {i}" for i in range(N_CHUNKS))
@@ -0,0 +1,62 @@
+import os
+
+from backend.infra import versioned_dir
+from backend.infra.metadata_index import MetadataIndex
+
+
+def write_generation(directory, content):
+    generation = versioned_dir.new_generation(directory)
+    (generation / "data.txt").write_text(content)
+    return generation
+
+
+def test_publish_switches_the_pointer_and_keeps_the_previous_generation(tmp_path):
+    directory = tmp_path / "index"
+    first = write_generation(directory, "1")
+    versioned_dir.publish(first)
+    v1 = versioned_dir.version_of(directory)
+
+    second = write_generation(directory, "2")
+    # Unpublished: readers still see the first generation
+    assert (versioned_dir.current(directory) / "data.txt").read_text() == "1"
+    versioned_dir.publish(second)
+
+    assert (versioned_dir.current(directory) / "data.txt").read_text() == "2"
+    assert versioned_dir.version_of(directory) != v1
+    assert first.exists()
+
+    crashed = write_generation(directory, "crashed")
+    versioned_dir.publish(write_generation(directory, "3"))
+
+    assert not first.exists() and not crashed.exists()
+    assert second.exists()
+    assert sorted(os.listdir(directory)) == sorted(
+        [versioned_dir.POINTER, second.name, versioned_dir.current(directory).name]
+    )
+
+
+def test_legacy_directory_is_read_until_republished(tmp_path):
+    directory = tmp_path / "index"
+    directory.mkdir()
+    (directory / "data.txt").write_text("legacy")
+    assert versioned_dir.current(directory) == directory
+    assert versioned_dir.version_of(directory) is not None
+    assert versioned_dir.version_of(tmp_path / "missing") is None
+
+    versioned_dir.publish(write_generation(directory, "1"))
+    # Kept for readers of the legacy layout until the next publish
+    assert (directory / "data.txt").exists()
+    versioned_dir.publish(write_generation(directory, "2"))
+    assert not (directory / "data.txt").exists()
+
+
+def test_indexes_rebuild_in_place(tmp_path):
+    directory = tmp_path / "meta"
+    MetadataIndex.build(directory, ["a"], [{"Genre": "horror"}])
+    old = MetadataIndex(directory)
+    MetadataIndex.build(directory, ["b", "c"], [{"Genre": "horror"}, {"Genre": "drama"}])
+
+    # An index loaded before the rebuild keeps reading its own generation
+    assert old.ids_for(old.resolve({"Genre": "horror"})) == ["a"]
+    new = MetadataIndex(directory)
+    assert new.ids_for(new.resolve({"Genre": "horror"})) == ["b"]